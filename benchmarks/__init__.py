@@ -0,0 +1,4 @@
+"""
+Benchmarks for the Chatlang interpreter. `python -m benchmarks` runs the standard scaling report (see harness.py);
+the other modules are standalone benchmarks for individual features, each runnable with `python -m benchmarks.NAME`.
+"""
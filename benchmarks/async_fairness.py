@@ -0,0 +1,76 @@
+"""
+Latency fairness of Interpreter.run() when many programs share one event loop.
+
+A handful of long goto loops are started alongside many short programs. With blocking interpretation every short
+program waits for the long ones ahead of it; with cooperative scheduling it only waits for a few slices.
+
+    python -m benchmarks.async_fairness [--programs N] [--slice N]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import statistics
+import time
+
+from chat_interpreter import Interpreter, Lexer, Parser
+
+COUNTER = """[10:00] Bot: I am 0.
+[10:01] Bot: I am 1 plus myself.
+[10:02] Bot: If I am less than {n}, go to [10:01].
+"""
+
+
+def make_interpreter(n):
+    scanner = Lexer(COUNTER.format(n=n), '<bench>')
+    scanner.scan_tokens()
+    return Interpreter(Parser(scanner))
+
+
+def long_iterations(i):
+    # One program in twenty is long.
+    return 20000 if i % 20 == 0 else 20
+
+
+async def timed(coro, started):
+    await coro
+    return time.perf_counter() - started
+
+
+async def run_cooperative(programs, slice_size):
+    started = time.perf_counter()
+    tasks = [timed(make_interpreter(long_iterations(i)).run(slice_size), started) for i in range(programs)]
+    return await asyncio.gather(*tasks)
+
+
+async def run_blocking(programs):
+    async def blocking(interpreter):
+        interpreter.interpret()
+
+    started = time.perf_counter()
+    tasks = [timed(blocking(make_interpreter(long_iterations(i))), started) for i in range(programs)]
+    return await asyncio.gather(*tasks)
+
+
+def report(name, latencies, programs):
+    short = sorted(t for i, t in enumerate(latencies) if long_iterations(i) < 20000)
+    p99 = short[min(len(short) - 1, int(len(short) * 0.99))]
+    print(f"{name:12} short programs: median {statistics.median(short) * 1000:8.2f} ms, "
+          f"p99 {p99 * 1000:8.2f} ms, total {max(latencies) * 1000:8.2f} ms")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--programs', type=int, default=200)
+    arg_parser.add_argument('--slice', type=int, default=64)
+    args = arg_parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        blocking = asyncio.run(run_blocking(args.programs))
+        cooperative = asyncio.run(run_cooperative(args.programs, args.slice))
+    report('blocking', blocking, args.programs)
+    report('cooperative', cooperative, args.programs)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+Benchmark harness timing Lexer.scan_tokens, Parser.parse and Interpreter.interpret separately.
+
+Each size in the scaling curve is run several times and summarised; peak memory is measured in a separate, traced run
+so tracemalloc does not distort the timings. Results can be written to JSON and compared against an earlier run:
+
+    python -m benchmarks --sizes 250 500 1000 2000 --output after.json --compare before.json
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+from chat_interpreter import Interpreter, Lexer, Parser
+from benchmarks.workload import generate
+
+PHASES = ['lex', 'parse', 'interpret']
+
+
+class NullWriter(io.TextIOBase):
+    def writable(self):
+        return True
+
+    def write(self, s):
+        return len(s)
+
+
+def run_phases(source):
+    """Runs source once, returning the wall time of each phase in seconds."""
+    times = {}
+    start = time.perf_counter()
+    scanner = Lexer(source, '<bench>')
+    scanner.scan_tokens()
+    times['lex'] = time.perf_counter() - start
+
+    parser = Parser(scanner)
+    start = time.perf_counter()
+    tree = parser.parse()
+    times['parse'] = time.perf_counter() - start
+
+    # interpret() would parse again, so visit the tree we already have.
+    interpreter = Interpreter(parser)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(NullWriter()):
+        interpreter.visit(tree)
+    times['interpret'] = time.perf_counter() - start
+    return times
+
+
+def peak_memory(source):
+    tracemalloc.start()
+    try:
+        run_phases(source)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def summarize(samples):
+    return {
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.mean(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        'runs': len(samples),
+    }
+
+
+def measure(source, repeat=5):
+    """Returns per-phase timing statistics and peak memory for repeat runs of source."""
+    runs = [run_phases(source) for _ in range(repeat)]
+    result = {phase: summarize([run[phase] for run in runs]) for phase in PHASES}
+    result['bytes'] = len(source.encode('utf-8'))
+    result['peak_memory'] = peak_memory(source)
+    return result
+
+
+def scaling(sizes, repeat=5, users=10, seed=0):
+    """Measures a workload of each size (in messages), returning a list of results for the scaling curve."""
+    curve = []
+    for size in sizes:
+        result = measure(generate(users=users, messages=size, seed=seed), repeat)
+        result['messages'] = size
+        curve.append(result)
+    return curve
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(curve, baseline=None):
+    lines = [f"{'messages':>9} {'bytes':>9} " + ' '.join(f"{phase + ' ms':>13}" for phase in PHASES) +
+             f" {'peak MiB':>9}"]
+    old = {r['messages']: r for r in baseline['curve']} if baseline else {}
+    for r in curve:
+        cells = []
+        for phase in PHASES:
+            cell = f"{r[phase]['median'] * 1000:.2f}"
+            if r['messages'] in old:
+                cell += f" x{r[phase]['median'] / old[r['messages']][phase]['median']:.2f}"
+            cells.append(f"{cell:>13}")
+        lines.append(f"{r['messages']:>9} {r['bytes']:>9} " + ' '.join(cells) +
+                     f" {r['peak_memory'] / 2 ** 20:>9.2f}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=[250, 500, 1000, 2000, 4000])
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    arg_parser.add_argument('--users', type=int, default=10)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--output', help="write results to this JSON file")
+    arg_parser.add_argument('--compare', help="JSON results of an earlier run to compare medians against")
+    args = arg_parser.parse_args(argv)
+
+    curve = scaling(args.sizes, args.repeat, args.users, args.seed)
+    results = {
+        'revision': git_revision(),
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'config': {'users': args.users, 'seed': args.seed, 'repeat': args.repeat},
+        'curve': curve,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+    print(report(curve, baseline))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,70 @@
+"""
+Overhead of the hook API on the interpreter's dispatch loop.
+
+Compares a plain Interpreter (the disabled path, identical to the dispatch before hooks existed) with one that had
+handlers installed and removed again and with one running no-op handlers for every event.
+
+    python -m benchmarks.hook_overhead [--messages N] [--repeat N]
+"""
+import argparse
+import contextlib
+import statistics
+import time
+
+from chat_interpreter import Interpreter, Lexer, Parser
+from chat_interpreter.hooks import EVENTS
+from benchmarks.harness import NullWriter
+from benchmarks.workload import generate
+
+
+def noop(interpreter, *args):
+    pass
+
+
+def time_interpret(tree, parser, configure):
+    interpreter = Interpreter(parser)
+    configure(interpreter)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(NullWriter()):
+        interpreter.visit(tree)
+    return time.perf_counter() - start
+
+
+def removed(interpreter):
+    for event in EVENTS:
+        interpreter.add_hook(event, noop)
+    for event in EVENTS:
+        interpreter.remove_hook(event, noop)
+
+
+def enabled(interpreter):
+    for event in EVENTS:
+        interpreter.add_hook(event, noop)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--messages', type=int, default=2000)
+    arg_parser.add_argument('--repeat', type=int, default=7)
+    args = arg_parser.parse_args()
+
+    scanner = Lexer(generate(messages=args.messages), '<bench>')
+    scanner.scan_tokens()
+    parser = Parser(scanner)
+    tree = parser.parse()
+
+    configs = {'plain': lambda interpreter: None, 'removed': removed, 'no-op hooks': enabled}
+    # Interleave the configurations so machine noise hits them all alike, and keep the best run of each.
+    times = {name: [] for name in configs}
+    for _ in range(args.repeat):
+        for name, configure in configs.items():
+            times[name].append(time_interpret(tree, parser, configure))
+
+    plain = min(times['plain'])
+    for name, samples in times.items():
+        print(f"{name:12} min {min(samples) * 1000:8.2f} ms  median {statistics.median(samples) * 1000:8.2f} ms  "
+              f"x{min(samples) / plain:.3f}")
+
+
+if __name__ == '__main__':
+    main()
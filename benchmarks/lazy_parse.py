@@ -0,0 +1,81 @@
+"""
+Start-up time of a function-heavy log with and without lazy function bodies.
+
+The log declares many functions with long bodies and calls only a fraction of them, as large generated logs tend to.
+Each phase and the total time to run the whole program are reported both ways; lazy parsing moves the cost of the
+called bodies into interpret. The outputs of the two runs are compared, so a saving only counts if lazy parsing
+printed the same thing.
+
+    python -m benchmarks.lazy_parse [--functions 2000] [--body 20] [--called 0.05] [--repeat N]
+"""
+import argparse
+import contextlib
+import io
+import random
+import statistics
+import time
+
+from chat_interpreter import Interpreter, Lexer, Parser
+
+
+def function_log(functions, body, called, seed=0):
+    rand = random.Random(seed)
+    lines = ['[00:00] Alice: My total is 0.']
+    for i in range(functions):
+        hh, mm = divmod(i + 1, 60)
+        stmts = ' '.join(f"Let my scratch be left side times {j + 2} plus right side remain 1000."
+                         for j in range(body))
+        lines.append(f"[{hh % 24:02}:{mm:02}] Alice: Make my helper{i} do with left side, right side: {stmts} "
+                     f"If my scratch is greater than 500, return my scratch minus 500. Return my scratch. Done.")
+    names = rand.sample(range(functions), max(1, int(functions * called)))
+    for i in names:
+        lines.append(f"[23:59] Alice: Let my total be call my helper{i} with my total, {i} remain 1000.")
+    lines.append('[23:59] Alice: Say my total.')
+    return '\n'.join(lines) + '\n'
+
+
+def time_run(source, lazy):
+    out = io.StringIO()
+    start = time.perf_counter()
+    scanner = Lexer(source, '<bench>')
+    scanner.scan_tokens()
+    lexed = time.perf_counter()
+    parser = Parser(scanner, lazy=lazy)
+    tree = parser.parse()
+    parsed = time.perf_counter()
+    with contextlib.redirect_stdout(out):
+        Interpreter(parser).visit(tree)
+    end = time.perf_counter()
+    return {'lex': lexed - start, 'parse': parsed - lexed, 'interpret': end - parsed, 'total': end - start}, \
+        out.getvalue()
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(prog='python -m benchmarks.lazy_parse')
+    arg_parser.add_argument('--functions', type=int, default=2000)
+    arg_parser.add_argument('--body', type=int, default=20, help="statements per function body")
+    arg_parser.add_argument('--called', type=float, default=0.05, help="fraction of the functions that are called")
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args(argv)
+
+    source = function_log(args.functions, args.body, args.called)
+    results = {False: [], True: []}
+    # Interleaved, so machine noise hits both modes alike.
+    for _ in range(args.repeat):
+        for lazy in results:
+            results[lazy].append(time_run(source, lazy))
+
+    same = 'same' if results[False][0][1] == results[True][0][1] else 'DIFFERENT'
+    print(f"{args.functions} functions of {args.body} statements, {args.called:.0%} called, "
+          f"{len(source.encode('utf-8')) / 1e6:.1f} MB")
+    medians = {lazy: {phase: statistics.median(times[phase] for times, _ in runs) for phase in runs[0][0]}
+               for lazy, runs in results.items()}
+    for lazy, times in medians.items():
+        print(f"{'lazy' if lazy else 'eager':5}  " + '  '.join(f"{phase} {seconds * 1000:8.2f} ms"
+                                                           for phase, seconds in times.items()))
+    print(f"parse speedup {medians[False]['parse'] / medians[True]['parse']:.2f}x  "
+          f"total speedup {medians[False]['total'] / medians[True]['total']:.2f}x  output {same}")
+
+
+if __name__ == '__main__':
+    main()
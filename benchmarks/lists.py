@@ -0,0 +1,87 @@
+"""
+Lists against the variable-per-element pattern (`item one`, `item two`, ...) they replace.
+
+Both programs fill N values, sum them and double every one of them. With variables, every element is its own dict
+entry in Interpreter.scopes and every step is one statement per element. With a list the values are appended into
+one array, and the sum and the doubling are single native operations. Interpret time and the memory the program's
+values hold afterwards are reported both ways, and the printed sums compared.
+
+    python -m benchmarks.lists [--sizes 1000 10000 50000] [--repeat N]
+"""
+import argparse
+import contextlib
+import io
+import statistics
+import time
+import tracemalloc
+
+from chat_interpreter import Interpreter, Lexer, Parser
+
+DIGITS = ['zero', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine']
+
+
+def name(k):
+    return 'item ' + ' '.join(DIGITS[int(digit)] for digit in str(k))
+
+
+def variables_program(size):
+    lines = ['[10:00] Ann: My total is 0.']
+    lines += [f'[10:01] Ann: My {name(k)} is {k}.' for k in range(size)]
+    lines += [f'[10:02] Ann: Let my total be my total plus my {name(k)}.' for k in range(size)]
+    lines += [f'[10:03] Ann: Let my {name(k)} be my {name(k)} times 2.' for k in range(size)]
+    lines.append('[10:04] Ann: Say my total.')
+    return '\n'.join(lines) + '\n'
+
+
+def list_program(size):
+    lines = ['[10:00] Ann: My items is list.']
+    lines += [f'[10:01] Ann: Append {k} to my items.' for k in range(size)]
+    lines.append('[10:02] Ann: Let my total be call sum with my items. Let my items be my items times 2.')
+    lines.append('[10:04] Ann: Say my total.')
+    return '\n'.join(lines) + '\n'
+
+
+def run(source, trace_memory=False):
+    scanner = Lexer(source, '<bench>')
+    scanner.scan_tokens()
+    parser = Parser(scanner)
+    tree = parser.parse()
+    interpreter = Interpreter(parser)
+    out = io.StringIO()
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(out):
+        interpreter.visit(tree)
+    seconds = time.perf_counter() - start
+    memory = None
+    if trace_memory:
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+    return seconds, memory, out.getvalue()
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(prog='python -m benchmarks.lists')
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args(argv)
+
+    print(f"{'elements':>8} {'variables ms':>12} {'list ms':>8} {'speedup':>8} {'variables KiB':>13} {'list KiB':>9}"
+          f"  output")
+    for size in args.sizes:
+        sources = {'variables': variables_program(size), 'list': list_program(size)}
+        times = {kind: [] for kind in sources}
+        # Interleaved, so machine noise hits both alike.
+        for _ in range(args.repeat):
+            for kind, source in sources.items():
+                times[kind].append(run(source)[0])
+        memory = {kind: run(source, trace_memory=True) for kind, source in sources.items()}
+        same = 'same' if memory['variables'][2] == memory['list'][2] else 'DIFFERENT'
+        variables, listed = statistics.median(times['variables']), statistics.median(times['list'])
+        print(f"{size:>8} {variables * 1000:>12.2f} {listed * 1000:>8.2f} {variables / listed:>7.1f}x "
+              f"{memory['variables'][1] / 1024:>13.1f} {memory['list'][1] / 1024:>9.1f}  {same}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Sequential against parallel execution of multi-user logs with little cross-talk.
+
+Each log is run both ways and the outputs compared, so a speedup only counts if the parallel run printed exactly what
+the sequential one did. The number of independent components found by the scheduler is reported alongside; the
+speedup is bounded by it, by the number of jobs and by the CPUs available.
+
+    python -m benchmarks.parallel_users [--users 4 8 16] [--messages 20000] [--cross-talk 0 0.0005] [--jobs N]
+        [--loop-iterations 200]
+"""
+import argparse
+import contextlib
+import io
+import os
+import time
+
+from chat_interpreter.parallel import execute_parallel, parse, plan
+from chat_interpreter.runner import execute
+from benchmarks.workload import generate
+
+
+def time_run(run, source, *args):
+    out = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(out):
+        run(source, '<bench>', *args)
+    return time.perf_counter() - start, out.getvalue()
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(prog='python -m benchmarks.parallel_users')
+    arg_parser.add_argument('--users', type=int, nargs='+', default=[4, 8, 16])
+    arg_parser.add_argument('--messages', type=int, default=20000)
+    arg_parser.add_argument('--cross-talk', type=float, nargs='+', default=[0, 0.0005])
+    arg_parser.add_argument('--loop-iterations', type=int, default=200)
+    arg_parser.add_argument('--jobs', type=int, help="worker processes (default: one per CPU)")
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args(argv)
+
+    print(f"{os.cpu_count()} CPUs, jobs={args.jobs or os.cpu_count()}")
+    print(f"{'users':>5} {'cross-talk':>10} {'components':>10} {'sequential ms':>13} {'parallel ms':>11} "
+          f"{'speedup':>8}  output")
+    for users in args.users:
+        for cross_talk in args.cross_talk:
+            # Longer identifiers than the default keep functions from colliding with variables in long logs.
+            source = generate(users=users, messages=args.messages, seed=0, cross_talk=cross_talk, identifier_words=5,
+                              loop_iterations=args.loop_iterations)
+            components = len(plan(parse(source, '<bench>'))[1])
+            sequential = min(time_run(execute, source) for _ in range(args.repeat))
+            parallel = min(time_run(execute_parallel, source, args.jobs) for _ in range(args.repeat))
+            same = 'same' if sequential[1] == parallel[1] else 'DIFFERENT'
+            print(f"{users:>5} {cross_talk:>10} {components:>10} {sequential[0] * 1000:>13.2f} "
+                  f"{parallel[0] * 1000:>11.2f} {sequential[0] / parallel[0]:>7.1f}x  {same}")
+
+
+if __name__ == '__main__':
+    main()
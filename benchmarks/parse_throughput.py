@@ -0,0 +1,63 @@
+"""
+Import time of chat_interpreter and lexing/parsing throughput on a large generated log.
+
+    python -m benchmarks.parse_throughput [--copies N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from chat_interpreter import Lexer, Parser
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_time(runs=10):
+    # Subtract bare interpreter start-up so only the cost of importing the package remains.
+    def median_run(code):
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True)
+            times.append(time.perf_counter() - start)
+        return statistics.median(times)
+    return median_run('import chat_interpreter') - median_run('pass')
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--copies', type=int, default=200)
+    arg_parser.add_argument('--runs', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    with open(os.path.join(ROOT, 'examples', 'fizzbuzz.clog'), 'r') as f:
+        fizzbuzz = f.read().rstrip('\n') + '\n'
+    with open(os.path.join(ROOT, 'examples', 'temperature.clog'), 'r') as f:
+        temperature = f.read().rstrip('\n') + '\n'
+    source = (fizzbuzz + temperature) * args.copies
+    size = len(source.encode('utf-8'))
+
+    lex_times, parse_times = [], []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        scanner = Lexer(source, '<bench>')
+        scanner.scan_tokens()
+        lex_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        Parser(scanner).parse()
+        parse_times.append(time.perf_counter() - start)
+
+    tokens = len(scanner.tokens)
+    print(f"import   {import_time() * 1000:8.2f} ms")
+    print(f"lex      {statistics.median(lex_times) * 1000:8.2f} ms  "
+          f"({size / statistics.median(lex_times) / 1e6:.2f} MB/s)")
+    print(f"parse    {statistics.median(parse_times) * 1000:8.2f} ms  "
+          f"({tokens / statistics.median(parse_times) / 1e3:.0f}k tokens/s)")
+
+
+if __name__ == '__main__':
+    main()
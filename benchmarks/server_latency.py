@@ -0,0 +1,53 @@
+"""
+End-to-end latency of small scripts: a cold `python chatlang.py` against `python chatlang_client.py` talking to a warm
+`python chatlang.py --serve`.
+
+    python -m benchmarks.server_latency [--runs N] [script]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_runs(cmd, runs, env):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, env=env, check=True)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('script', nargs='?', default=os.path.join(ROOT, 'examples', 'temperature.clog'))
+    arg_parser.add_argument('--runs', type=int, default=30)
+    args = arg_parser.parse_args()
+
+    env = dict(os.environ, CHATLANG_SOCKET=os.path.join(tempfile.mkdtemp(), 'bench.sock'))
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'chatlang.py'), '--serve'],
+                              stdout=subprocess.DEVNULL, env=env)
+    try:
+        while not os.path.exists(env['CHATLANG_SOCKET']):
+            time.sleep(0.01)
+        results = {
+            'cold': time_runs([sys.executable, os.path.join(ROOT, 'chatlang.py'), args.script], args.runs, env),
+            'warm client': time_runs([sys.executable, os.path.join(ROOT, 'chatlang_client.py'), args.script],
+                                     args.runs, env),
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+    for name, times in results.items():
+        print(f"{name:12} median {statistics.median(times) * 1000:7.2f} ms, min {min(times) * 1000:7.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
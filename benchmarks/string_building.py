@@ -0,0 +1,57 @@
+"""
+Building a long string by appending in a goto loop, with and without StrBuilder.
+
+Without builders every append copies the whole string, so time grows quadratically with the final length; with them
+it grows linearly.
+
+    python -m benchmarks.string_building [--sizes 131072 262144 524288 1048576] [--piece 100] [--repeat N]
+"""
+import argparse
+import contextlib
+import time
+
+from chat_interpreter import Interpreter, Lexer, Parser
+from chat_interpreter import strings
+from benchmarks.harness import NullWriter
+
+PROGRAM = """\
+[10:00] Builder: My text is "". My piece is "{piece}". My count is 0.
+[10:01] Builder: Let my text be my text and my piece. Let my count be my count plus 1. #append.
+[10:02] Builder: If my count is less than {appends}, go to #append.
+[10:03] Builder: Say my text.
+"""
+
+
+def time_build(size, piece, min_length):
+    source = PROGRAM.format(piece='x' * piece, appends=size // piece)
+    scanner = Lexer(source, '<bench>')
+    scanner.scan_tokens()
+    parser = Parser(scanner)
+    tree = parser.parse()
+
+    old, strings.BUILDER_MIN_LENGTH = strings.BUILDER_MIN_LENGTH, min_length
+    try:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(NullWriter()):
+            Interpreter(parser).visit(tree)
+        return time.perf_counter() - start
+    finally:
+        strings.BUILDER_MIN_LENGTH = old
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(prog='python -m benchmarks.string_building')
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=[131072, 262144, 524288, 1048576])
+    arg_parser.add_argument('--piece', type=int, default=100, help="characters appended per iteration")
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args(argv)
+
+    print(f"{'bytes':>9} {'copying ms':>11} {'builder ms':>11} {'speedup':>8}")
+    for size in args.sizes:
+        copying = min(time_build(size, args.piece, float('inf')) for _ in range(args.repeat))
+        builder = min(time_build(size, args.piece, strings.BUILDER_MIN_LENGTH) for _ in range(args.repeat))
+        print(f"{size:>9} {copying * 1000:>11.2f} {builder * 1000:>11.2f} {copying / builder:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
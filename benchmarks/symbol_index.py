@@ -0,0 +1,79 @@
+"""
+Symbol index build, update and query times on a large generated log.
+
+Without an index, finding a variable's definitions and uses means parsing the whole log; that is the initial build.
+After it, an edit to one message and an insertion at the top (which moves every line below) are applied with update(),
+and the index is compared with one built from scratch on the edited source, so a fast update only counts if it is
+correct. Queries look up every occurrence of the most used variable and the symbol at a position.
+
+    python -m benchmarks.symbol_index [--messages 200000] [--users 50] [--repeat N]
+"""
+import argparse
+import statistics
+import sys
+import time
+
+from chat_interpreter.index import SymbolIndex
+from benchmarks.workload import generate
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def median_time(repeat, fn, *args):
+    return statistics.median(timed(fn, *args)[0] for _ in range(repeat))
+
+
+def same_index(index, source):
+    fresh = SymbolIndex('<bench>')
+    fresh.update(source)
+    return fresh.occurring.keys() == index.occurring.keys() and \
+        all(fresh.occurrences(key) == index.occurrences(key) for key in fresh.occurring)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(prog='python -m benchmarks.symbol_index')
+    arg_parser.add_argument('--messages', type=int, default=200000)
+    arg_parser.add_argument('--users', type=int, default=50)
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args(argv)
+
+    source = generate(users=args.users, messages=args.messages, seed=0)
+    lines = source.splitlines(True)
+    print(f"{len(lines)} lines, {len(source.encode('utf-8')) / 1e6:.1f} MB")
+
+    index = SymbolIndex('<bench>')
+    build, _ = timed(index.update, source)
+    print(f"build            {build * 1000:10.1f} ms  ({index.indexed} messages parsed)")
+    unchanged, _ = timed(index.update, source)
+    print(f"update, no edit  {unchanged * 1000:10.1f} ms  ({index.indexed} parsed)")
+
+    middle = len(lines) // 2
+    edited = ''.join(lines[:middle] + [lines[middle].rstrip('\n') + ' Say 1.\n'] + lines[middle + 1:])
+    edit, _ = timed(index.update, edited)
+    print(f"update, one edit {edit * 1000:10.1f} ms  ({index.indexed} parsed)")
+    inserted = '[00:00] Newcomer: Say 1.\n' + edited
+    insert, _ = timed(index.update, inserted)
+    print(f"update, insert   {insert * 1000:10.1f} ms  ({index.indexed} parsed)")
+
+    key = max((key for key in index.occurring if key[0] == 'variable'),
+              key=lambda key: sum(len(entry.symbols[key]) for entry in index.occurring[key]))
+    found = index.occurrences(key)
+    kind, line, start, end = found[len(found) // 2]
+    references = median_time(args.repeat, index.occurrences, key)
+    definition = median_time(args.repeat, lambda: index.definitions(index.symbol_at(line, start)))
+    print(f"references       {references * 1000:10.3f} ms  ({len(found)} occurrences of {key[2]!r} of {key[1]!r})")
+    print(f"definition       {definition * 1000:10.3f} ms  (symbol at line {line}, then its definitions)")
+    print(f"build / references: {build / references:.0f}x")
+
+    correct = same_index(index, inserted)
+    print(f"incremental index {'matches' if correct else 'DIFFERS FROM'} a fresh build")
+    if not correct:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
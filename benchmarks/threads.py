@@ -0,0 +1,129 @@
+"""
+Many interpreters running side by side in threads, each with its own output and diagnostics.
+
+The stress test starts hundreds of threads at once, each lexing, parsing and running its own generated log (some with
+syntax errors, some with hooks installed) into its own StringIO and Diagnostics, and compares every result with the
+same program run alone beforehand. Nothing may reach the real stdout while they run. The scaling test then runs a fixed
+batch of programs on 1, 2, 4, ... worker threads and reports the throughput. On a GIL build the threads take turns, so
+only a free-threaded Python with several CPUs can show a speedup.
+
+    python -m benchmarks.threads [--threads 200] [--messages 200] [--workers 1 2 4 8] [--batch 64]
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from chat_interpreter import Interpreter, Lexer, Parser
+from chat_interpreter.diagnostics import Diagnostics
+from benchmarks.workload import generate
+
+SYNTAX_ERROR = '[23:59] Alice: Let be be.\n'
+
+
+def program(k, messages):
+    source = generate(users=3, messages=messages, seed=k, identifier_words=4, loop_iterations=5)
+    if k % 7 == 3:
+        source += SYNTAX_ERROR
+    return source
+
+
+def count_statements(interpreter, stmt):
+    interpreter.statements += 1
+
+
+def run(k, source):
+    """Runs one program in isolation, returning everything it reported and printed."""
+    diagnostics = Diagnostics(echo=False)
+    out = io.StringIO()
+    scanner = Lexer(source, f'<program {k}>', diagnostics=diagnostics)
+    scanner.scan_tokens()
+    tree = None
+    if not scanner.has_error:
+        parser = Parser(scanner)
+        try:
+            tree = parser.parse()
+        except Exception:
+            pass
+    error = statements = None
+    if tree is not None:
+        interpreter = Interpreter(parser, out=out)
+        if k % 5 == 0:
+            interpreter.statements = 0
+            interpreter.add_hook('statement', count_statements)
+        try:
+            interpreter.visit(tree)
+        except Exception as e:
+            error = f'{type(e).__name__}: {e}'
+        statements = getattr(interpreter, 'statements', None)
+    return diagnostics.messages, out.getvalue(), error, statements
+
+
+def stress(sources):
+    expected = [run(k, source) for k, source in enumerate(sources)]
+    results = [None] * len(sources)
+    barrier = threading.Barrier(len(sources))
+
+    def worker(k):
+        barrier.wait()
+        results[k] = run(k, sources[k])
+
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(len(sources))]
+    stray = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(stray):
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    seconds = time.perf_counter() - start
+    mismatched = [k for k in range(len(sources)) if results[k] != expected[k]]
+    return seconds, mismatched, stray.getvalue(), sum(1 for messages, *_ in expected if messages)
+
+
+def throughput(sources, workers, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(run, range(len(sources)), sources))
+        times.append(time.perf_counter() - start)
+    return len(sources) / statistics.median(times)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(prog='python -m benchmarks.threads')
+    arg_parser.add_argument('--threads', type=int, default=200, help="interpreters started at once by the stress test")
+    arg_parser.add_argument('--messages', type=int, default=200, help="messages per program")
+    arg_parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    arg_parser.add_argument('--batch', type=int, default=64, help="programs per scaling run")
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args(argv)
+
+    gil = sys._is_gil_enabled() if hasattr(sys, '_is_gil_enabled') else True
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil else 'disabled'}, {os.cpu_count()} CPUs")
+
+    sources = [program(k, args.messages) for k in range(args.threads)]
+    seconds, mismatched, stray, with_errors = stress(sources)
+    print(f"stress: {args.threads} threads ({with_errors} with syntax errors) in {seconds * 1000:.0f} ms, "
+          f"{len(mismatched)} differing from a run alone, {len(stray)} characters leaked to stdout")
+
+    batch = sources[:args.batch]
+    base = None
+    print(f"{'workers':>7} {'programs/s':>10} {'speedup':>8}")
+    for workers in args.workers:
+        rate = throughput(batch, workers, args.repeat)
+        base = base or rate
+        print(f"{workers:>7} {rate:>10.1f} {rate / base:>7.2f}x")
+
+    if mismatched or stray:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
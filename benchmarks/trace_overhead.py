@@ -0,0 +1,74 @@
+"""
+Overhead of recording an execution trace.
+
+Compares a plain Interpreter with one recording into the in-memory ring buffer and one streaming the trace to a file,
+on a generated workload full of goto loops, branches and calls, and reports the size of the recorded trace. Many short
+runs are interleaved and the overhead is the median of each traced run's ratio to the plain run next to it, which holds
+steady on noisy machines where single timings do not.
+
+    python -m benchmarks.trace_overhead [--messages N] [--repeat N]
+"""
+import argparse
+import contextlib
+import os
+import statistics
+import tempfile
+import time
+
+from chat_interpreter import Interpreter, Lexer, Parser
+from chat_interpreter.trace import TracingInterpreter
+from benchmarks.harness import NullWriter
+from benchmarks.workload import generate
+
+
+def time_interpret(source, tree, parser, path=None, ring=False):
+    tracing = path or ring
+    interpreter = TracingInterpreter(parser, tree, source, path) if tracing else Interpreter(parser)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(NullWriter()):
+        interpreter.visit(tree)
+    if tracing:
+        interpreter.trace.close()
+    seconds = time.perf_counter() - start
+    if not tracing:
+        return seconds, None
+    return seconds, os.path.getsize(path) if path else len(interpreter.trace.getvalue())
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--messages', type=int, default=300)
+    arg_parser.add_argument('--repeat', type=int, default=200)
+    args = arg_parser.parse_args()
+
+    source = generate(messages=args.messages)
+    scanner = Lexer(source, '<bench>')
+    scanner.scan_tokens()
+    parser = Parser(scanner)
+    tree = parser.parse()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.trace')
+        configs = {
+            'plain': lambda: time_interpret(source, tree, parser),
+            'ring buffer': lambda: time_interpret(source, tree, parser, ring=True),
+            'file': lambda: time_interpret(source, tree, parser, path),
+        }
+        # Interleave the configurations so machine noise hits them all alike.
+        times = {name: [] for name in configs}
+        sizes = {}
+        for _ in range(args.repeat):
+            for name, run in configs.items():
+                seconds, sizes[name] = run()
+                times[name].append(seconds)
+
+    plain = times['plain']
+    for name, samples in times.items():
+        ratio = statistics.median(traced / untraced for traced, untraced in zip(samples, plain))
+        size = f"  {sizes[name]} bytes" if sizes[name] is not None else ''
+        print(f"{name:12} min {min(samples) * 1000:8.2f} ms  median {statistics.median(samples) * 1000:8.2f} ms  "
+              f"overhead {(ratio - 1) * 100:5.1f}%{size}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Throughput of BatchInterpreter against running the same program once per initial state.
+
+The workload is a parameter sweep: every lane runs a goto loop whose trip count and branches depend on its initial
+@Sweep value, so lanes diverge and the masked paths are exercised. Outputs of both modes are checked to be identical.
+Before timing, a few small programs whose semantics are easy to get subtly wrong (bare conditions on strings, sums near
+the int64 limit) are run both ways and must agree as well.
+
+    python -m benchmarks.vectorized [--lanes 10 100 1000 10000] [--iterations N] [--repeat N]
+"""
+import argparse
+import time
+
+from chat_interpreter import Lexer, Parser
+from chat_interpreter.vectorized import BatchInterpreter
+
+SWEEP = """\
+[10:00] Sweep: My total is 0. My step is 0. My limit is myself remain 7 plus {iterations}.
+[10:01] Sweep: Let my step be my step plus 1. #again.
+[10:02] Sweep: If my step remain 3 is 0, let my total be my total plus myself times my step remain 97, \
+otherwise, let my total be my total minus my step.
+[10:03] Sweep: If my step is less than my limit, go to #again.
+[10:04] Sweep: Make my half do with x: If x remain 2 is 0, return x divided by 2. Return x. Done.
+[10:05] Sweep: If my total is greater than 1000, say "high", otherwise, say call my half with my total.
+"""
+
+# (program, initial states) pairs that serial and vectorized runs must agree on. Per-lane values are lists.
+AGREEMENT = [
+    # A bare condition is `value != 0`, so an empty string is true.
+    ('[10:00] Alice: My x is "". If my x, say "yes", otherwise, say "no".\n', {}),
+    ('[10:00] Alice: If myself, say "yes", otherwise, say "no". My y is whether myself. Say my y.\n',
+     {'Alice': {'i': ['', 'a', 0, 1, 2.5]}}),
+    ('[10:00] Alice: If myself and myself, say "both". If myself or 0, say "either".\n',
+     {'Alice': {'i': ['', 'a', 0, 1]}}),
+    # Sums past the int64 range fall back to serial execution instead of wrapping around.
+    ('[10:00] Alice: Say myself plus myself. Say 0 minus myself minus myself.\n',
+     {'Alice': {'i': [2 ** 62, 1]}}),
+]
+
+
+def check_agreement():
+    for source, initial in AGREEMENT:
+        parser, tree = parse(source)
+        lanes = max([len(value) for variables in initial.values() for value in variables.values()] or [1])
+        batch = BatchInterpreter(parser, lanes, initial)
+        serial = batch.run_serial(tree)
+        vectorized = batch.run(tree)
+        if [lane['output'] for lane in serial] != [lane['output'] for lane in vectorized]:
+            raise RuntimeError(f"Vectorized and serial outputs differ for {source!r}.")
+
+
+def parse(source):
+    scanner = Lexer(source, '<bench>')
+    scanner.scan_tokens()
+    parser = Parser(scanner)
+    return parser, parser.parse()
+
+
+def time_modes(lanes, iterations, repeat):
+    parser, tree = parse(SWEEP.format(iterations=iterations))
+    batch = BatchInterpreter(parser, lanes, {'Sweep': {'i': list(range(lanes))}})
+    times = {'serial': [], 'vectorized': []}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        serial = batch.run_serial(tree)
+        times['serial'].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        vectorized = batch.run(tree)
+        times['vectorized'].append(time.perf_counter() - start)
+
+    if not batch.vectorized:
+        raise RuntimeError("The benchmark program fell back to serial execution.")
+    if [lane['output'] for lane in serial] != [lane['output'] for lane in vectorized]:
+        raise RuntimeError("Vectorized and serial outputs differ.")
+    return {mode: min(samples) for mode, samples in times.items()}
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(prog='python -m benchmarks.vectorized')
+    arg_parser.add_argument('--lanes', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    arg_parser.add_argument('--iterations', type=int, default=20)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args(argv)
+
+    check_agreement()
+    print(f"{'lanes':>7} {'serial ms':>11} {'vectorized ms':>14} {'lanes/s':>11} {'speedup':>8}")
+    for lanes in args.lanes:
+        result = time_modes(lanes, args.iterations, args.repeat)
+        print(f"{lanes:>7} {result['serial'] * 1000:>11.2f} {result['vectorized'] * 1000:>14.2f} "
+              f"{lanes / result['vectorized']:>11.0f} {result['serial'] / result['vectorized']:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
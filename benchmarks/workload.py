@@ -0,0 +1,121 @@
+"""
+Generator for synthetic chat-log workloads.
+
+The generated logs exercise the parts of the interpreter that real programs lean on: many users, long multi-word
+identifiers, poetic numbers, goto loops, function declarations and calls, and string building. Output is
+deterministic for a given seed.
+
+    python -m benchmarks.workload --users 10 --messages 1000 > big.clog
+"""
+import argparse
+import random
+
+from chat_interpreter.keywords import KEYWORDS
+
+SYLLABLES = ['zor', 'bin', 'qua', 'mel', 'tor', 'vik', 'dra', 'lun', 'pex', 'sol', 'ryn', 'kal']
+
+WORDS = [word for word in [
+    'apple', 'banana', 'cloud', 'river', 'stone', 'window', 'garden', 'rocket', 'pillow', 'candle', 'forest', 'mirror',
+    'thunder', 'velvet', 'harbor', 'meadow', 'lantern', 'pepper', 'silver', 'marble', 'falcon', 'ember', 'glacier',
+    'orchid', 'quartz', 'saddle', 'timber', 'walnut', 'yonder', 'zephyr', 'cactus', 'dolphin', 'fiddle', 'gravel',
+] if word not in KEYWORDS]
+
+
+class Workload():
+    def __init__(self, users=10, messages=1000, seed=0, identifier_words=3, loop_iterations=20, cross_talk=0.1):
+        self.rand = random.Random(seed)
+        self.users = [self.username(i) for i in range(users)]
+        self.messages = messages
+        self.identifier_words = identifier_words
+        self.loop_iterations = loop_iterations
+        self.cross_talk = cross_talk
+        self.lines = []
+        self.minute = 0
+        self.anchors = 0
+        self.seen = []
+        self.functions = {}
+
+    def username(self, i):
+        name = ''.join(SYLLABLES[(i // len(SYLLABLES) ** k) % len(SYLLABLES)] for k in range(3))
+        return name.capitalize() + str(i)
+
+    def identifier(self):
+        return ' '.join(self.rand.choice(WORDS) for _ in range(self.identifier_words))
+
+    def poetic(self):
+        return ' '.join(self.rand.choice(WORDS) for _ in range(self.rand.randint(2, 5)))
+
+    def emit(self, user, body):
+        hh, mm = divmod(self.minute, 60)
+        self.lines.append(f"[{hh % 24:02}:{mm:02}] {user}: {body}")
+        self.minute += 1
+
+    def introduce(self, user):
+        # Every user starts with a counter, a running total and a string to build on, so later messages can refer to
+        # them without tripping over unset strings.
+        self.seen.append(user)
+        self.functions[user] = []
+        self.emit(user, 'My counter is 0. My total is 0. My text is "". My piece is "ab".')
+
+    def declaration(self, user):
+        self.emit(user, f"My {self.identifier()} is {self.poetic()}. Let my total be my total plus 7.")
+
+    def loop(self, user):
+        self.anchors += 1
+        anchor = f"loop{self.anchors}"
+        self.emit(user, "My counter is 0.")
+        self.emit(user, f"Let my counter be my counter plus 1. #{anchor}.")
+        self.emit(user, "Let my total be my total plus my counter remain 7. Let my text be my text and my piece.")
+        self.emit(user, f"If my counter is less than {self.loop_iterations}, go to #{anchor}.")
+
+    def function(self, user):
+        name = self.identifier()
+        self.functions[user].append(name)
+        self.emit(user, f"Make my {name} do with left side, right side: "
+                        f"Let my scratch be left side times 3. Return my scratch plus right side remain 1000. Done.")
+
+    def call(self, user):
+        if not self.functions[user]:
+            return self.function(user)
+        name = self.rand.choice(self.functions[user])
+        self.emit(user, f"Let my total be call my {name} with my total, my counter remain 1000.")
+
+    def cross(self, user):
+        other = self.rand.choice(self.seen)
+        self.emit(user, f"Let my total be my total plus @{other}'s total remain 1000.")
+
+    def generate(self):
+        kinds = [self.declaration, self.loop, self.function, self.call, self.call]
+        while len(self.lines) < self.messages:
+            user = self.rand.choice(self.users)
+            if user not in self.functions:
+                self.introduce(user)
+            elif self.rand.random() < self.cross_talk:
+                self.cross(user)
+            else:
+                self.rand.choice(kinds)(user)
+        for user in self.seen:
+            self.emit(user, "Say my total.")
+        return '\n'.join(self.lines) + '\n'
+
+
+def generate(users=10, messages=1000, seed=0, **options):
+    """Returns the source of a chat log with about the given number of messages spread over the given users."""
+    return Workload(users, messages, seed, **options).generate()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--users', type=int, default=10)
+    arg_parser.add_argument('--messages', type=int, default=1000)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--identifier-words', type=int, default=3)
+    arg_parser.add_argument('--loop-iterations', type=int, default=20)
+    arg_parser.add_argument('--cross-talk', type=float, default=0.1)
+    args = arg_parser.parse_args()
+    print(generate(args.users, args.messages, args.seed, identifier_words=args.identifier_words,
+                   loop_iterations=args.loop_iterations, cross_talk=args.cross_talk), end='')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,3 @@
-from .interpreter import Interpreter
+from .interpreter import ExecutionLimitError, Interpreter
 from .lexer import Lexer
 from .token_parser import Parser
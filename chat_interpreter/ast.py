@@ -15,7 +15,7 @@ class AST(object):
 class Anchor(AST):
     def __init__(self, token):
         self.token = token
-        self.value = token.lexeme
+        self.value = token.literal
 
 
 class AnchorDecl(AST):
@@ -24,6 +24,12 @@ class AnchorDecl(AST):
         self.value = value
 
 
+class AppendStmt(AST):
+    def __init__(self, value, target):
+        self.value = value
+        self.target = target
+
+
 class Arg(AST):
     def __init__(self, expr):
         self.expr = expr
@@ -41,6 +47,12 @@ class Compound(AST):
         self.stmts = stmts
 
 
+class Element(AST):
+    def __init__(self, index, target):
+        self.index = index
+        self.target = target
+
+
 class FuncCall(AST):
     def __init__(self, name, args):
         self.name = name
@@ -78,12 +90,33 @@ class IfElse(AST):
         self.else_block = else_block
 
 
+class IncludeStmt(AST):
+    def __init__(self, path, funcs, digests):
+        self.path = path
+        self.funcs = funcs  # the FuncDecl nodes the included module exports
+        self.digests = digests  # source digests of the included module and every module it includes
+
+
+class LazyBlock(AST):
+    def __init__(self, parser, start, msg, scope):
+        # A function body the parser skipped over: the index of its first token and the message and scope it is in.
+        self.parser = parser
+        self.start = start
+        self.msg = msg
+        self.scope = scope
+
+
 class IncrementOp(AST):
     def __init__(self, left, op):
         self.left = left
         self.op = op
 
 
+class Length(AST):
+    def __init__(self, target):
+        self.target = target
+
+
 class Logical(AST):
     def __init__(self, left, negate, op, right):
         self.left = left
@@ -99,6 +132,10 @@ class Message(AST):
         self.stmts = stmts
 
 
+class NewList(AST):
+    pass
+
+
 class NoOp(AST):
     pass
 
@@ -149,7 +186,7 @@ class ScopeCall(AST):
 class ScopeName(AST):
     def __init__(self, token):
         self.token = token
-        self.value = token.lexeme
+        self.value = token.literal
 
 
 class ScopeSelf(AST):
@@ -182,6 +219,12 @@ class ScopePrev(AST):
         return self.__repr__()
 
 
+class SetElement(AST):
+    def __init__(self, element, value):
+        self.element = element
+        self.value = value
+
+
 class Stmt(AST):
     def __init__(self, stmt):
         self.stmt = stmt
@@ -202,7 +245,7 @@ class Timestamp(AST):
 class Var(AST):
     def __init__(self, token):
         self.token = token
-        self.value = token.lexeme
+        self.value = token.literal
 
     def __repr__(self):
         return f'Variable {self.token}'
@@ -212,6 +255,7 @@ class Var(AST):
 
 
 class VarDecl(AST):
-    def __init__(self, var, value):
+    def __init__(self, var, value, assignment=False):
         self.var = var
         self.value = value
+        self.assignment = assignment  # written with Let or Put rather than declared
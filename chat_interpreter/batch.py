@@ -0,0 +1,75 @@
+import functools
+import glob
+import io
+import statistics
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+from chat_interpreter.runner import execute
+
+
+def expand_paths(patterns, manifest=None):
+    """Expands glob patterns (and the lines of an optional manifest file) into a list of script paths."""
+    if manifest is not None:
+        with open(manifest, 'r') as f:
+            patterns = list(patterns) + [line.strip() for line in f if line.strip()]
+
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        paths.extend(matches)
+    return paths
+
+
+def run_script(path, max_steps=None, timeout=None):
+    """Runs one script with its output captured. Returns a dict describing the result."""
+    out = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with open(path, 'r') as f:
+            source = f.read()
+    except OSError as e:
+        print(f"[{path}] Error: {e.strerror}", file=out)
+        status = 66
+    else:
+        try:
+            status = execute(source, path, max_steps=max_steps, timeout=timeout, out=out)
+        except Exception:
+            traceback.print_exc(file=out)
+            status = 70
+    return {
+        'file': path,
+        'status': status,
+        'output': out.getvalue(),
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def run_batch(paths, jobs=None, max_steps=None, timeout=None):
+    """Runs every script in paths across a pool of jobs processes, yielding results in input order."""
+    worker = functools.partial(run_script, max_steps=max_steps, timeout=timeout)
+    # Scripts are usually tiny, so hand them to workers in chunks to keep IPC overhead down.
+    chunksize = max(1, min(64, len(paths) // ((jobs or 1) * 8)))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(worker, paths, chunksize=chunksize)
+
+
+def summarize(results, elapsed, jobs):
+    """Returns a human-readable end-of-run summary for a list of results."""
+    if not results:
+        return "No scripts were run."
+    times = [r['seconds'] for r in results]
+    failed = [r for r in results if r['status'] != 0]
+    slowest = max(results, key=lambda r: r['seconds'])
+    lines = [
+        f"Ran {len(results)} scripts in {elapsed:.2f}s ({len(results) / elapsed:.1f} scripts/s, {jobs} jobs); "
+        f"{len(failed)} failed.",
+        f"Per-script time: min {min(times) * 1000:.2f} ms, median {statistics.median(times) * 1000:.2f} ms, "
+        f"mean {statistics.mean(times) * 1000:.2f} ms, max {slowest['seconds'] * 1000:.2f} ms ({slowest['file']})",
+    ]
+    for r in failed[:20]:
+        lines.append(f"  {r['file']}: exit {r['status']}")
+    if len(failed) > 20:
+        lines.append(f"  ... and {len(failed) - 20} more")
+    return '\n'.join(lines)
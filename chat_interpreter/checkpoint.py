@@ -0,0 +1,173 @@
+"""
+Checkpoints of a running interpreter, so long-running programs can resume after a crash or restart.
+
+A checkpoint is a header (magic, format version and the SHA-256 of the program source and the modules it includes)
+followed by a pickle of the interpreter state. Functions stored in variables are AST nodes, which are written as their
+position in the program's list of function declarations and looked up again in the re-parsed program on resume. Native
+functions are written as their name and looked up among those registered with the resuming interpreter.
+
+Snapshots are only taken between messages, when no function call is active, so the state is just scopes, anchors,
+the next message and the current user. Output is flushed before every snapshot, so everything the checkpointed part of
+the program printed has been written out.
+"""
+import hashlib
+import io
+import os
+import pickle
+import signal
+import sys
+import threading
+import time
+
+from chat_interpreter.ast import FuncDecl, IncludeStmt
+from chat_interpreter.natives import NativeFunction
+
+MAGIC = b'CHATCKPT'
+VERSION = 1
+
+
+class CheckpointError(Exception):
+    pass
+
+
+def program_hash(source, tree):
+    # Included functions are numbered along with the script's own, so the modules tree includes are hashed in as well.
+    digest = hashlib.sha256(source.encode('utf-8'))
+    for node in find_nodes(tree, IncludeStmt):
+        for module_digest in node.digests:
+            digest.update(module_digest)
+    return digest.digest()
+
+
+def find_nodes(node, node_type, found=None):
+    # Every node_type node in node, in source order.
+    if found is None:
+        found = []
+    if isinstance(node, node_type):
+        found.append(node)
+    for value in vars(node).values():
+        for child in (value if isinstance(value, list) else [value]):
+            if hasattr(child, '__dict__') and not isinstance(child, type):
+                find_nodes(child, node_type, found)
+    return found
+
+
+def func_decls(node):
+    return find_nodes(node, FuncDecl)
+
+
+def native_functions(interpreter):
+    # Every NativeFunction registered with interpreter, by name.
+    natives = dict(interpreter.natives)
+    for variables in interpreter.scopes.values():
+        natives.update((value.name, value) for value in variables.values() if type(value) is NativeFunction)
+    return natives
+
+
+class StatePickler(pickle.Pickler):
+    def __init__(self, file, funcs):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.func_ids = {id(func): i for i, func in enumerate(funcs)}
+
+    def persistent_id(self, obj):
+        if type(obj) is FuncDecl:
+            return self.func_ids[id(obj)]
+        if type(obj) is NativeFunction:
+            return obj.name
+        return None
+
+
+class StateUnpickler(pickle.Unpickler):
+    def __init__(self, file, funcs, natives):
+        super().__init__(file)
+        self.funcs = funcs
+        self.natives = natives
+
+    def persistent_load(self, pid):
+        if type(pid) is str:
+            try:
+                return self.natives[pid]
+            except KeyError:
+                raise CheckpointError(f"Checkpoint uses native function {pid!r}, which is not registered.")
+        return self.funcs[pid]
+
+
+class Checkpointer():
+    """
+    Writes a checkpoint of interpreter to path after a message finishes, once every interval seconds and whenever the
+    process receives SIGUSR1. The file is replaced atomically, so a crash while saving keeps the previous checkpoint.
+    """
+    def __init__(self, interpreter, tree, source, path, interval=60.0):
+        self.interpreter = interpreter
+        self.funcs = func_decls(tree)
+        self.hash = program_hash(source, tree)
+        self.path = path
+        self.interval = interval
+        self.next_save = None
+        self.requested = False
+        self.old_handler = None
+
+    def start(self):
+        self.next_save = time.monotonic() + self.interval
+        self.interpreter.add_hook('message_exit', self.on_message_exit)
+        if hasattr(signal, 'SIGUSR1') and threading.current_thread() is threading.main_thread():
+            self.old_handler = signal.signal(signal.SIGUSR1, self.request)
+
+    def stop(self):
+        self.interpreter.remove_hook('message_exit', self.on_message_exit)
+        if self.old_handler is not None:
+            signal.signal(signal.SIGUSR1, self.old_handler)
+            self.old_handler = None
+
+    def request(self, signum, frame):
+        # Signal handlers only set a flag; the snapshot is taken at the end of the current message.
+        self.requested = True
+
+    def on_message_exit(self, interpreter, index, msg):
+        if self.requested or time.monotonic() >= self.next_save:
+            self.save()
+
+    def save(self):
+        interpreter = self.interpreter
+        state = {
+            'scopes': interpreter.scopes,
+            'anchors': interpreter.anchors,
+            # Called before step() advances, so the next message is one past the current one (or a goto's target).
+            'next_msg': interpreter.curr_msg + 1,
+            'curr_scope': interpreter.curr_scope,
+            'steps': interpreter.steps,
+        }
+        (interpreter.out or sys.stdout).flush()
+
+        buffer = io.BytesIO()
+        buffer.write(MAGIC + bytes([VERSION]) + self.hash)
+        StatePickler(buffer, self.funcs).dump(state)
+        temp = self.path + '.tmp'
+        with open(temp, 'wb') as f:
+            f.write(buffer.getbuffer())
+        os.replace(temp, self.path)
+
+        self.requested = False
+        self.next_save = time.monotonic() + self.interval
+
+
+def restore(interpreter, tree, source, path):
+    """Loads the checkpoint at path into interpreter, which will continue where it left off when it visits tree."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    header = len(MAGIC) + 1
+    if data[:len(MAGIC)] != MAGIC or len(data) < header + 32:
+        raise CheckpointError(f"{path} is not a checkpoint.")
+    if data[len(MAGIC)] != VERSION:
+        raise CheckpointError(f"{path} has checkpoint format {data[len(MAGIC)]}, expected {VERSION}.")
+    if data[header:header + 32] != program_hash(source, tree):
+        raise CheckpointError(f"{path} was taken from a different program.")
+
+    state = StateUnpickler(io.BytesIO(data[header + 32:]), func_decls(tree), native_functions(interpreter)).load()
+    # Unpickled names are new strings; intern them again so lookups keep hitting the symbols from the parser.
+    interpreter.scopes = {sys.intern(scope): {sys.intern(name): value for name, value in variables.items()}
+                          for scope, variables in state['scopes'].items()}
+    interpreter.anchors = state['anchors']
+    interpreter.curr_msg = state['next_msg']
+    interpreter.curr_scope = sys.intern(state['curr_scope']) if state['curr_scope'] is not None else None
+    interpreter.steps = state['steps']
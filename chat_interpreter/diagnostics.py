@@ -0,0 +1,38 @@
+"""
+Errors reported while lexing and parsing a program.
+
+Every Lexer reports into a Diagnostics, and a Parser into its scanner's, so one collector holds everything found wrong
+with one program. By default each error is also printed to stdout as it is reported, as the command line expects.
+Programs run side by side in threads should each get their own, printing to their own stream or not at all:
+
+    diagnostics = Diagnostics(echo=False)
+    scanner = Lexer(source, filename, diagnostics=diagnostics)
+    ...
+    for message in diagnostics.messages:
+        ...
+"""
+import sys
+import traceback
+
+
+class Diagnostics():
+    """
+    Collects error messages in .messages. With echo set, each is also printed to out (stdout when None), and the
+    parser's stack at a syntax error to err (stderr when None).
+    """
+    def __init__(self, echo=True, out=None, err=None):
+        self.echo = echo
+        self.out = out
+        self.err = err
+        self.messages = []
+
+    def report(self, filename, line, pos, message):
+        text = f"[{filename}, line {line}:{pos}] Error: {message}"
+        self.messages.append(text)
+        if self.echo:
+            print(text, file=self.out)
+
+    def print_stack(self):
+        if self.echo:
+            # Leaves out this frame, so the stack ends where the error was found.
+            traceback.print_stack(sys._getframe(1), file=self.err)
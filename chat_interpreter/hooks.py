@@ -0,0 +1,109 @@
+"""
+Tracing hooks for the interpreter, registered with Interpreter.add_hook(event, handler). Handlers receive the
+interpreter first:
+
+    message_enter(interpreter, index, message)    before a message runs; index is its position in Program.msgs
+    message_exit(interpreter, index, message)     after a message ran to completion
+    statement(interpreter, stmt)                  before every Stmt, including those inside function bodies
+    statement_exit(interpreter, stmt)             after a Stmt completed normally
+    call(interpreter, func_decl, arg_values)      before a function body runs
+    return(interpreter, func_decl, value)         after a function returned (value is None without a return statement)
+    goto(interpreter, from_index, to_index)       after a goto; to_index is the next message that will run
+    write(interpreter, scope, name, value)        when a declaration, assignment or parameter binding stores a value
+
+An interpreter without handlers runs its own class unchanged.
+"""
+import threading
+
+EVENTS = ('message_enter', 'message_exit', 'statement', 'statement_exit', 'call', 'return', 'goto', 'write')
+
+# The methods each event needs instrumented.
+HOOKED_METHODS = {
+    'visit_Message': ('message_enter', 'message_exit'),
+    'visit_Stmt': ('statement', 'statement_exit'),
+    'call': ('call', 'return', 'write'),
+    'visit_GotoStmt': ('goto',),
+    'visit_VarDecl': ('write',),
+    'visit_FuncDecl': ('write',),
+}
+
+
+class Hooks():
+    # Generated instrumented subclasses, keyed by (base class, instrumented method names). Shared by every
+    # interpreter, so they are created under a lock.
+    hooked_classes = {}
+    hooked_classes_lock = threading.Lock()
+
+    def add_hook(self, event, handler):
+        if event not in EVENTS:
+            raise ValueError(f"Unknown hook event {event!r}; expected one of {', '.join(EVENTS)}.")
+        self.hooks[event].append(handler)
+        self.install_hooks()
+
+    def remove_hook(self, event, handler):
+        self.hooks[event].remove(handler)
+        self.install_hooks()
+
+    def install_hooks(self):
+        base = getattr(type(self), 'hooked_base', type(self))
+        methods = tuple(method for method, events in HOOKED_METHODS.items()
+                        if any(self.hooks[event] for event in events))
+        if not methods:
+            self.__class__ = base
+            return
+
+        key = (base, methods)
+        cls = Hooks.hooked_classes.get(key)
+        if cls is None:
+            with Hooks.hooked_classes_lock:
+                cls = Hooks.hooked_classes.get(key)
+                if cls is None:
+                    attrs = {method: getattr(Hooks, 'hooked_' + method) for method in methods}
+                    attrs['hooked_base'] = base
+                    cls = Hooks.hooked_classes[key] = type('Hooked' + base.__name__, (base,), attrs)
+        # Instrumented only where the active events need it. Switching classes makes CPython materialise the instance
+        # dict, so a fresh interpreter is slightly faster than one whose handlers were all removed again.
+        self.__class__ = cls
+
+    def hooked_visit_Message(self, node):
+        index = self.curr_msg
+        for handler in self.hooks['message_enter']:
+            handler(self, index, node)
+        self.hooked_base.visit_Message(self, node)
+        for handler in self.hooks['message_exit']:
+            handler(self, index, node)
+
+    def hooked_visit_Stmt(self, node):
+        for handler in self.hooks['statement']:
+            handler(self, node)
+        self.hooked_base.visit_Stmt(self, node)
+        for handler in self.hooks['statement_exit']:
+            handler(self, node)
+
+    def hooked_call(self, func_decl, arg_values):
+        for handler in self.hooks['call']:
+            handler(self, func_decl, arg_values)
+        for handler in self.hooks['write']:
+            for arg_value, param in zip(arg_values, func_decl.params):
+                handler(self, self.curr_scope, param.var_node.value, arg_value)
+        value = self.hooked_base.call(self, func_decl, arg_values)
+        for handler in self.hooks['return']:
+            handler(self, func_decl, value)
+        return value
+
+    def hooked_visit_GotoStmt(self, node):
+        from_index = self.curr_msg
+        self.hooked_base.visit_GotoStmt(self, node)
+        for handler in self.hooks['goto']:
+            handler(self, from_index, self.curr_msg + 1)
+
+    def hooked_visit_VarDecl(self, node):
+        self.hooked_base.visit_VarDecl(self, node)
+        name = node.var.value
+        for handler in self.hooks['write']:
+            handler(self, self.curr_scope, name, self.scopes[self.curr_scope][name])
+
+    def hooked_visit_FuncDecl(self, node):
+        self.hooked_base.visit_FuncDecl(self, node)
+        for handler in self.hooks['write']:
+            handler(self, self.curr_scope, node.name.value, node)
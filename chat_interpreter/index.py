@@ -0,0 +1,318 @@
+"""
+An incremental index of where names are defined and used, for the language server. Symbols are
+
+    ('variable', user, name)    a variable of one user; `I`, `me` and `myself` are the user's variable 'i'
+    ('user', name)              a user, named in message headers and by @User
+    ('anchor', name)            an anchor, or a timestamp named 'hh:mm' as the interpreter does ('10:5')
+
+and occurrences are definitions, writes, reads and gotos. Lines count from 1 and columns from 0, in characters.
+"""
+import bisect
+
+from chat_interpreter.ast import (AST, AnchorDecl, AppendStmt, FuncDecl, GotoStmt, IncludeStmt, ScopeCall, ScopePrev,
+                                  ScopeSelf, SetElement, Timestamp, Var, VarDecl)
+from chat_interpreter.diagnostics import Diagnostics
+from chat_interpreter.lexer import Lexer
+from chat_interpreter.parallel import timestamp_key
+from chat_interpreter.symbols import SymbolTable, symbol
+from chat_interpreter.token_parser import Parser
+from chat_interpreter.tokens import Token
+from chat_interpreter.watch import message_starts
+
+DEFINITION = 'definition'
+WRITE = 'write'
+READ = 'read'
+GOTO = 'goto'
+
+
+def variable(user, name):
+    return ('variable', symbol(user), symbol(name))
+
+
+def user(name):
+    return ('user', symbol(name))
+
+
+def anchor(name):
+    return ('anchor', symbol(name))
+
+
+def timestamp(hh, mm):
+    return ('anchor', f'{hh}:{mm}')
+
+
+class IndexedMessage():
+    """The occurrences in one message's text, by symbol, as (kind, line within the text, start column, end column)."""
+    def __init__(self, text, prev_user):
+        self.text = text
+        self.line = 1
+        # The user that your/you referred to when this was indexed, the last user in it, and whether it uses you.
+        self.prev_user = prev_user
+        self.last_user = prev_user
+        self.uses_prev = False
+        self.parsed = False
+        self.symbols = {}
+
+
+class Collector():
+    """Adds the occurrences in a parsed message to an IndexedMessage."""
+    def __init__(self, entry):
+        self.entry = entry
+        self.user = None
+        self.prev_user = entry.prev_user
+
+    def add(self, key, kind, token, end_token=None):
+        # Names without a token of their own (the I of `I'm`, you) have no place to point at.
+        if not isinstance(token, Token):
+            return
+        end_token = end_token or token
+        line_start = self.entry.text.rfind('\n', 0, token.start) + 1
+        start = token.start - line_start
+        end = end_token.start + len(end_token.lexeme) - line_start
+        self.entry.symbols.setdefault(key, []).append((kind, token.line - 1, start, end))
+
+    def program(self, tree):
+        for msg in tree.msgs:
+            self.user = msg.scope.value
+            self.add(('user', self.user), DEFINITION, msg.scope.token)
+            self.add(('anchor', timestamp_key(msg.timestamp)), DEFINITION, msg.timestamp.hh.token,
+                     msg.timestamp.mm.token)
+            self.visit(msg.stmts)
+            self.prev_user = self.user
+        self.entry.last_user = self.prev_user
+
+    def visit(self, node, kind=READ):
+        if type(node) is list:
+            for child in node:
+                self.visit(child, kind)
+            return
+        if not isinstance(node, AST):
+            return
+        node_type = type(node)
+        if node_type is Var:
+            self.add(('variable', self.user, node.value), kind, node.token)
+        elif node_type is ScopeSelf:
+            self.add(('variable', self.user, node.var.value), kind, node.var.token)
+        elif node_type is ScopePrev:
+            self.entry.uses_prev = True
+            if node.var is not None and self.prev_user is not None:
+                self.add(('variable', self.prev_user, node.var.value), kind, node.var.token)
+        elif node_type is ScopeCall:
+            self.add(('user', node.scope.value), READ, node.scope.token)
+            if node.var is not None:
+                self.add(('variable', node.scope.value, node.var.value), kind, node.var.token)
+        elif node_type is VarDecl:
+            # The interpreter stores into var for Put as well, so it is indexed as written.
+            self.visit(node.var, WRITE if node.assignment else DEFINITION)
+            self.visit(node.value)
+        elif node_type is SetElement:
+            self.visit(node.element.target, WRITE)
+            self.visit(node.element.index)
+            self.visit(node.value)
+        elif node_type is AppendStmt:
+            self.visit(node.target, WRITE)
+            self.visit(node.value)
+        elif node_type is FuncDecl:
+            self.visit(node.name, DEFINITION)
+            for param in node.params:
+                self.visit(param.var_node, WRITE)
+            # Indexed as the declaring user's, although the body runs in the scope of whoever calls it.
+            self.visit(node.block_node)
+        elif node_type is AnchorDecl:
+            self.add(('anchor', node.value.value), DEFINITION, node.value.token)
+        elif node_type is GotoStmt:
+            target = node.anchor
+            if type(target) is Timestamp:
+                self.add(('anchor', timestamp_key(target)), GOTO, target.hh.token, target.mm.token)
+            else:
+                self.add(('anchor', target.value), GOTO, target.token)
+        elif node_type is IncludeStmt:
+            # The included functions are declared in another file.
+            pass
+        else:
+            for value in node.__dict__.values():
+                self.visit(value)
+
+
+def common_prefix(a, b, block=4096):
+    # Compares whole blocks first, so long equal stretches are compared in C.
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i:i + block] == b[i:i + block]:
+        i += block
+    i = min(i, n)
+    end = min(i + block, n)
+    while i < end and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def common_suffix(a, b, limit, block=4096):
+    # At most limit characters, so the suffix does not overlap the common prefix.
+    i = 0
+    while i + block <= limit and a[len(a) - i - block:len(a) - i] == b[len(b) - i - block:len(b) - i]:
+        i += block
+    while i < limit and a[len(a) - i - 1] == b[len(b) - i - 1]:
+        i += 1
+    return i
+
+
+class SymbolIndex():
+    def __init__(self, filename):
+        self.filename = filename
+        self.symbols = SymbolTable()
+        self.source = ''
+        # IndexedMessages in source order, with the offset and first line of each.
+        self.messages = []
+        self.offsets = []
+        self.lines = []
+        # Symbol -> the IndexedMessages it occurs in, as a dict used as an insertion-ordered set.
+        self.occurring = {}
+        self.indexed = 0
+
+    def update(self, source):
+        """
+        Indexes source, which usually is the previous source with an edit. Only the messages between the first and
+        the last changed character are split again, and of those only the ones whose text changed are parsed.
+        """
+        old = self.source
+        self.indexed = 0
+        if source == old:
+            return
+        prefix = common_prefix(old, source)
+        suffix = common_suffix(old, source, min(len(old), len(source)) - prefix)
+        delta = len(source) - len(old)
+
+        # Splitting starts a message before the one holding the first change, since an edited header joins its
+        # message to the one before, and continues until a header after the last change starts a message again.
+        first = max(bisect.bisect_right(self.offsets, prefix) - 2, 0)
+        start = self.offsets[first] if self.messages else 0
+        line = self.lines[first] if self.messages else 1
+        unchanged = len(source) - suffix
+        resume = len(self.messages)
+        starts = [start]
+        headers = message_starts(source, start)
+        # The first header is the one at start, or joins the first message if start is 0, as in split_messages.
+        next(headers, None)
+        for offset in headers:
+            if offset >= unchanged:
+                old_index = bisect.bisect_left(self.offsets, offset - delta)
+                if old_index < len(self.offsets) and self.offsets[old_index] == offset - delta:
+                    resume = old_index
+                    break
+            starts.append(offset)
+        end = self.offsets[resume] + delta if resume < len(self.messages) else len(source)
+
+        # Messages whose text only moved keep their occurrences.
+        replaced = {}
+        for entry in self.messages[first:resume]:
+            replaced.setdefault(entry.text, []).append(entry)
+        prev_user = self.messages[first - 1].last_user if first else None
+        entries = []
+        lines = []
+        for i, offset in enumerate(starts):
+            text = source[offset:starts[i + 1] if i + 1 < len(starts) else end]
+            cached = replaced.get(text)
+            entry = cached.pop() if cached else None
+            if entry is not None and entry.uses_prev and entry.prev_user != prev_user:
+                self.forget(entry)
+                entry = None
+            if entry is None:
+                entry = self.index_message(text, prev_user)
+            entry.line = line
+            entries.append(entry)
+            lines.append(line)
+            line += text.count('\n')
+            prev_user = entry.last_user
+        for leftovers in replaced.values():
+            for entry in leftovers:
+                self.forget(entry)
+
+        tail = self.messages[resume:]
+        line_delta = line - self.lines[resume] if tail else 0
+        if line_delta:
+            for entry in tail:
+                entry.line += line_delta
+        self.messages[first:] = entries + tail
+        self.offsets[first:] = starts + [offset + delta for offset in self.offsets[resume:]]
+        self.lines[first:] = lines + [old_line + line_delta for old_line in self.lines[resume:]]
+        self.source = source
+
+        # A later message using you may now refer to another user.
+        for i in range(first + len(entries), len(self.messages)):
+            entry = self.messages[i]
+            if entry.prev_user == prev_user:
+                break
+            if entry.uses_prev:
+                self.forget(entry)
+                new_entry = self.messages[i] = self.index_message(entry.text, prev_user)
+                new_entry.line = entry.line
+                entry = new_entry
+            else:
+                entry.prev_user = prev_user
+                if not entry.parsed:
+                    entry.last_user = prev_user
+            prev_user = entry.last_user
+
+    def index_message(self, text, prev_user):
+        self.indexed += 1
+        entry = IndexedMessage(text, prev_user)
+        scanner = Lexer(text, self.filename, self.symbols, Diagnostics(echo=False))
+        scanner.scan_tokens()
+        tree = None
+        if not scanner.has_error:
+            try:
+                tree = Parser(scanner).parse()
+            except Exception:
+                pass
+        # Messages that do not parse have no occurrences until they are fixed.
+        if tree is not None:
+            Collector(entry).program(tree)
+            entry.parsed = True
+        for key in entry.symbols:
+            self.occurring.setdefault(key, {})[entry] = None
+        return entry
+
+    def forget(self, entry):
+        for key in entry.symbols:
+            entries = self.occurring[key]
+            del entries[entry]
+            if not entries:
+                del self.occurring[key]
+
+    def occurrences(self, key, kinds=None):
+        """Returns (kind, line, start column, end column) for every occurrence of key of the given kinds, in order."""
+        found = []
+        for entry in self.occurring.get(key, ()):
+            for kind, line, start, end in entry.symbols[key]:
+                if kinds is None or kind in kinds:
+                    found.append((kind, entry.line + line, start, end))
+        found.sort(key=lambda occurrence: occurrence[1:])
+        return found
+
+    def definitions(self, key):
+        return self.occurrences(key, (DEFINITION,))
+
+    def message_at(self, line):
+        i = bisect.bisect_right(self.lines, line) - 1
+        return self.messages[i] if i >= 0 else None
+
+    def symbol_at(self, line, column):
+        """Returns the symbol with an occurrence at (or just after) line and column, or None."""
+        entry = self.message_at(line)
+        if entry is None:
+            return None
+        line -= entry.line
+        for key, found in entry.symbols.items():
+            for kind, found_line, start, end in found:
+                if found_line == line and start <= column <= end:
+                    return key
+        return None
+
+    def line_text(self, line):
+        entry = self.message_at(line)
+        if entry is None:
+            return ''
+        lines = entry.text.split('\n')
+        line -= entry.line
+        return lines[line] if line < len(lines) else ''
@@ -1,5 +1,44 @@
-from chat_interpreter.tokens import TokenType
-from chat_interpreter.ast import NodeVisitor
+import operator
+import time
+import types
+
+from chat_interpreter.tokens import *
+from chat_interpreter.ast import LazyBlock, NodeVisitor, ScopeCall, ScopePrev, Var
+from chat_interpreter.hooks import EVENTS, Hooks
+from chat_interpreter.lists import LIST_FUNCTIONS, ChatList
+from chat_interpreter.natives import NativeFunction
+from chat_interpreter.strings import add
+from chat_interpreter.symbols import symbol
+
+def divide(left, right):
+    # Numbers stay exact ints until a division has a fractional result.
+    if type(left) is int and type(right) is int and right and left % right == 0:
+        return left // right
+    return left / right
+
+
+BINARY_OPS = {
+    ADD: add,
+    SUBTRACT: operator.sub,
+    MULTIPLY: operator.mul,
+    DIVIDE: divide,
+    REMAIN: operator.mod,
+}
+
+COMPARISONS = {
+    EQUAL: operator.eq,
+    GREATER: operator.gt,
+    LESS: operator.lt,
+    MOST: operator.le,
+    LEAST: operator.ge,
+}
+
+
+@types.coroutine
+def yield_to_loop():
+    # A bare yield suspends the awaiting task for one event loop iteration, like asyncio.sleep(0), without importing
+    # asyncio on every interpreter start-up.
+    yield
 
 
 class ReturnError(Exception):
@@ -7,61 +46,157 @@ class ReturnError(Exception):
         self.expr = expr
 
 
-class Interpreter(NodeVisitor):
-    def __init__(self, parser):
+class ExecutionLimitError(Exception):
+    def __init__(self, reason, msg_index, timestamp):
+        super().__init__(f"{reason} (stopped at message {msg_index}, [{timestamp}])")
+        self.reason = reason
+        self.msg_index = msg_index
+        self.timestamp = timestamp
+
+
+class Interpreter(Hooks, NodeVisitor):
+    def __init__(self, parser, max_steps=None, timeout=None, out=None):
         self.parser = parser
+        # Where Say and called functions print; sys.stdout at the time of printing when None.
+        self.out = out
         self.scopes = {}
         self.anchors = {}
         self.prev_scope = None
         self.curr_scope = None
         self.curr_msg = 0
+        self.hooks = {event: [] for event in EVENTS}
+        # NativeFunctions registered for every user, by name, starting with the bulk operations on lists. They are
+        # only looked up where a function is called, so variables of the same name still start out as 0.
+        self.natives = dict(LIST_FUNCTIONS)
+
+        # Execution limits for untrusted programs. max_steps bounds the number of executed statements and timeout
+        # is a wall-clock budget in seconds for interpret(). The checks are hooks, so they are only installed when a
+        # limit is set and unlimited runs go through the plain visit_Stmt.
+        self.max_steps = max_steps
+        self.timeout = timeout
+        self.steps = 0
+        self.deadline = None
+        self.limit_msg = (0, None)
+        if max_steps is not None or timeout is not None:
+            self.add_hook('message_enter', Interpreter.record_limit_msg)
+            self.add_hook('statement', Interpreter.check_limits)
+
+    def register_function(self, name, fn, scope=None):
+        """
+        Makes the Python callable fn a Chatlang function called name, as a variable of the user scope, or for every
+        user if scope is None. Returns its NativeFunction.
+        """
+        func = NativeFunction(name, fn)
+        if scope is None:
+            self.natives[func.name] = func
+        else:
+            self.scopes.setdefault(symbol(scope), {'i': 0})[func.name] = func
+        return func
+
+    def list_value(self, node):
+        value = self.visit(node)
+        if type(value) is not ChatList:
+            raise TypeError(f"{self.format_output(value)!r} is not a list.")
+        return value
 
     def format_output(self, out):
-        if type(out) == float:
-            # Convert integer-valued floats to ints for printing.
-            if int(out) == out:
-                out = int(out)
+        # Integers are already exact ints; only floats with an integral value need converting for printing.
+        if type(out) is float and out.is_integer():
+            out = int(out)
         return out
 
-    def interpret(self):
-        tree = self.parser.parse()
+    def format_timestamp(self, node):
+        hh, mm = self.visit(node.hh), self.visit(node.mm)
+        return f'{int(hh):02}:{int(mm):02}'
+
+    def interpret(self, tree=None):
+        # Pass an already parsed tree to skip parsing.
+        if self.timeout is not None:
+            self.deadline = time.monotonic() + self.timeout
+        if tree is None:
+            tree = self.parser.parse()
         if tree is not None:
             return self.visit(tree)
 
+    async def run(self, slice_size=64):
+        """
+        Runs the program cooperatively on the current event loop, yielding control after every slice_size messages.
+        Cancelling the awaiting task stops the program at the next yield point.
+        """
+        if self.timeout is not None:
+            self.deadline = time.monotonic() + self.timeout
+        tree = self.parser.parse()
+        if tree is None:
+            return
+
+        executed = 0
+        while self.curr_msg < len(tree.msgs):
+            self.step(tree)
+            executed += 1
+            if executed == slice_size:
+                executed = 0
+                await yield_to_loop()
+
+    def step(self, program):
+        # Executes the current message of program and advances to the next one.
+        self.prev_scope = self.curr_scope
+        self.curr_scope = self.visit(program.msgs[self.curr_msg].scope)
+
+        self.visit(program.msgs[self.curr_msg])
+        self.curr_msg += 1
+
     def visit_Anchor(self, node):
         return node.value
 
     def visit_AnchorDecl(self, node):
         self.anchors[self.visit(node.value)] = node.stmt_num
 
+    def visit_AppendStmt(self, node):
+        self.list_value(node.target).append(self.visit(node.value))
+
     def visit_BinaryOp(self, node):
-        if node.op == TokenType.ADD:
-            return self.visit(node.left) + self.visit(node.right)
-        elif node.op == TokenType.SUBTRACT:
-            return self.visit(node.left) - self.visit(node.right)
-        elif node.op == TokenType.MULTIPLY:
-            return self.visit(node.left) * self.visit(node.right)
-        elif node.op == TokenType.DIVIDE:
-            return self.visit(node.left) / self.visit(node.right)
-        elif node.op == TokenType.REMAIN:
-            return self.visit(node.left) % self.visit(node.right)
+        return BINARY_OPS[node.op](self.visit(node.left), self.visit(node.right))
 
     def visit_Compound(self, node):
         for stmt in node.stmts:
             self.visit(stmt)
 
+    def visit_Element(self, node):
+        return self.list_value(node.target).get(self.visit(node.index))
+
     def visit_FuncCall(self, node):
-        func_decl = self.visit(node.name)
+        func_decl = self.native(node.name)
+        if func_decl is None:
+            func_decl = self.visit(node.name)
         if not func_decl:
             raise NameError(node.name)
+        return self.call(func_decl, [self.visit(arg.expr) for arg in node.args])
+
+    def native(self, name):
+        # The native function a called name refers to if its user has no variable of that name, or None.
+        var = name if type(name) is Var else name.var
+        if var is None or var.value not in self.natives:
+            return None
+        if type(name) is ScopeCall:
+            scope_name = self.visit(name.scope)
+        elif type(name) is ScopePrev:
+            scope_name = self.prev_scope
+        else:
+            scope_name = self.curr_scope
+        if var.value in self.scopes.get(scope_name, ()):
+            return None
+        return self.natives[var.value]
+
+    def call(self, func_decl, arg_values):
+        if type(func_decl) is NativeFunction:
+            return func_decl.call(arg_values)
         block = func_decl.block_node
+        if type(block) is LazyBlock:
+            # Parsed once, on the first call, and put in place of the LazyBlock for the calls after it.
+            block = func_decl.block_node = block.parser.parse_lazy_block(block)
 
-        if node.args:
-            arg_values = []
-            for arg in node.args:
-                arg_values.append(self.visit(arg.expr))
-            for arg_value, param in zip(arg_values,  func_decl.params):
-                self.scopes[self.curr_scope][param.var_node.value] = arg_value
+        for arg_value, param in zip(arg_values, func_decl.params):
+            self.scopes[self.curr_scope][param.var_node.value] = arg_value
 
         try:
             self.visit(block)
@@ -74,7 +209,7 @@ class Interpreter(NodeVisitor):
         ret = self.visit(node.func_call)
         if ret:
             ret = self.format_output(ret)
-            print(ret)
+            print(ret, file=self.out)
 
     def visit_FuncDecl(self, node):
         self.scopes[self.curr_scope][node.name.value] = node
@@ -88,24 +223,22 @@ class Interpreter(NodeVisitor):
         elif node.else_block:
             self.visit(node.else_block)
 
+    def visit_IncludeStmt(self, node):
+        for func_decl in node.funcs:
+            self.visit(func_decl)
+
+    def visit_Length(self, node):
+        return len(self.visit(node.target))
+
     def visit_Logical(self, node):
-        res = False
         if not node.op:
             res = self.visit(node.left) != 0
-        elif node.op == TokenType.AND:
+        elif node.op == AND:
             return self.visit(node.left) and self.visit(node.right)
-        elif node.op == TokenType.OR:
+        elif node.op == OR:
             return self.visit(node.left) or self.visit(node.right)
-        elif node.op == TokenType.EQUAL:
-            res = self.visit(node.left) == self.visit(node.right)
-        elif node.op == TokenType.GREATER:
-            res = self.visit(node.left) > self.visit(node.right)
-        elif node.op == TokenType.LESS:
-            res = self.visit(node.left) < self.visit(node.right)
-        elif node.op == TokenType.MOST:
-            res = self.visit(node.left) <= self.visit(node.right)
-        elif node.op == TokenType.LEAST:
-            res = self.visit(node.left) >= self.visit(node.right)
+        else:
+            res = COMPARISONS[node.op](self.visit(node.left), self.visit(node.right))
 
         if node.negate:
             res = not res
@@ -117,6 +250,9 @@ class Interpreter(NodeVisitor):
             self.anchors[timestamp] = self.curr_msg
         self.visit(node.stmts)
 
+    def visit_NewList(self, node):
+        return ChatList()
+
     def visit_NoOp(self, node):
         pass
 
@@ -128,11 +264,7 @@ class Interpreter(NodeVisitor):
 
     def visit_Program(self, node):
         while self.curr_msg < len(node.msgs):
-            self.prev_scope = self.curr_scope
-            self.curr_scope = self.visit(node.msgs[self.curr_msg].scope)
-
-            self.visit(node.msgs[self.curr_msg])
-            self.curr_msg += 1
+            self.step(node)
 
     def visit_ScopeCall(self, node):
         scope_name = self.visit(node.scope)
@@ -156,16 +288,35 @@ class Interpreter(NodeVisitor):
     def visit_ScopeSelf(self, node):
         return self.visit(node.var)
 
+    def visit_SetElement(self, node):
+        element = node.element
+        self.list_value(element.target).set(self.visit(element.index), self.visit(node.value))
+
     def visit_Stmt(self, node):
         if self.curr_scope not in self.scopes.keys():
             self.scopes[self.curr_scope] = {}
             self.scopes[self.curr_scope]['i'] = 0
         self.visit(node.stmt)
 
+    def record_limit_msg(self, index, node):
+        self.limit_msg = (index, node)
+
+    def check_limits(self, node):
+        self.steps += 1
+        if self.max_steps is not None and self.steps > self.max_steps:
+            self.limit_exceeded(f"Statement limit of {self.max_steps} exceeded")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            self.limit_exceeded(f"Time limit of {self.timeout}s exceeded")
+
+    def limit_exceeded(self, reason):
+        msg_index, msg = self.limit_msg
+        timestamp = self.format_timestamp(msg.timestamp) if msg is not None else '??:??'
+        raise ExecutionLimitError(reason, msg_index, timestamp)
+
     def visit_PrintStmt(self, node):
         out = self.visit(node.value)
         out = self.format_output(out)
-        print(out)
+        print(out, file=self.out)
 
     def visit_ReturnStmt(self, node):
         raise ReturnError(node.expr)
@@ -184,4 +335,4 @@ class Interpreter(NodeVisitor):
             return 0
 
     def visit_VarDecl(self, node):
-        self.scopes[self.curr_scope][node.var.value.lower()] = self.visit(node.value)
\ No newline at end of file
+        self.scopes[self.curr_scope][node.var.value] = self.visit(node.value)
\ No newline at end of file
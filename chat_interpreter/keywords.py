@@ -1,68 +1,81 @@
-from chat_interpreter.tokens import TokenType
+from chat_interpreter.tokens import *
 
+# Keyword lexeme (lowercased) to token code. Every keyword maps to a distinct code, so a single dict lookup classifies a
+# word.
 KEYWORDS = {
-    "i": TokenType.I,
-    "i'm": TokenType.IM,
-    "add": TokenType.ADD,
-    "added": TokenType.ADDED,
-    "am": TokenType.AM,
-    "and": TokenType.AND,
-    "are": TokenType.ARE,
-    "at": TokenType.AT,
-    "back": TokenType.BACK,
-    "be": TokenType.BE,
-    "by": TokenType.BY,
-    "call": TokenType.CALL,
-    "divide": TokenType.DIVIDE,
-    "divided": TokenType.DIVIDED,
-    "do": TokenType.DO,
-    "done": TokenType.DONE,
-    "else": TokenType.ELSE,
-    "equal": TokenType.EQUAL,
-    "following": TokenType.FOLLOWING,
-    "from": TokenType.FROM,
-    "give": TokenType.GIVE,
-    "go": TokenType.GO,
-    "greater": TokenType.GREATER,
-    "if": TokenType.IF,
-    "in": TokenType.IN,
-    "is": TokenType.IS,
-    "least": TokenType.LEAST,
-    "less": TokenType.LESS,
-    "let": TokenType.LET,
-    "make": TokenType.MAKE,
-    "me": TokenType.ME,
-    "minus": TokenType.MINUS,
-    "most": TokenType.MOST,
-    "multiplied": TokenType.MULTIPLIED,
-    "multiply": TokenType.MULTIPLY,
-    "my": TokenType.MY,
-    "myself": TokenType.MYSELF,
-    "not": TokenType.NOT,
-    "or": TokenType.OR,
-    "otherwise": TokenType.OTHERWISE,
-    "plus": TokenType.PLUS,
-    "pm": TokenType.PM,
-    "put": TokenType.PUT,
-    "remain": TokenType.REMAIN,
-    "remains": TokenType.REMAINS,
-    "remember": TokenType.REMEMBER,
-    "remove": TokenType.REMOVE,
-    "return": TokenType.RETURN,
-    "said": TokenType.SAID,
-    "say": TokenType.SAY,
-    "so": TokenType.SO,
-    "subtract": TokenType.SUBTRACT,
-    "than": TokenType.THAN,
-    "times": TokenType.TIMES,
-    "to": TokenType.TO,
-    "was": TokenType.WAS,
-    "were": TokenType.WERE,
-    "when": TokenType.WHEN,
-    "whether": TokenType.WHETHER,
-    "with": TokenType.WITH,
-    "without": TokenType.WITHOUT,
-    "you": TokenType.YOU,
-    "your": TokenType.YOUR,
-    "yourself": TokenType.YOURSELF
+    "i": I,
+    "i'm": IM,
+    "add": ADD,
+    "added": ADDED,
+    "am": AM,
+    "and": AND,
+    "are": ARE,
+    "at": AT,
+    "back": BACK,
+    "be": BE,
+    "by": BY,
+    "call": CALL,
+    "divide": DIVIDE,
+    "divided": DIVIDED,
+    "do": DO,
+    "done": DONE,
+    "else": ELSE,
+    "equal": EQUAL,
+    "following": FOLLOWING,
+    "from": FROM,
+    "give": GIVE,
+    "go": GO,
+    "greater": GREATER,
+    "if": IF,
+    "in": IN,
+    "include": INCLUDE,
+    "is": IS,
+    "least": LEAST,
+    "less": LESS,
+    "let": LET,
+    "make": MAKE,
+    "me": ME,
+    "minus": MINUS,
+    "most": MOST,
+    "multiplied": MULTIPLIED,
+    "multiply": MULTIPLY,
+    "my": MY,
+    "myself": MYSELF,
+    "not": NOT,
+    "or": OR,
+    "otherwise": OTHERWISE,
+    "plus": PLUS,
+    "pm": PM,
+    "put": PUT,
+    "remain": REMAIN,
+    "remains": REMAINS,
+    "remember": REMEMBER,
+    "remove": REMOVE,
+    "return": RETURN,
+    "said": SAID,
+    "say": SAY,
+    "so": SO,
+    "subtract": SUBTRACT,
+    "than": THAN,
+    "times": TIMES,
+    "to": TO,
+    "was": WAS,
+    "were": WERE,
+    "when": WHEN,
+    "whether": WHETHER,
+    "with": WITH,
+    "without": WITHOUT,
+    "you": YOU,
+    "your": YOUR,
+    "yourself": YOURSELF
+}
+
+
+# Keywords the lexer only recognizes where list syntax can stand (see Lexer.contextual_keyword).
+CONTEXTUAL_KEYWORDS = {
+    "append": APPEND,
+    "element": ELEMENT,
+    "length": LENGTH,
+    "list": LIST,
+    "of": OF
 }
@@ -1,20 +1,55 @@
-from chat_interpreter.tokens import Token, TokenType
-from chat_interpreter.keywords import KEYWORDS
+import re
+
+from chat_interpreter.diagnostics import Diagnostics
+from chat_interpreter.tokens import *
+from chat_interpreter.keywords import CONTEXTUAL_KEYWORDS, KEYWORDS
+from chat_interpreter.symbols import SymbolTable
+
+SINGLE_CHAR_TOKENS = {
+    # Punctuation
+    '.': PUNCT,
+    '!': PUNCT,
+    '?': PUNCT,
+
+    # Single-character tokens
+    '@': ATSYM,
+    '[': LBRACE,
+    ']': RBRACE,
+    ':': COLON,
+    ',': COMMA,
+    '#': HASH,
+}
+
+WHITESPACE_CHARS = frozenset(' \r\t')
+
+# Tokens a statement can follow, and tokens a name follows; neither is followed by a list expression.
+STATEMENT_START_TOKENS = frozenset({COLON, PUNCT, COMMA})
+NAME_PREFIX_TOKENS = frozenset({MY, YOUR, APOST_S, HASH, ATSYM, MAKE, CALL, RBRACE})
+
+# Lookaheads over the rest of the line, from the end of a contextual keyword.
+APPEND_REST = re.compile(r"[^\n]*?\bto\b", re.I)
+ELEMENT_REST = re.compile(r"[^.!?\n]*?\bof\b", re.I)
+LENGTH_REST = re.compile(r"[ \t]+of\b", re.I)
+NEXT_WORD = re.compile(r"[ \t]*([A-Za-z][A-Za-z0-9']*)?")
 
 
 class Lexer():
-    def __init__(self, source, filename):
+    def __init__(self, source, filename, symbols=None, diagnostics=None):
         self.source = source#.replace("'", '')
         self.filename = filename
+        self.symbols = symbols if symbols is not None else SymbolTable()
+        self.diagnostics = diagnostics if diagnostics is not None else Diagnostics()
         self.start = 0
         self.current = 0
         self.line = 1
         self.pos = 0
         self.tokens = []
         self.has_error = False
+        # ELEMENTs and LENGTHs still waiting for their OF.
+        self.pending_of = 0
 
     def print_error(self, line, pos, message):
-        print(f"[{self.filename}, line {line}:{pos}] Error: {message}")
+        self.diagnostics.report(self.filename, line, pos, message)
         self.has_error = True
 
     def advance(self):
@@ -70,43 +105,82 @@ class Lexer():
 
             # Determine if the last word is an identifier or a keyword.
             last_word = identifier.split()[-1].lower()
-            for keyword in KEYWORDS.keys():
-                if last_word == keyword:
-                    # If so, all words before the last word is an identifier.
-                    # Have to manually set self.start and self.current before adding the tokens.
-                    keyword_start_index = self.start + len(identifier) - len(last_word) - 1
-                    keyword_end_index = self.current
-                    self.current = keyword_start_index
-                    if len(identifier.split()) > 1:
-                        self.add_token(TokenType.IDENTIFIER, ' '.join(identifier.split()[:-1]).lower())
-
-                    self.start = keyword_start_index + 1
-                    self.current = keyword_end_index
-                    self.add_token(KEYWORDS[last_word], last_word)
-                    return
+            keyword = KEYWORDS.get(last_word)
+            if keyword is None and last_word in CONTEXTUAL_KEYWORDS:
+                keyword = self.contextual_keyword(last_word, len(identifier.split()) == 1)
+            if keyword is not None:
+                # If so, all words before the last word is an identifier.
+                # Have to manually set self.start and self.current before adding the tokens.
+                keyword_start_index = self.start + len(identifier) - len(last_word) - 1
+                keyword_end_index = self.current
+                self.current = keyword_start_index
+                if len(identifier.split()) > 1:
+                    self.add_token(IDENTIFIER, self.symbols.intern(' '.join(identifier.split()[:-1])))
+
+                self.start = keyword_start_index + 1
+                self.current = keyword_end_index
+                self.add_token(keyword, last_word)
+                return
             # If no keywords match, parse a new word.
-            else:
-                if self.peek() in [' ', '\r', '\t']:
-                    self.advance()
+            if self.peek() in WHITESPACE_CHARS:
+                self.advance()
         if identifier != "":
-            for keyword in KEYWORDS.keys():
-                if identifier == keyword:
-                    self.add_token(KEYWORDS[identifier])
-                    return
+            keyword = KEYWORDS.get(identifier)
+            if keyword is not None:
+                self.add_token(keyword)
             else:
-                self.add_token(TokenType.IDENTIFIER, identifier)
+                self.add_token(IDENTIFIER, self.symbols.intern(identifier))
+
+    def contextual_keyword(self, word, first):
+        """
+        Returns the token of a list keyword (see CONTEXTUAL_KEYWORDS) if list syntax can stand here, or None if the
+        word is part of a name, as in `My number of apples is 3.` or `My list is 4.`
+        """
+        keyword = CONTEXTUAL_KEYWORDS[word]
+        if keyword == OF:
+            # Only the of of `element N of` and `length of`.
+            if not self.pending_of:
+                return None
+            self.pending_of -= 1
+            return OF
+        if not first:
+            return None
+
+        prev = self.tokens[-1].type if self.tokens else None
+        end = self.source.find('\n', self.current)
+        end = len(self.source) if end == -1 else end
+        if keyword == APPEND:
+            # Starts an `Append VALUE to TARGET.` statement.
+            if prev not in STATEMENT_START_TOKENS or not APPEND_REST.match(self.source, self.current, end):
+                return None
+            return APPEND
+        if prev in STATEMENT_START_TOKENS or prev in NAME_PREFIX_TOKENS:
+            return None
+        if keyword == LIST:
+            # A new list stands alone, not as the first word of a name or the target of Let ... be.
+            next_word = NEXT_WORD.match(self.source, self.current, end).group(1)
+            if prev in (LET, IN) or (next_word is not None and next_word.lower() not in KEYWORDS):
+                return None
+            return LIST
+        pattern = ELEMENT_REST if keyword == ELEMENT else LENGTH_REST
+        if not pattern.match(self.source, self.current, end):
+            return None
+        self.pending_of += 1
+        return keyword
 
     def handle_number(self):
         # Advance while current is a digit.
         while self.peek().isdigit():
             self.advance()
 
-        # Handle floats.
+        # Handle floats. Literals without a fractional part stay exact ints.
         if self.peek() == '.' and self.peek_next().isdigit():
             self.advance()
             while self.peek().isdigit():
                 self.advance()
-        self.add_token(TokenType.NUM, float(self.source[self.start:self.current]))
+            self.add_token(NUM, float(self.source[self.start:self.current]))
+        else:
+            self.add_token(NUM, int(self.source[self.start:self.current]))
 
     def handle_string(self):
         start_pos = self.pos
@@ -125,50 +199,32 @@ class Lexer():
 
         # Trim the surrounding quotes
         value = self.source[self.start + 1: self.current - 1]
-        self.add_token(TokenType.STR, value)
+        self.add_token(STR, value)
 
     def is_at_end(self):
         return self.current >= len(self.source)
 
     def add_token(self, tok, literal=None):
         text = self.source[self.start:self.current]
-        self.tokens.append(Token(tok, text, literal, self.line, self.pos))
+        self.tokens.append(Token(tok, text, literal, self.line, self.pos, self.start))
 
     def scan_tokens(self):
         while not self.is_at_end():
             self.start = self.current
             self.scan_token()
-        self.tokens.append(Token(TokenType.EOF, "", None, self.line, self.pos))
+        self.tokens.append(Token(EOF, "", None, self.line, self.pos, self.current))
 
     def scan_token(self):
-        curr_tok = None
         curr_char = self.advance()
 
-        # Punctuation
-        if curr_char == '.':
-            curr_tok = TokenType.PUNCT
-        elif curr_char == '!':
-            curr_tok = TokenType.PUNCT
-        elif curr_char == '?':
-            curr_tok = TokenType.PUNCT
-
-        # Single-character tokens
-        elif curr_char == '@':
-            curr_tok = TokenType.ATSYM
-        elif curr_char == '[':
-            curr_tok = TokenType.LBRACE
-        elif curr_char == ']':
-            curr_tok = TokenType.RBRACE
-        elif curr_char == ':':
-            curr_tok = TokenType.COLON
-        elif curr_char == ',':
-            curr_tok = TokenType.COMMA
-        elif curr_char == '#':
-            curr_tok = TokenType.HASH
+        # Punctuation and single-character tokens
+        curr_tok = SINGLE_CHAR_TOKENS.get(curr_char)
+        if curr_tok is not None:
+            pass
 
         # Multiple-character tokens
         elif curr_char == "'":
-            curr_tok = TokenType.APOST_S if self.match('s') else TokenType.APOST
+            curr_tok = APOST_S if self.match('s') else APOST
 
         # Handle comments.
         elif curr_char == '(':
@@ -187,7 +243,7 @@ class Lexer():
             return
 
         # Handle whitespace
-        elif curr_char in [' ', '\r', '\t']:
+        elif curr_char in WHITESPACE_CHARS:
             return
         elif curr_char == '\n':
             self.line += 1
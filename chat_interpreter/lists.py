@@ -0,0 +1,182 @@
+"""
+List values, for programs that process many values at once.
+
+A list starts out empty from `list` and grows with `Append X to my scores.`; `element N of my scores` reads (and can be
+assigned) the Nth element, counting from 1, and `length of my scores` is its size. Lists are shared like functions:
+assigning one to another variable or user makes both names refer to the same list.
+
+Elements are stored compactly while they allow it: in an array('q') while they are all ints, in an array('d') once a
+float is added, and in a plain Python list once anything else is. Arithmetic with a list works element by element, with
+a number on the other side or another list of the same length, in a single native loop instead of one statement per
+element. sum, minimum, maximum and sorted are native functions every program can call on lists.
+"""
+import itertools
+import operator
+from array import array
+
+from chat_interpreter.natives import NativeFunction
+from chat_interpreter.strings import StrBuilder
+
+INT_CODE = 'q'
+FLOAT_CODE = 'd'
+
+INT_MIN = -2 ** 63
+INT_MAX = 2 ** 63 - 1
+# Larger ints would lose precision in an array('d'), so a list holding one switches to a Python list instead.
+FLOAT_EXACT = 2 ** 53
+
+
+def format_element(value):
+    if type(value) is float and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class ChatList():
+    __slots__ = ('items',)
+
+    def __init__(self, items=None):
+        self.items = array(INT_CODE) if items is None else items
+
+    @staticmethod
+    def of(values):
+        """Returns a new list holding values, in the most compact storage that fits them."""
+        values = list(values)
+        types = set(map(type, values))
+        if StrBuilder in types:
+            values = [str(value) if type(value) is StrBuilder else value for value in values]
+            types = set(map(type, values))
+        if types <= {int}:
+            try:
+                return ChatList(array(INT_CODE, values))
+            except OverflowError:
+                pass
+        elif types <= {int, float}:
+            if int not in types or all(-FLOAT_EXACT <= value <= FLOAT_EXACT for value in values if type(value) is int):
+                return ChatList(array(FLOAT_CODE, values))
+        return ChatList(values)
+
+    def storage_for(self, value):
+        # The storage that fits both the current elements and value, converting the elements if it changes.
+        items = self.items
+        value_type = type(value)
+        if type(items) is list:
+            return items
+        if value_type is int:
+            if items.typecode == INT_CODE and INT_MIN <= value <= INT_MAX:
+                return items
+            if items.typecode == FLOAT_CODE and -FLOAT_EXACT <= value <= FLOAT_EXACT:
+                return items
+        elif value_type is float:
+            if items.typecode == FLOAT_CODE:
+                return items
+            if all(-FLOAT_EXACT <= item <= FLOAT_EXACT for item in items):
+                self.items = array(FLOAT_CODE, items)
+                return self.items
+        self.items = list(items)
+        return self.items
+
+    def append(self, value):
+        if type(value) is StrBuilder:
+            value = str(value)
+        self.storage_for(value).append(value)
+
+    def index(self, position):
+        # Positions count from 1, as they are written in programs.
+        if type(position) is float and position.is_integer():
+            position = int(position)
+        if type(position) is not int or not 1 <= position <= len(self.items):
+            raise IndexError(f"There is no element {format_element(position)} in a list of {len(self.items)}.")
+        return position - 1
+
+    def get(self, position):
+        return self.items[self.index(position)]
+
+    def set(self, position, value):
+        index = self.index(position)
+        if type(value) is StrBuilder:
+            value = str(value)
+        self.storage_for(value)[index] = value
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __str__(self):
+        return ', '.join(format_element(item) for item in self.items)
+
+    def __repr__(self):
+        return f'list [{self}]'
+
+    def __eq__(self, other):
+        if type(other) is ChatList:
+            return len(self.items) == len(other.items) and all(map(operator.eq, self.items, other.items))
+        return NotImplemented
+
+    def __ne__(self, other):
+        if type(other) is ChatList:
+            return not self == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def elementwise(self, op, other, reflected=False):
+        # Applies op to every element and a number, or to the elements of two lists pairwise, as a new list.
+        if type(other) is ChatList:
+            if len(other.items) != len(self.items):
+                raise ValueError(f"Lists of {len(self.items)} and {len(other.items)} elements cannot be combined.")
+            if reflected:
+                return ChatList.of(map(op, other.items, self.items))
+            return ChatList.of(map(op, self.items, other.items))
+        if type(other) not in (int, float, bool):
+            return NotImplemented
+        if reflected:
+            return ChatList.of(map(op, itertools.repeat(other, len(self.items)), self.items))
+        return ChatList.of(map(op, self.items, itertools.repeat(other)))
+
+    def __add__(self, other):
+        return self.elementwise(operator.add, other)
+
+    def __radd__(self, other):
+        return self.elementwise(operator.add, other, True)
+
+    def __sub__(self, other):
+        return self.elementwise(operator.sub, other)
+
+    def __rsub__(self, other):
+        return self.elementwise(operator.sub, other, True)
+
+    def __mul__(self, other):
+        return self.elementwise(operator.mul, other)
+
+    def __rmul__(self, other):
+        return self.elementwise(operator.mul, other, True)
+
+    def __truediv__(self, other):
+        # Imported here, since the interpreter imports this module.
+        from chat_interpreter.interpreter import divide
+        return self.elementwise(divide, other)
+
+    def __rtruediv__(self, other):
+        from chat_interpreter.interpreter import divide
+        return self.elementwise(divide, other, True)
+
+    def __mod__(self, other):
+        return self.elementwise(operator.mod, other)
+
+    def __rmod__(self, other):
+        return self.elementwise(operator.mod, other, True)
+
+
+def sorted_list(values):
+    return ChatList.of(sorted(values))
+
+
+LIST_FUNCTIONS = {func.name: func for func in [
+    NativeFunction('sum', sum),
+    NativeFunction('minimum', min),
+    NativeFunction('maximum', max),
+    NativeFunction('sorted', sorted_list),
+]}
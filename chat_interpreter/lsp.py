@@ -0,0 +1,179 @@
+"""
+A minimal Language Server Protocol server on stdin/stdout, for go to definition and find references in editors.
+
+    python chatlang.py --lsp
+
+Each open document has a SymbolIndex. Documents are synced in full (textDocumentSync 1), and every change updates the
+index, which only re-parses the messages that changed. Go to definition lists the definitions of the symbol under the
+cursor, or where it is written if it never is declared (variables created with Let); find references lists every
+occurrence, leaving out the definitions unless the client asks for them. Positions are in UTF-16 code units unless the
+client accepts UTF-32 (characters), which the index counts in.
+"""
+import json
+import sys
+from urllib.parse import unquote, urlparse
+
+from chat_interpreter.index import DEFINITION, GOTO, READ, WRITE, SymbolIndex
+
+METHOD_NOT_FOUND = -32601
+INTERNAL_ERROR = -32603
+
+# LSP method -> LanguageServer method. Requests have an id and get a response; notifications do not.
+METHODS = {
+    'initialize': 'initialize',
+    'shutdown': 'shutdown',
+    'textDocument/didOpen': 'did_open',
+    'textDocument/didChange': 'did_change',
+    'textDocument/didClose': 'did_close',
+    'textDocument/definition': 'definition',
+    'textDocument/references': 'references',
+}
+
+
+def uri_path(uri):
+    parsed = urlparse(uri)
+    return unquote(parsed.path) if parsed.scheme == 'file' else uri
+
+
+def to_utf16(text, column):
+    if text.isascii():
+        return column
+    return len(text[:column].encode('utf-16-le')) // 2
+
+
+def from_utf16(text, units):
+    if text.isascii():
+        return units
+    column = 0
+    for char in text:
+        units -= 2 if ord(char) > 0xFFFF else 1
+        if units < 0:
+            break
+        column += 1
+    return column
+
+
+class LanguageServer():
+    def __init__(self, rfile, wfile):
+        self.rfile = rfile
+        self.wfile = wfile
+        # Document URI -> SymbolIndex.
+        self.indexes = {}
+        self.utf16 = True
+        self.shut_down = False
+
+    def read_message(self):
+        """Returns the next JSON-RPC message, or None at the end of input."""
+        length = None
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return None
+            line = line.strip()
+            if not line:
+                break
+            name, _, value = line.partition(b':')
+            if name.strip().lower() == b'content-length':
+                length = int(value)
+        if length is None:
+            return self.read_message()
+        return json.loads(self.rfile.read(length))
+
+    def send(self, message):
+        body = json.dumps(message).encode('utf-8')
+        self.wfile.write(b'Content-Length: %d\r\n\r\n' % len(body) + body)
+        self.wfile.flush()
+
+    def serve(self):
+        """Handles messages until exit, returning the exit status the protocol asks for."""
+        while True:
+            message = self.read_message()
+            if message is None or message.get('method') == 'exit':
+                return 0 if self.shut_down else 1
+            method = METHODS.get(message.get('method'))
+            handler = getattr(self, method) if method else None
+            params = message.get('params') or {}
+            if 'id' not in message:
+                if handler is not None:
+                    handler(params)
+                continue
+            if handler is None:
+                response = {'error': {'code': METHOD_NOT_FOUND,
+                                      'message': f"Unsupported method {message.get('method')}."}}
+            else:
+                try:
+                    response = {'result': handler(params)}
+                except Exception as e:
+                    response = {'error': {'code': INTERNAL_ERROR, 'message': f'{type(e).__name__}: {e}'}}
+            self.send({'jsonrpc': '2.0', 'id': message['id'], **response})
+
+    def initialize(self, params):
+        encodings = params.get('capabilities', {}).get('general', {}).get('positionEncodings', [])
+        self.utf16 = 'utf-32' not in encodings
+        return {
+            'capabilities': {
+                'positionEncoding': 'utf-16' if self.utf16 else 'utf-32',
+                'textDocumentSync': 1,
+                'definitionProvider': True,
+                'referencesProvider': True,
+            },
+            'serverInfo': {'name': 'chatlang'},
+        }
+
+    def shutdown(self, params):
+        self.shut_down = True
+        return None
+
+    def did_open(self, params):
+        document = params['textDocument']
+        index = self.indexes[document['uri']] = SymbolIndex(uri_path(document['uri']))
+        index.update(document['text'])
+
+    def did_change(self, params):
+        index = self.indexes.get(params['textDocument']['uri'])
+        if index is not None and params['contentChanges']:
+            # With full sync, the last change holds the whole document.
+            index.update(params['contentChanges'][-1]['text'])
+
+    def did_close(self, params):
+        self.indexes.pop(params['textDocument']['uri'], None)
+
+    def definition(self, params):
+        uri, index, key = self.symbol_at(params)
+        if key is None:
+            return None
+        found = index.occurrences(key, (DEFINITION,)) or index.occurrences(key, (WRITE,))
+        return [self.location(uri, index, occurrence) for occurrence in found]
+
+    def references(self, params):
+        uri, index, key = self.symbol_at(params)
+        if key is None:
+            return None
+        kinds = None if params.get('context', {}).get('includeDeclaration', True) else (WRITE, READ, GOTO)
+        return [self.location(uri, index, occurrence) for occurrence in index.occurrences(key, kinds)]
+
+    def symbol_at(self, params):
+        uri = params['textDocument']['uri']
+        index = self.indexes.get(uri)
+        if index is None:
+            return uri, None, None
+        line = params['position']['line'] + 1
+        column = params['position']['character']
+        if self.utf16:
+            column = from_utf16(index.line_text(line), column)
+        return uri, index, index.symbol_at(line, column)
+
+    def location(self, uri, index, occurrence):
+        kind, line, start, end = occurrence
+        if self.utf16:
+            text = index.line_text(line)
+            start, end = to_utf16(text, start), to_utf16(text, end)
+        return {'uri': uri, 'range': {'start': {'line': line - 1, 'character': start},
+                                      'end': {'line': line - 1, 'character': end}}}
+
+
+def serve_stdio():
+    rfile, wfile = sys.stdin.buffer, sys.stdout.buffer
+    # stdout carries the protocol, so anything else printed goes to stderr.
+    sys.stdout = sys.stderr
+    return LanguageServer(rfile, wfile).serve()
@@ -0,0 +1,226 @@
+"""
+Modules for `Include "file.clog".`, which declares another file's functions in the including user's scope.
+
+A module exports the functions declared at the top level of its messages, followed by the exports of the modules it
+includes. Includes resolve relative to the including file and must stay inside the directory of the script being run
+or a directory of $CHATLANG_PATH. Compiled modules are kept until their file changes, and pickled to a private cache
+directory ($CHATLANG_CACHE, or chatlang in $XDG_CACHE_HOME or ~/.cache).
+"""
+import hashlib
+import os
+import pickle
+import sys
+import threading
+
+from chat_interpreter.ast import AST, Anchor, FuncDecl, IncludeStmt, ScopeName, ScopeSelf, Var
+from chat_interpreter.keywords import CONTEXTUAL_KEYWORDS, KEYWORDS
+
+MAGIC = b'CHATMODL'
+VERSION = 3
+
+NAMED_NODES = (Anchor, ScopeName, ScopeSelf, Var)
+TOKEN_TABLE = repr(sorted(KEYWORDS.items()) + sorted(CONTEXTUAL_KEYWORDS.items())).encode('utf-8')
+
+
+class IncludeError(Exception):
+    pass
+
+
+class Module():
+    def __init__(self, path, funcs, includes, digest):
+        self.path = path
+        self.funcs = funcs  # FuncDecls declared in this module
+        self.includes = includes  # paths of the modules it includes, resolved
+        self.digest = digest  # SHA-256 of the keyword table and the source
+        self.exports = funcs
+        self.digests = [digest]
+
+    def __repr__(self):
+        return f'module {self.path} exporting {[func.name.value for func in self.exports]}'
+
+
+def display(path):
+    relative = os.path.relpath(path)
+    return path if relative.startswith('..') else relative
+
+
+def default_cache_dir():
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.environ.get('CHATLANG_CACHE') or os.path.join(cache_home, 'chatlang')
+
+
+def default_library():
+    return [path for path in os.environ.get('CHATLANG_PATH', '').split(os.pathsep) if path]
+
+
+def inside(path, directory):
+    try:
+        return os.path.commonpath([path, directory]) == directory
+    except ValueError:
+        # On different drives.
+        return False
+
+
+def private_dir(path):
+    """Creates the directory at path if needed, and returns whether it exists and only the current user can write it."""
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        st = os.stat(path)
+    except OSError:
+        return False
+    if not hasattr(os, 'getuid'):
+        return os.path.isdir(path)
+    return os.path.isdir(path) and st.st_uid == os.getuid() and not st.st_mode & 0o022
+
+
+def intern_names(nodes):
+    # Unpickled names are new strings; intern them again so lookups keep hitting the symbols from the parser.
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        if type(node) in NAMED_NODES:
+            node.value = sys.intern(node.value)
+        for value in node.__dict__.values():
+            if type(value) is list:
+                stack.extend(child for child in value if isinstance(child, AST))
+            elif isinstance(value, AST):
+                stack.append(value)
+
+
+class ModuleCache():
+    """
+    Compiled modules by absolute path. With use_disk set, compiled modules are also read from and written to
+    cache_dir; if it cannot be created, or other users can write to it, the disk cache is skipped silently. library
+    lists the directories that modules outside the script's own directory may be included from.
+    """
+    def __init__(self, use_disk=True, cache_dir=None, library=None):
+        self.use_disk = use_disk
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.cache_dir_ok = None
+        self.library = [os.path.realpath(path) for path in (default_library() if library is None else library)]
+        # Absolute path -> (mtime_ns, size, Module).
+        self.modules = {}
+        # Paths of the modules being compiled, outermost first, for cycle detection.
+        self.loading = []
+        self.compiled = 0
+        # Reentrant, as compiling a module loads the modules it includes.
+        self.lock = threading.RLock()
+
+    def resolve(self, path, including=None):
+        base = os.path.dirname(including) if including and os.path.isfile(including) else os.getcwd()
+        return os.path.abspath(os.path.join(base, path))
+
+    def load(self, path, including=None):
+        """Returns the Module at path, relative to the including file. Raises IncludeError."""
+        with self.lock:
+            return self.load_locked(path, including)
+
+    def load_locked(self, path, including):
+        full = self.resolve(path, including)
+        chain = self.loading
+        if not chain and including and os.path.isfile(including):
+            chain = [os.path.abspath(including)]
+        # Nested includes are held to the directory of the script being run as well, not of the module including them.
+        root = os.path.realpath(os.path.dirname(chain[0]) if chain else os.getcwd())
+        real = os.path.realpath(full)
+        if not any(inside(real, directory) for directory in [root] + self.library):
+            raise IncludeError(f"Cannot include {path}: it is outside {display(root)} and the library path.")
+        if full in chain:
+            cycle = chain[chain.index(full):] + [full]
+            raise IncludeError(f"Include cycle: {' -> '.join(display(p) for p in cycle)}")
+
+        try:
+            stat = os.stat(full)
+        except OSError as e:
+            raise IncludeError(f"Cannot include {path}: {e.strerror}.")
+        previous, self.loading = self.loading, chain + [full]
+        try:
+            cached = self.modules.get(full)
+            if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+                module = cached[2]
+            else:
+                try:
+                    module = self.compile(full)
+                except IncludeError as e:
+                    raise IncludeError(f"Cannot include {path}: {e}")
+                self.modules[full] = (stat.st_mtime_ns, stat.st_size, module)
+            # Modules it includes may have changed since it was compiled, so its exports are gathered on every load.
+            included = [self.load(include, full) for include in module.includes]
+            module.exports = module.funcs + [func for include in included for func in include.exports]
+            module.digests = [module.digest] + [digest for include in included for digest in include.digests]
+        finally:
+            self.loading = previous
+        return module
+
+    def compile(self, full):
+        with open(full, 'r') as f:
+            source = f.read()
+        # Compiled trees hold token codes, which change whenever keywords are added, so those are hashed in too.
+        digest = hashlib.sha256(TOKEN_TABLE + source.encode('utf-8')).digest()
+        cache_path = os.path.join(self.cache_dir, digest.hex() + '.clogc')
+        # Unpickling runs whatever the file says, so entries are only read from a directory no other user can write to.
+        if self.use_disk and self.cache_dir_ok is None:
+            self.cache_dir_ok = private_dir(self.cache_dir)
+
+        if self.use_disk and self.cache_dir_ok:
+            try:
+                with open(cache_path, 'rb') as f:
+                    data = f.read()
+            except OSError:
+                data = b''
+            header = MAGIC + bytes([VERSION]) + digest
+            if data.startswith(header):
+                try:
+                    funcs, includes = pickle.loads(data[len(header):])
+                except Exception:
+                    pass
+                else:
+                    intern_names(funcs)
+                    return Module(full, funcs, [self.resolve(p, full) for p in includes], digest)
+
+        # Imported here, since the parser itself loads modules through this one.
+        from chat_interpreter.lexer import Lexer
+        from chat_interpreter.token_parser import Parser
+
+        self.compiled += 1
+        scanner = Lexer(source, full)
+        scanner.scan_tokens()
+        if scanner.has_error:
+            raise IncludeError("it could not be lexed.")
+        parser = Parser(scanner, modules=self)
+        try:
+            tree = parser.parse()
+        except IncludeError:
+            raise
+        except Exception:
+            tree = None
+        if tree is None:
+            raise IncludeError("it could not be parsed.")
+
+        funcs = []
+        includes = []
+        for msg in tree.msgs:
+            for stmt in msg.stmts.stmts:
+                node = stmt.stmt
+                if isinstance(node, FuncDecl):
+                    funcs.append(node)
+                elif isinstance(node, IncludeStmt):
+                    includes.append(self.resolve(node.path.value, full))
+        if self.use_disk and self.cache_dir_ok:
+            self.save(cache_path, MAGIC + bytes([VERSION]) + digest,
+                      (funcs, [os.path.relpath(p, os.path.dirname(full)) for p in includes]))
+        return Module(full, funcs, includes, digest)
+
+    def save(self, cache_path, header, state):
+        try:
+            tmp = f'{cache_path}.{os.getpid()}.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(header)
+                pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, cache_path)
+        except (OSError, pickle.PicklingError, RecursionError):
+            pass
+
+
+# Shared by every parser that is not given its own cache, so modules are compiled once per process.
+default_modules = ModuleCache()
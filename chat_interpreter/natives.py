@@ -0,0 +1,32 @@
+"""
+Python functions callable from Chatlang.
+
+Host code registers them with Interpreter.register_function(name, fn, scope=None), either as a variable in one user's
+scope or for every user. A function for every user is found where a name is called (`call sum`, `call @Ann's sum`) and
+the user it is looked up in has no variable of that name; read as a value, the name is an ordinary variable, 0 until it
+is set. Calling one runs fn directly instead of interpreting a body:
+
+    interpreter.register_function('square root', math.sqrt)
+    [10:00] Ann: Say call square root with 2.
+
+Arguments are passed positionally as the interpreter holds them (ints, floats, bools, strs and functions), except that
+strings still being built by appends are joined into a str first. The return value becomes the call's value as is, so
+None acts like a function that returned nothing.
+"""
+from chat_interpreter.strings import StrBuilder
+from chat_interpreter.symbols import symbol
+
+
+class NativeFunction():
+    # No parameters to bind in the caller's scope; fn takes the arguments directly.
+    params = ()
+
+    def __init__(self, name, fn):
+        self.name = symbol(name)
+        self.fn = fn
+
+    def call(self, arg_values):
+        return self.fn(*[str(value) if type(value) is StrBuilder else value for value in arg_values])
+
+    def __repr__(self):
+        return f'<native function {self.name}>'
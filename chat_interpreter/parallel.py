@@ -0,0 +1,234 @@
+"""
+Parallel execution of the independent parts of one program.
+
+Messages joined by gotos form units, and units touching the same scopes form components, each run in its own worker
+process. Output is printed in unit order, so it matches sequential execution. Execution limits are not supported.
+"""
+import gc
+import io
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from chat_interpreter.ast import AST, AnchorDecl, FuncCall, FuncDecl, GotoStmt, ScopeCall, ScopePrev, Timestamp
+from chat_interpreter.diagnostics import Diagnostics
+from chat_interpreter.interpreter import Interpreter
+from chat_interpreter.lexer import Lexer
+from chat_interpreter.token_parser import Parser
+
+# The program being run, inherited by forked workers or parsed again by the pool initializer.
+worker_program = None
+
+
+def timestamp_key(node):
+    # The anchor name the interpreter registers for a timestamp, as in Interpreter.visit_Timestamp.
+    return f'{node.hh.value}:{node.mm.value}'
+
+
+class Effects():
+    """What a message or function body may touch: other users' scopes, the previous user, gotos and calls."""
+    def __init__(self):
+        self.scopes = set()
+        self.uses_prev = False
+        self.gotos = set()
+        self.calls = False
+        self.anchors = set()
+        self.funcs = []
+
+    def collect(self, node):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if not isinstance(node, AST):
+                continue
+            if isinstance(node, FuncDecl):
+                # Bodies run wherever the function is called, so they are analysed separately.
+                self.funcs.append(node)
+                continue
+            if isinstance(node, ScopeCall):
+                self.scopes.add(node.scope.value)
+            elif isinstance(node, ScopePrev):
+                self.uses_prev = True
+            elif isinstance(node, GotoStmt):
+                anchor = node.anchor
+                self.gotos.add(timestamp_key(anchor) if isinstance(anchor, Timestamp) else anchor.value)
+            elif isinstance(node, FuncCall):
+                self.calls = True
+            elif isinstance(node, AnchorDecl):
+                self.anchors.add(node.value.value)
+            for value in node.__dict__.values():
+                if type(value) is list:
+                    stack.extend(value)
+                else:
+                    stack.append(value)
+        return self
+
+    def update(self, other):
+        self.scopes |= other.scopes
+        self.uses_prev |= other.uses_prev
+        self.gotos |= other.gotos
+
+
+class UnionFind():
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        parent = self.parent.setdefault(item, item)
+        if parent != item:
+            parent = self.parent[item] = self.find(parent)
+        return parent
+
+    def union(self, a, b):
+        self.parent[self.find(a)] = self.find(b)
+
+
+def plan(program):
+    """
+    Splits program into independent components. Returns (units, components): units maps every message index to the
+    index of the first message of its unit, and components is a list of sets of message indices.
+    """
+    msgs = program.msgs
+    effects = [Effects().collect(msg.stmts) for msg in msgs]
+
+    # A call may reach any function value, since functions can be copied between variables and users, so every call
+    # is assumed to have the effects of every function body.
+    funcs = Effects()
+    pending = [func for e in effects for func in e.funcs]
+    while pending:
+        body = Effects().collect(pending.pop().block_node)
+        funcs.update(body)
+        funcs.anchors |= body.anchors
+        pending.extend(body.funcs)
+    for e in effects:
+        if e.calls:
+            e.update(funcs)
+
+    # Gotos may land on any message declaring the anchor, or on the first message with the timestamp.
+    targets = {}
+    for index, (msg, e) in enumerate(zip(msgs, effects)):
+        targets.setdefault(timestamp_key(msg.timestamp), {index})
+        for name in e.anchors | (funcs.anchors if e.calls else set()):
+            targets.setdefault(name, set()).add(index)
+
+    ranges = []
+    for index, e in enumerate(effects):
+        for name in e.gotos:
+            indices = targets.get(name, set()) | {index}
+            ranges.append((min(indices), max(indices)))
+    ranges.sort()
+    units = list(range(len(msgs)))
+    end = -1
+    for start, stop in ranges:
+        start = units[start] if start <= end else start
+        end = max(end, stop)
+        for index in range(start, end + 1):
+            units[index] = start
+
+    # Messages only share state through the scopes they touch, including the previous user's for you/your.
+    scopes = UnionFind()
+    for index, (msg, e) in enumerate(zip(msgs, effects)):
+        user = msg.scope.value
+        for name in e.scopes:
+            scopes.union(user, name)
+        if e.uses_prev and index > 0:
+            scopes.union(user, msgs[index - 1].scope.value)
+        if units[index] != index:
+            scopes.union(user, msgs[units[index]].scope.value)
+
+    components = {}
+    for index, msg in enumerate(msgs):
+        components.setdefault(scopes.find(msg.scope.value), set()).add(index)
+    return units, list(components.values())
+
+
+class SegmentInterpreter(Interpreter):
+    """Runs only the messages of one component, collecting output per unit."""
+    def __init__(self, parser, members, units):
+        super().__init__(parser)
+        self.members = members
+        self.units = units
+
+    def visit_Program(self, node):
+        chunks = []
+        unit = None
+        out = self.out = io.StringIO()
+        error = None
+        try:
+            while self.curr_msg < len(node.msgs):
+                if self.curr_msg not in self.members:
+                    self.curr_msg += 1
+                    continue
+                if self.units[self.curr_msg] != unit:
+                    if unit is not None:
+                        chunks.append((unit, out.getvalue()))
+                        out.seek(0)
+                        out.truncate()
+                    unit = self.units[self.curr_msg]
+                self.step(node)
+        except Exception as e:
+            error = e
+        if unit is not None:
+            chunks.append((unit, out.getvalue()))
+        return chunks, (unit, error) if error is not None else None
+
+
+def init_worker(source, filename):
+    global worker_program
+    if worker_program is None:
+        worker_program = parse(source, filename)
+
+
+def run_component(members, units):
+    return SegmentInterpreter(None, members, units).visit(worker_program)
+
+
+def parse(source, filename, diagnostics=None):
+    scanner = Lexer(source, filename, diagnostics=diagnostics)
+    scanner.scan_tokens()
+    if scanner.has_error:
+        return None
+    return Parser(scanner).parse()
+
+
+def execute_parallel(source, filename, jobs=None, out=None):
+    """
+    Runs source like runner.execute, with independent components in up to jobs worker processes, printing its output to
+    out (stdout when None). Returns an exit status.
+    """
+    global worker_program
+    out = out or sys.stdout
+    program = parse(source, filename, Diagnostics(out=out))
+    if program is None:
+        return 65
+
+    # The tree lives until the end of the run, so the collector is kept from walking it over and over; in forked
+    # workers that would also touch, and so copy, every page of it.
+    gc.freeze()
+    try:
+        units, components = plan(program)
+        if len(components) == 1:
+            results = [SegmentInterpreter(None, components[0], units).visit(program)]
+        else:
+            # Forked workers inherit the parsed program; other start methods parse it again in the initializer.
+            worker_program = program
+            context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else None)
+            with ProcessPoolExecutor(max_workers=jobs, mp_context=context, initializer=init_worker,
+                                     initargs=(source, filename)) as executor:
+                results = list(executor.map(run_component, components, [units] * len(components)))
+    finally:
+        worker_program = None
+        gc.unfreeze()
+
+    chunks = sorted((chunk for result, _ in results for chunk in result), key=lambda chunk: chunk[0])
+    errors = [error for _, error in results if error]
+    # Sequential execution would have stopped at the first unit that raised, so nothing after it is printed.
+    first_error = min(errors, key=lambda error: error[0]) if errors else None
+    for unit, output in chunks:
+        if first_error and unit > first_error[0]:
+            break
+        out.write(output)
+    if first_error:
+        out.flush()
+        raise first_error[1]
+    return 0
@@ -0,0 +1,251 @@
+import time
+
+from chat_interpreter.interpreter import Interpreter
+from chat_interpreter.natives import NativeFunction
+
+
+class Stat():
+    def __init__(self, label):
+        self.label = label
+        self.count = 0
+        self.seconds = 0.0
+
+
+class ProfilingInterpreter(Interpreter):
+    """
+    An Interpreter that records execution counts and cumulative wall time per message, per function and per user
+    scope. Only profiled runs use this class, so the plain Interpreter carries none of the bookkeeping.
+    """
+    def __init__(self, parser, source='', **kwargs):
+        super().__init__(parser, **kwargs)
+        self.source_lines = source.splitlines()
+        self.msg_stats = {}
+        self.func_stats = {}
+        self.scope_stats = {}
+        self.active_funcs = {}
+
+    def source_line(self, line):
+        text = self.source_lines[line - 1].strip() if 0 < line <= len(self.source_lines) else ''
+        return text if len(text) <= 80 else text[:77] + '...'
+
+    def step(self, program):
+        index = self.curr_msg
+        msg = program.msgs[index]
+        start = time.perf_counter()
+        try:
+            super().step(program)
+        finally:
+            elapsed = time.perf_counter() - start
+
+            stat = self.msg_stats.get(index)
+            if stat is None:
+                line = msg.timestamp.hh.token.line
+                stat = self.msg_stats[index] = Stat(f"line {line}: {self.source_line(line)}")
+            stat.count += 1
+            stat.seconds += elapsed
+
+            stat = self.scope_stats.get(self.curr_scope)
+            if stat is None:
+                stat = self.scope_stats[self.curr_scope] = Stat(f"{self.curr_scope}")
+            stat.count += 1
+            stat.seconds += elapsed
+
+    def call(self, func_decl, arg_values):
+        stat = self.func_stats.get(func_decl)
+        if stat is None:
+            if type(func_decl) is NativeFunction:
+                stat = self.func_stats[func_decl] = Stat(f"{func_decl.name} (native)")
+            else:
+                token = func_decl.name.token
+                stat = self.func_stats[func_decl] = Stat(f"{func_decl.name.value} (line {token.line}: "
+                                                         f"{self.source_line(token.line)})")
+        stat.count += 1
+
+        # Recursive calls are already inside the outermost call's time.
+        depth = self.active_funcs.get(func_decl, 0)
+        self.active_funcs[func_decl] = depth + 1
+        start = time.perf_counter()
+        try:
+            return super().call(func_decl, arg_values)
+        finally:
+            self.active_funcs[func_decl] = depth
+            if depth == 0:
+                stat.seconds += time.perf_counter() - start
+
+    def report(self, phases, limit=20):
+        """Returns the profile as text. phases maps phase names to wall times in seconds."""
+        lines = ["Phases:"]
+        for name, seconds in phases.items():
+            lines.append(f"  {name:<10} {seconds * 1000:10.2f} ms")
+        for title, stats in [("Messages", self.msg_stats), ("Functions", self.func_stats),
+                             ("Users", self.scope_stats)]:
+            lines.append("")
+            lines.append(f"{title} (by cumulative time):")
+            lines.append(f"  {'count':>8} {'total ms':>10}  location")
+            ranked = sorted(stats.values(), key=lambda s: s.seconds, reverse=True)
+            for stat in ranked[:limit]:
+                lines.append(f"  {stat.count:>8} {stat.seconds * 1000:>10.2f}  {stat.label}")
+            if len(ranked) > limit:
+                lines.append(f"  ... and {len(ranked) - limit} more")
+        return '\n'.join(lines)
+
+
+STMT_NAMES = {
+    'AnchorDecl': 'anchor',
+    'AppendStmt': 'append',
+    'FuncCallStmt': 'call',
+    'FuncDecl': 'make',
+    'GotoStmt': 'go to',
+    'IfElse': 'if',
+    'NoOp': 'nothing',
+    'PrintStmt': 'say',
+    'ReturnStmt': 'return',
+    'SetElement': 'assign',
+    'VarDecl': 'assign',
+}
+
+
+def node_line(node):
+    # The line of the first token found in node, searching its children depth first.
+    token = getattr(node, 'token', None)
+    if token is not None and hasattr(token, 'line'):
+        return token.line
+    for value in vars(node).values():
+        for child in (value if isinstance(value, list) else [value]):
+            if hasattr(child, '__dict__') and not isinstance(child, type):
+                line = node_line(child)
+                if line is not None:
+                    return line
+    return None
+
+
+class StackProfiler():
+    """
+    A deterministic profiler that records Chatlang-level stacks (message, then function calls, then statements) through
+    the interpreter's hooks, and exports them as collapsed stacks for flamegraphs or in callgrind format.
+
+    Every frame is keyed by (name, line); time is charged to the full stack that was active when it was spent.
+    """
+    EVENTS = ['message_enter', 'message_exit', 'statement', 'statement_exit', 'call', 'return']
+
+    def __init__(self, interpreter, filename):
+        self.interpreter = interpreter
+        self.filename = filename or '<stdin>'
+        self.stack = []
+        self.kinds = []
+        self.weights = {}
+        self.calls = {}
+        self.lines = {}
+        self.last = None
+
+    def start(self):
+        for event in self.EVENTS:
+            self.interpreter.add_hook(event, getattr(self, 'on_' + event))
+        self.last = time.perf_counter()
+
+    def stop(self):
+        self.charge()
+        for event in self.EVENTS:
+            self.interpreter.remove_hook(event, getattr(self, 'on_' + event))
+        self.stack = []
+        self.kinds = []
+
+    def charge(self):
+        now = time.perf_counter()
+        if self.stack:
+            key = tuple(self.stack)
+            self.weights[key] = self.weights.get(key, 0.0) + now - self.last
+        self.last = now
+
+    def line_of(self, node):
+        line = self.lines.get(id(node))
+        if line is None:
+            line = self.lines[id(node)] = node_line(node) or 0
+        return line
+
+    def push(self, kind, frame):
+        self.charge()
+        caller = self.stack[-1] if self.stack else None
+        self.calls[(caller, frame)] = self.calls.get((caller, frame), 0) + 1
+        self.stack.append(frame)
+        self.kinds.append(kind)
+
+    def pop_to(self, kind):
+        # Pops frames up to and including the innermost frame of the given kind.
+        self.charge()
+        while self.kinds:
+            self.stack.pop()
+            if self.kinds.pop() == kind:
+                break
+
+    def on_message_enter(self, interpreter, index, msg):
+        label = f"[{interpreter.format_timestamp(msg.timestamp)}] {msg.scope.value}"
+        self.push('message', (label, self.line_of(msg)))
+
+    def on_message_exit(self, interpreter, index, msg):
+        self.pop_to('message')
+
+    def on_statement(self, interpreter, stmt):
+        name = STMT_NAMES.get(type(stmt.stmt).__name__, type(stmt.stmt).__name__)
+        # Empty statements carry no token, so they take the line of whatever contains them.
+        line = self.line_of(stmt) or (self.stack[-1][1] if self.stack else 0)
+        self.push('statement', (name, line))
+
+    def on_statement_exit(self, interpreter, stmt):
+        self.pop_to('statement')
+
+    def on_call(self, interpreter, func_decl, arg_values):
+        if type(func_decl) is NativeFunction:
+            self.push('function', (f"{func_decl.name} (native)", 0))
+        else:
+            self.push('function', (f"{func_decl.name.value}", self.line_of(func_decl)))
+
+    def on_return(self, interpreter, func_decl, value):
+        self.pop_to('function')
+
+    def label(self, frame):
+        name, line = frame
+        return f"{name} ({self.filename}:{line})".replace(';', ',')
+
+    def write_collapsed(self, f):
+        """Writes one 'frame;frame;frame weight' line per stack, with weights in microseconds."""
+        for stack, seconds in sorted(self.weights.items()):
+            micros = round(seconds * 1e6)
+            if micros:
+                f.write(';'.join(self.label(frame) for frame in stack) + f" {micros}\n")
+
+    def write_callgrind(self, f):
+        """Writes the profile in callgrind format, with costs in microseconds."""
+        self_cost = {}
+        inclusive = {}
+        for stack, seconds in self.weights.items():
+            micros = seconds * 1e6
+            self_cost[stack[-1]] = self_cost.get(stack[-1], 0.0) + micros
+            # Charge each caller/callee edge once per stack, so recursion is not counted twice.
+            for edge in set(zip(stack, stack[1:])):
+                inclusive[edge] = inclusive.get(edge, 0.0) + micros
+
+        frames = sorted(set(self_cost) | {frame for edge in inclusive for frame in edge})
+        ids = {frame: i + 1 for i, frame in enumerate(frames)}
+        named = set()
+
+        def fn(frame):
+            # Callgrind name compression: spell the name out on first use only.
+            if frame in named:
+                return f"({ids[frame]})"
+            named.add(frame)
+            return f"({ids[frame]}) {frame[0]} (line {frame[1]})"
+
+        f.write("# callgrind format\nversion: 1\ncreator: chatlang\npositions: line\nevents: Microseconds\n\n")
+        f.write(f"fl=(1) {self.filename}\n")
+        for frame in frames:
+            name, line = frame
+            f.write(f"fn={fn(frame)}\n")
+            f.write(f"{line} {round(self_cost.get(frame, 0.0))}\n")
+            for (caller, callee), micros in sorted(inclusive.items()):
+                if caller != frame:
+                    continue
+                f.write(f"cfn={fn(callee)}\n")
+                f.write(f"calls={self.calls.get((caller, callee), 0)} {callee[1]}\n")
+                f.write(f"{line} {round(micros)}\n")
+            f.write("\n")
@@ -0,0 +1,196 @@
+import sys
+import time
+
+from chat_interpreter.checkpoint import CheckpointError, Checkpointer, restore
+from chat_interpreter.diagnostics import Diagnostics
+from chat_interpreter.interpreter import ExecutionLimitError, Interpreter
+from chat_interpreter.lexer import Lexer
+from chat_interpreter.parallel import execute_parallel
+from chat_interpreter.profiler import ProfilingInterpreter, StackProfiler
+from chat_interpreter.token_parser import Parser
+from chat_interpreter.trace import TracingInterpreter
+
+
+# Ways of running a script that replace the plain run, by the options that choose them. Only one can be used at once.
+MODES = [('trace',), ('checkpoint', 'resume'), ('profile',), ('flamegraph', 'callgrind'), ('parallel',), ('lazy',)]
+
+
+def chosen_modes(options):
+    """Returns the first option set of every mode that options (a dict of execute() keyword arguments) chooses."""
+    chosen = [[name for name in mode if options.get(name)] for mode in MODES]
+    return [names[0] for names in chosen if names]
+
+
+def parse_source(source, filename, out=None, lazy=False, phases=None):
+    """
+    Lexes and parses source, reporting errors to out. Returns (parser, tree), or None if either step failed. phases,
+    if given, gets the time each step took under 'lex' and 'parse'.
+    """
+    start = time.perf_counter()
+    scanner = Lexer(source, filename, diagnostics=Diagnostics(out=out))
+    scanner.scan_tokens()
+    if phases is not None:
+        phases['lex'] = time.perf_counter() - start
+    if scanner.has_error:
+        return None
+
+    parser = Parser(scanner, lazy=lazy)
+    start = time.perf_counter()
+    tree = parser.parse()
+    if phases is not None:
+        phases['parse'] = time.perf_counter() - start
+    if tree is None:
+        return None
+    return parser, tree
+
+
+def execute(source, filename, *, max_steps=None, timeout=None, out=None, profile=False, flamegraph=None,
+            callgrind=None, checkpoint=None, checkpoint_interval=60.0, resume=None, parallel=False, jobs=None,
+            trace=None, lazy=False):
+    """
+    Lexes, parses and interprets source, printing its output. Returns an exit status: 0 on success, 65 if the source
+    could not be lexed or a checkpoint does not match it, 66 if a checkpoint cannot be read and 70 if an execution limit
+    was hit.
+
+    The program's output and the errors reported about it are printed to out, or stdout when None; nothing else is
+    printed there, so runs in several threads can each have their own.
+
+    With profile set, per-phase timings and a hotspot report are printed to stderr once the program stops. flamegraph
+    and callgrind name files to write a stack profile to, as collapsed stacks and in callgrind format respectively.
+
+    checkpoint names a file to snapshot the interpreter to every checkpoint_interval seconds and on SIGUSR1, and resume
+    names a checkpoint to continue from.
+
+    With parallel set, messages of users that never touch each other's state run in up to jobs worker processes. The
+    execution limits count statements across the whole program, so setting either runs it sequentially instead.
+
+    trace names a file to record an execution trace to, for replay with chatlang.py --replay-trace.
+
+    With lazy set, function bodies are parsed on their first call rather than up front, so errors in them are only
+    reported then. The other modes walk every body before running, so they parse them all up front.
+
+    The modes in MODES exclude each other; choosing more than one raises ValueError.
+    """
+    modes = chosen_modes({'trace': trace, 'checkpoint': checkpoint, 'resume': resume, 'profile': profile,
+                          'flamegraph': flamegraph, 'callgrind': callgrind, 'parallel': parallel, 'lazy': lazy})
+    if len(modes) > 1:
+        raise ValueError(f"{modes[0]} and {modes[1]} cannot be combined.")
+    if trace:
+        return execute_traced(source, filename, max_steps, timeout, trace, out)
+    if checkpoint or resume:
+        return execute_checkpointed(source, filename, max_steps, timeout, checkpoint, checkpoint_interval, resume, out)
+    if profile:
+        return execute_profiled(source, filename, max_steps, timeout, out)
+    if flamegraph or callgrind:
+        return execute_stack_profiled(source, filename, max_steps, timeout, flamegraph, callgrind, out)
+    if parallel and max_steps is None and timeout is None:
+        return execute_parallel(source, filename, jobs, out)
+
+    parsed = parse_source(source, filename, out, lazy)
+    if parsed is None:
+        return 65
+    parser, tree = parsed
+
+    interpreter = Interpreter(parser, max_steps=max_steps, timeout=timeout, out=out)
+    try:
+        interpreter.interpret(tree)
+    except ExecutionLimitError as e:
+        print(f"[{filename}] Error: {e}", file=out)
+        return 70
+    return 0
+
+
+def execute_profiled(source, filename, max_steps=None, timeout=None, out=None):
+    phases = {}
+    parsed = parse_source(source, filename, out, phases=phases)
+    if parsed is None:
+        return 65
+    parser, tree = parsed
+
+    interpreter = ProfilingInterpreter(parser, source, max_steps=max_steps, timeout=timeout, out=out)
+    status = 0
+    start = time.perf_counter()
+    try:
+        interpreter.interpret(tree)
+    except ExecutionLimitError as e:
+        print(f"[{filename}] Error: {e}", file=out)
+        status = 70
+    finally:
+        phases['interpret'] = time.perf_counter() - start
+        print(interpreter.report(phases), file=sys.stderr)
+    return status
+
+
+def execute_stack_profiled(source, filename, max_steps=None, timeout=None, flamegraph=None, callgrind=None, out=None):
+    parsed = parse_source(source, filename, out)
+    if parsed is None:
+        return 65
+    parser, tree = parsed
+
+    interpreter = Interpreter(parser, max_steps=max_steps, timeout=timeout, out=out)
+    profiler = StackProfiler(interpreter, filename)
+    status = 0
+    profiler.start()
+    try:
+        interpreter.interpret(tree)
+    except ExecutionLimitError as e:
+        print(f"[{filename}] Error: {e}", file=out)
+        status = 70
+    finally:
+        profiler.stop()
+        if flamegraph:
+            with open(flamegraph, 'w') as f:
+                profiler.write_collapsed(f)
+        if callgrind:
+            with open(callgrind, 'w') as f:
+                profiler.write_callgrind(f)
+    return status
+
+
+def execute_checkpointed(source, filename, max_steps=None, timeout=None, checkpoint=None, checkpoint_interval=60.0,
+                         resume=None, out=None):
+    parsed = parse_source(source, filename, out)
+    if parsed is None:
+        return 65
+    parser, tree = parsed
+
+    interpreter = Interpreter(parser, max_steps=max_steps, timeout=timeout, out=out)
+    if resume:
+        try:
+            restore(interpreter, tree, source, resume)
+        except OSError as e:
+            print(f"[{filename}] Error: Cannot read checkpoint: {e}", file=out)
+            return 66
+        except CheckpointError as e:
+            print(f"[{filename}] Error: {e}", file=out)
+            return 65
+
+    checkpointer = Checkpointer(interpreter, tree, source, checkpoint, checkpoint_interval) if checkpoint else None
+    if checkpointer:
+        checkpointer.start()
+    try:
+        interpreter.interpret(tree)
+    except ExecutionLimitError as e:
+        print(f"[{filename}] Error: {e}", file=out)
+        return 70
+    finally:
+        if checkpointer:
+            checkpointer.stop()
+    return 0
+
+
+def execute_traced(source, filename, max_steps=None, timeout=None, trace=None, out=None):
+    parsed = parse_source(source, filename, out)
+    if parsed is None:
+        return 65
+    parser, tree = parsed
+
+    interpreter = TracingInterpreter(parser, tree, source, trace, max_steps=max_steps, timeout=timeout, out=out)
+    try:
+        interpreter.interpret(tree)
+    except ExecutionLimitError as e:
+        print(f"[{filename}] Error: {e}", file=out)
+        return 70
+    finally:
+        interpreter.trace.close()
+    return 0
@@ -0,0 +1,96 @@
+"""
+A warm worker server for running scripts without paying interpreter start-up for every run.
+
+The parent process imports chat_interpreter once and listens on a Unix socket; every request is handled in a forked
+child so scripts cannot affect each other or the parent. POSIX only.
+
+Protocol: the client sends one JSON line {"filename": ..., "source": ..., "cwd": ..., "max_steps": ..., "timeout": ...},
+where cwd is the client's working directory, which the child changes to so that relative filenames and includes resolve
+as they would for `python chatlang.py` run there. The server replies with frames of a one-byte kind, a four-byte
+big-endian length and a payload: b'o' frames carry UTF-8 output as it is produced, b'e' frames the traceback of an
+uncaught exception, and a final b'x' frame carries the exit status as a four-byte big-endian integer. Statuses are those
+of `python chatlang.py`, including 1 for an uncaught exception.
+"""
+import io
+import json
+import os
+import socketserver
+import struct
+import tempfile
+import traceback
+
+from chat_interpreter.runner import execute
+
+
+def default_socket_path():
+    return os.environ.get('CHATLANG_SOCKET') or os.path.join(tempfile.gettempdir(), f'chatlang-{os.getuid()}.sock')
+
+
+def frame(kind, payload):
+    return kind + struct.pack('>I', len(payload)) + payload
+
+
+class FrameWriter(io.TextIOBase):
+    """A text stream that sends everything written to it to the client as frames of kind, one line at a time."""
+    def __init__(self, wfile, kind=b'o'):
+        self.wfile = wfile
+        self.kind = kind
+        self.buffer = []
+
+    def writable(self):
+        return True
+
+    def write(self, s):
+        self.buffer.append(s)
+        if '\n' in s:
+            self.flush()
+        return len(s)
+
+    def flush(self):
+        if self.buffer:
+            self.wfile.write(frame(self.kind, ''.join(self.buffer).encode('utf-8')))
+            self.buffer = []
+
+
+class RunHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        request = json.loads(self.rfile.readline())
+        out = FrameWriter(self.wfile)
+        try:
+            if request.get('cwd'):
+                os.chdir(request['cwd'])
+            status = execute(request['source'], request.get('filename', ''),
+                             max_steps=request.get('max_steps'), timeout=request.get('timeout'), out=out)
+        except Exception:
+            # As Python reports an exception that ends `python chatlang.py`: on stderr, with exit status 1.
+            out.flush()
+            err = FrameWriter(self.wfile, b'e')
+            traceback.print_exc(file=err)
+            err.flush()
+            status = 1
+        out.flush()
+        self.wfile.write(frame(b'x', struct.pack('>i', status)))
+
+
+class ForkingServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    pass
+
+
+def serve(path=None):
+    path = path or default_socket_path()
+    if os.path.exists(path):
+        os.unlink(path)
+    # Only the current user may connect.
+    old_umask = os.umask(0o077)
+    try:
+        server = ForkingServer(path, RunHandler)
+    finally:
+        os.umask(old_umask)
+    print(f"Serving on {path}")
+    with server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(path)
@@ -0,0 +1,139 @@
+import collections
+
+from chat_interpreter.ast import Program
+from chat_interpreter.interpreter import ExecutionLimitError, Interpreter
+from chat_interpreter.lexer import Lexer
+from chat_interpreter.parallel import timestamp_key
+from chat_interpreter.symbols import SymbolTable
+from chat_interpreter.token_parser import Parser
+
+
+class EvictedMessageError(Exception):
+    pass
+
+
+class MessageHistory():
+    """
+    The messages of a program that runs indefinitely, keeping only the most recent limit of them in a ring buffer.
+    Indices keep counting from the first message ever added, so anchors stay valid; fetching a message that was dropped,
+    as a goto back past the history does, raises EvictedMessageError.
+    """
+    def __init__(self, limit):
+        self.limit = limit
+        self.ring = [None] * limit
+        self.count = 0
+        # Timestamp anchor name -> indices of the kept messages with that timestamp, in order.
+        self.timestamps = {}
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        if index < self.count - self.limit:
+            raise EvictedMessageError(f"Message {index} is no longer in the history, which keeps the last {self.limit} "
+                                      f"messages; a goto cannot jump back to it.")
+        return self.ring[index % self.limit]
+
+    def first(self, timestamp):
+        """Returns the index of the first kept message with timestamp (an anchor name like '10:0'), or None."""
+        indices = self.timestamps.get(timestamp)
+        return indices[0] if indices else None
+
+    def append(self, msg):
+        """Adds msg, returning (index, timestamp) of the message it pushes out of the history, or None."""
+        evicted = None
+        if self.count >= self.limit:
+            index = self.count - self.limit
+            timestamp = timestamp_key(self.ring[self.count % self.limit].timestamp)
+            indices = self.timestamps[timestamp]
+            indices.popleft()
+            if not indices:
+                del self.timestamps[timestamp]
+            evicted = (index, timestamp)
+        self.ring[self.count % self.limit] = msg
+        self.timestamps.setdefault(timestamp_key(msg.timestamp), collections.deque()).append(self.count)
+        self.count += 1
+        return evicted
+
+    def extend(self, msgs):
+        """Adds msgs, returning (index, timestamp) of every message they push out of the history."""
+        evicted = [self.append(msg) for msg in msgs]
+        return [pair for pair in evicted if pair is not None]
+
+
+class Session():
+    """
+    A program that grows one input at a time, as in the REPL. Each call to feed lexes and parses only the new source,
+    appends its messages to a live Program and runs them on the same interpreter, so users, functions and anchors carry
+    over and a goto may jump back to any earlier message of the session.
+    """
+    def __init__(self, filename='<stdin>', max_steps=None, timeout=None, history=None):
+        # history, if set, bounds how many earlier messages are kept for gotos (see MessageHistory).
+        self.filename = filename
+        self.symbols = SymbolTable()
+        self.program = Program(MessageHistory(history) if history else [])
+        self.interpreter = Interpreter(None, max_steps=max_steps, timeout=timeout)
+
+    def feed(self, source):
+        """
+        Runs the messages in source after everything fed before. Returns an exit status like runner.execute: 0 on
+        success, 65 if source could not be lexed or parsed and 70 if running it failed.
+        """
+        tree = self.parse(source)
+        if tree is None:
+            return 65
+        return self.run(tree)
+
+    def parse(self, source):
+        """Lexes and parses source as the messages following those fed before. Returns None after reporting errors."""
+        scanner = Lexer(source, self.filename, self.symbols)
+        scanner.scan_tokens()
+        if scanner.has_error:
+            return None
+
+        parser = Parser(scanner, first_msg=len(self.program.msgs))
+        try:
+            tree = parser.parse()
+        except Exception:
+            tree = None
+        if tree is None and not parser.has_error:
+            print(f"[{self.filename}] Error: Could not parse input.")
+        return tree
+
+    def repoint_anchors(self, evicted):
+        # A timestamp names the first message with it. Once that message is dropped, the first kept one that already
+        # ran takes over; if none did, the anchor is set again by the next one to run, as for a new timestamp.
+        anchors = self.interpreter.anchors
+        for index, timestamp in evicted:
+            if anchors.get(timestamp) == index:
+                first = self.program.msgs.first(timestamp)
+                if first is not None and first < self.interpreter.curr_msg:
+                    anchors[timestamp] = first
+                else:
+                    del anchors[timestamp]
+
+    def run(self, tree):
+        """Appends the messages of tree, as returned by parse, to the program and runs them."""
+        msgs = self.program.msgs
+        interpreter = self.interpreter
+        if type(msgs) is MessageHistory:
+            self.repoint_anchors(msgs.extend(tree.msgs))
+        else:
+            msgs.extend(tree.msgs)
+        # Execution limits apply to each input separately.
+        interpreter.steps = 0
+        try:
+            interpreter.interpret(self.program)
+        except (Exception, KeyboardInterrupt) as e:
+            # Resume after the failed input instead of running its remaining messages with the next one.
+            interpreter.curr_msg = len(self.program.msgs)
+            if isinstance(e, ExecutionLimitError):
+                print(f"[{self.filename}] Error: {e}")
+            elif isinstance(e, KeyboardInterrupt):
+                print(f"[{self.filename}] Interrupted.")
+            else:
+                print(f"[{self.filename}] Error: {type(e).__name__}: {e}")
+            return 70
+        return 0
@@ -0,0 +1,100 @@
+"""
+Streaming mode: runs a live chat transcript one message at a time, as the messages arrive.
+
+Lines are read from stdin or from connections to a Unix socket. A message runs as soon as the lines received for it
+parse; lines that do not complete a message yet are held until they do, and a message that still does not parse when
+the next header arrives is reported and dropped. All messages run in one Session, whose MessageHistory keeps only the
+most recent messages, so memory stays flat however long the stream runs. A goto back past the history is an error.
+"""
+import contextlib
+import io
+import os
+import socket
+import sys
+
+from chat_interpreter.session import Session
+from chat_interpreter.watch import HEADER_PATTERN
+
+DEFAULT_HISTORY = 10000
+
+
+def is_header(line):
+    match = HEADER_PATTERN.match(line)
+    return match is not None and match.group().lstrip(' \t')[:1] == '['
+
+
+class MessageStream():
+    """Splits incoming lines into messages and runs each on session once it is complete."""
+    def __init__(self, session):
+        self.session = session
+        self.lines = []
+        self.errors = ''
+
+    def feed_line(self, line):
+        if not self.lines and not line.strip():
+            return
+        if self.lines and is_header(line):
+            self.flush()
+        self.lines.append(line)
+        self.try_run()
+
+    def try_run(self):
+        # Parse errors are expected while a message is incomplete, so they are only kept until the message is given up.
+        captured = io.StringIO()
+        with contextlib.redirect_stdout(captured), contextlib.redirect_stderr(captured):
+            tree = self.session.parse(''.join(self.lines))
+        if tree is None:
+            self.errors = captured.getvalue()
+            return False
+
+        self.lines = []
+        self.errors = ''
+        self.session.run(tree)
+        sys.stdout.flush()
+        return True
+
+    def flush(self):
+        """Gives up on the message being received, reporting why it did not parse."""
+        if self.lines and not self.try_run():
+            print(''.join(line for line in self.errors.splitlines(True) if 'Error:' in line), end='', flush=True)
+            self.lines = []
+            self.errors = ''
+
+
+def stream_lines(lines, session):
+    messages = MessageStream(session)
+    for line in lines:
+        messages.feed_line(line)
+    messages.flush()
+
+
+def stream(path=None, history=DEFAULT_HISTORY, max_steps=None, timeout=None):
+    """
+    Runs messages from stdin, or with path set, from each connection to a Unix socket at path in turn, writing output
+    back to the connection. All input continues the same program.
+    """
+    session = Session('<stream>', max_steps, timeout, history)
+    try:
+        if not path:
+            stream_lines(sys.stdin, session)
+            return
+
+        if os.path.exists(path):
+            os.unlink(path)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+            server.bind(path)
+            server.listen()
+            print(f"Streaming from {path}", file=sys.stderr)
+            while True:
+                conn, _ = server.accept()
+                with conn, conn.makefile('r', encoding='utf-8') as rfile, \
+                        conn.makefile('w', encoding='utf-8') as wfile, contextlib.redirect_stdout(wfile):
+                    try:
+                        stream_lines(rfile, session)
+                    except (BrokenPipeError, ConnectionResetError):
+                        pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if path and os.path.exists(path):
+            os.unlink(path)
@@ -0,0 +1,115 @@
+"""
+String values that make repeated appends cheap.
+
+`Let my text be my text and my piece.` in a loop would copy the whole string on every iteration. Once a string is
+long enough for that to matter, ADD returns a StrBuilder instead, which appends in amortized O(1) and is only joined
+into a str when it is printed, compared or otherwise used as text.
+"""
+
+# Shorter strings are concatenated directly; copying them is cheaper than building.
+BUILDER_MIN_LENGTH = 256
+
+
+class StrBuilder():
+    """
+    An immutable string made of pieces. Appending to a builder adds the piece to a list shared with that builder and
+    returns a new builder covering one more piece, so a chain of appends never copies. A builder whose list was
+    already extended by someone else copies its own pieces first, so every builder keeps meaning the same text.
+    """
+    __slots__ = ('parts', 'count', 'length', 'text')
+
+    def __init__(self, parts, count, length):
+        self.parts = parts
+        self.count = count
+        self.length = length
+        self.text = None
+
+    @staticmethod
+    def concat(left, right):
+        if type(right) is StrBuilder:
+            right = str(right)
+        elif type(right) is not str:
+            raise TypeError(f'can only concatenate str (not "{type(right).__name__}") to str')
+        if type(left) is str:
+            return StrBuilder([left, right], 2, len(left) + len(right))
+
+        parts = left.parts
+        if len(parts) != left.count:
+            parts = parts[:left.count]
+        parts.append(right)
+        return StrBuilder(parts, left.count + 1, left.length + len(right))
+
+    def __str__(self):
+        if self.text is None:
+            parts = self.parts if len(self.parts) == self.count else self.parts[:self.count]
+            self.text = ''.join(parts)
+        return self.text
+
+    def __reduce__(self):
+        # Pickles (for checkpoints) as the plain text, which is smaller and faster to write than the pieces.
+        return (str, (str(self),))
+
+    def __repr__(self):
+        return repr(str(self))
+
+    def __len__(self):
+        return self.length
+
+    def __bool__(self):
+        return self.length > 0
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __add__(self, other):
+        return StrBuilder.concat(self, other)
+
+    def __radd__(self, other):
+        if type(other) is not str:
+            return NotImplemented
+        return StrBuilder.concat(other, self)
+
+    def __mul__(self, other):
+        return str(self) * other
+
+    __rmul__ = __mul__
+
+    def __mod__(self, other):
+        return str(self) % other
+
+    def __eq__(self, other):
+        if isinstance(other, (str, StrBuilder)):
+            return str(self) == str(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        if isinstance(other, (str, StrBuilder)):
+            return str(self) != str(other)
+        return NotImplemented
+
+    def __lt__(self, other):
+        if isinstance(other, (str, StrBuilder)):
+            return str(self) < str(other)
+        return NotImplemented
+
+    def __le__(self, other):
+        if isinstance(other, (str, StrBuilder)):
+            return str(self) <= str(other)
+        return NotImplemented
+
+    def __gt__(self, other):
+        if isinstance(other, (str, StrBuilder)):
+            return str(self) > str(other)
+        return NotImplemented
+
+    def __ge__(self, other):
+        if isinstance(other, (str, StrBuilder)):
+            return str(self) >= str(other)
+        return NotImplemented
+
+
+def add(left, right):
+    # ADD: strings long enough to be worth it are appended through a StrBuilder; everything else adds as usual.
+    if type(left) is StrBuilder or type(left) is str and type(right) is str and len(left) >= BUILDER_MIN_LENGTH:
+        return StrBuilder.concat(left, right)
+    return left + right
@@ -0,0 +1,31 @@
+"""
+Symbols for identifiers, usernames and anchor names. Every spelling of a name is normalised once, during lexing, to
+one interned string, so lookups on names compare by identity.
+"""
+import sys
+
+# Spellings a SymbolTable caches before starting over, so long-running sessions use bounded memory.
+MAX_CACHED = 65536
+
+
+def symbol(text):
+    """Returns the interned symbol for a name as written in source or passed in from host code."""
+    return sys.intern(' '.join(text.lower().split()))
+
+
+class SymbolTable():
+    """Caches the symbol of every distinct spelling seen by a lexer. Share one table between lexers that feed the same
+    interpreter, such as the lines of a REPL session."""
+    def __init__(self):
+        self.symbols = {}
+
+    def intern(self, text):
+        name = self.symbols.get(text)
+        if name is None:
+            if len(self.symbols) >= MAX_CACHED:
+                self.symbols.clear()
+            name = self.symbols[text] = symbol(text)
+        return name
+
+    def __len__(self):
+        return len(self.symbols)
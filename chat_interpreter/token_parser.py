@@ -1,23 +1,34 @@
-import traceback
-
 from chat_interpreter.ast import *
-from chat_interpreter.tokens import TokenType
+from chat_interpreter.keywords import CONTEXTUAL_KEYWORDS, KEYWORDS
+from chat_interpreter.modules import IncludeError, default_modules
+from chat_interpreter.tokens import *
+
+# Keyword tokens, which count as words in poetic numbers.
+KEYWORD_TOKENTYPES = frozenset(KEYWORDS.values()) | frozenset(CONTEXTUAL_KEYWORDS.values())
 
-SCOPE_PREV_TOKENTYPES = [TokenType.YOU, TokenType.YOUR, TokenType.YOURSELF]
-SCOPE_SELF_TOKENTYPES = [TokenType.I, TokenType.ME, TokenType.MY, TokenType.MYSELF]
 
 class Parser():
-    def __init__(self, scanner):
+    def __init__(self, scanner, first_msg=0, modules=None, lazy=False):
+        # first_msg is the index the first parsed message will have in its Program, for source that is appended to an
+        # already running program. modules is the ModuleCache that included files are loaded through. With lazy set,
+        # function bodies are only skipped over and left as LazyBlocks, which the interpreter parses on their first
+        # call.
         self.tokens = scanner.tokens
         self.filename = scanner.filename
+        self.symbols = scanner.symbols
+        self.diagnostics = scanner.diagnostics
         self.current_scope = None
         self.current_token_index = 0
         self.current_token = self.tokens[0]
-        self.current_msg = 0
+        self.current_msg = first_msg
+        self.modules = modules or default_modules
+        self.lazy = lazy
         self.has_error = False
 
     def print_error(self, token, message):
-        print(f"[{self.filename}, line {token.line}:{token.pos}] Error: {message}")
+        # Some callers only have a line number to report.
+        line, pos = (token.line, token.pos) if isinstance(token, Token) else (token, 0)
+        self.diagnostics.report(self.filename, line, pos, message)
         self.has_error = True
 
     def eat(self, token_type=None):
@@ -31,14 +42,14 @@ class Parser():
             return token_value
         else:
             self.print_error(self.current_token, f"Expected token {TokenType(token_type).name} "
-                                                      f"(got {self.current_token.type}).")
-            traceback.print_stack()
+                                                      f"(got {TokenType(self.current_token.type).name}).")
+            self.diagnostics.print_stack()
             raise TypeError
 
     def eat_from_list(self, token_types: list):
         token = self.current_token
         for e in token_types:
-            if type(e) == TokenType:
+            if isinstance(e, int):
                 if token.type == e:
                     self.eat(e)
                     return e
@@ -53,17 +64,19 @@ class Parser():
         try:
             self.current_token = self.tokens[self.current_token_index]
             if ignore_whitespace:
-                if self.current_token.type == TokenType.WHITESPACE:
+                if self.current_token.type == WHITESPACE:
                     self.get_next_token()
         except IndexError:
             self.print_error(self.tokens[self.current_token_index - 1].line, "Run out of tokens for expr.")
 
     def parse(self):
         node = self.program()
-        if self.current_token.type != TokenType.EOF:
+        if self.current_token.type != EOF:
             self.print_error(self.current_token.line,
                              f"Finished parsing before EOF. (current token: {self.current_token})")
             return None
+        elif self.has_error:
+            return None
         else:
             return node
 
@@ -71,9 +84,9 @@ class Parser():
         """
         anchor : HASH IDENTIFIER
         """
-        self.eat(TokenType.HASH)
+        self.eat(HASH)
         node = Anchor(self.current_token)
-        self.eat(TokenType.IDENTIFIER)
+        self.eat(IDENTIFIER)
         return node
 
     def arg(self):
@@ -81,7 +94,7 @@ class Parser():
         arg : [operation | string]
         """
         token = self.current_token
-        if token.type == TokenType.STR:
+        if token.type == STR:
             return Arg(self.string())
         else:
             return Arg(self.operation())
@@ -93,8 +106,8 @@ class Parser():
         """
         args = [self.arg()]
 
-        while self.current_token.type == TokenType.COMMA:
-            self.eat(TokenType.COMMA)
+        while self.current_token.type == COMMA:
+            self.eat(COMMA)
             args.append(self.arg())
 
         return args
@@ -105,11 +118,11 @@ class Parser():
         """
 
         stmts = [self.statement()]
-        self.eat(TokenType.PUNCT)
+        self.eat(PUNCT)
 
-        while self.current_token.type not in [TokenType.LBRACE, TokenType.DONE, TokenType.EOF]:
+        while self.current_token.type not in COMPOUND_END_TOKENTYPES:
             stmts.append(self.statement())
-            self.eat(TokenType.PUNCT)
+            self.eat(PUNCT)
 
         node = Compound(stmts)
         return node
@@ -121,24 +134,35 @@ class Parser():
         node = self.logic_or()
         return node
 
+    def element(self):
+        """
+        element : ELEMENT term OF term
+        """
+        self.eat(ELEMENT)
+        index = self.term()
+        self.eat(OF)
+        target = self.term()
+        node = Element(index, target)
+        return node
+
     def func_call(self):
         """
         func_call : CALL [scope_call | scope_prev | scope_self | variable] (WITH args_list)
         """
-        self.eat(TokenType.CALL)
+        self.eat(CALL)
 
         token = self.current_token
         if token.type in SCOPE_PREV_TOKENTYPES:
             var = self.scope_prev()
-        elif token.type == TokenType.ATSYM:
+        elif token.type == ATSYM:
             var = self.scope_call()
         elif token.type in SCOPE_SELF_TOKENTYPES:
             var = self.scope_self()
         else:
             var = self.variable()
 
-        if self.current_token.type == TokenType.WITH:
-            self.eat(TokenType.WITH)
+        if self.current_token.type == WITH:
+            self.eat(WITH)
             args = self.args_list()
         else:
             args = []
@@ -150,30 +174,30 @@ class Parser():
         """
         func_decl : MAKE [scope_self | variable] DO (WITH params_list) COLON compound_statement DONE
         """
-        self.eat(TokenType.MAKE)
+        self.eat(MAKE)
         token = self.current_token
         if token.type in SCOPE_SELF_TOKENTYPES:
             func_name = self.scope_self()
         else:
             func_name = self.variable()
 
-        self.eat(TokenType.DO)
+        self.eat(DO)
 
-        if self.current_token.type == TokenType.WITH:
-            self.eat(TokenType.WITH)
+        if self.current_token.type == WITH:
+            self.eat(WITH)
             params = self.params_list()
         else:
             params = []
 
-        # if self.current_token.type == TokenType.THE:
-        #     self.eat(TokenType.THE)
-        #     self.eat(TokenType.FOLLOWING)
+        # if self.current_token.type == THE:
+        #     self.eat(THE)
+        #     self.eat(FOLLOWING)
 
-        self.eat(TokenType.COLON)
+        self.eat(COLON)
 
-        func_body = self.compound_statement()
+        func_body = self.lazy_block() if self.lazy else self.compound_statement()
 
-        self.eat(TokenType.DONE)
+        self.eat(DONE)
 
         node = FuncDecl(func_name, params, func_body)
         return node
@@ -182,25 +206,25 @@ class Parser():
         """
         ifelse : [IF | WHEN] condition COMMA statement (COMMA [OR ELSE | OTHERWISE] COMMA statement)
         """
-        self.eat_from_list([TokenType.IF, TokenType.WHEN])
+        self.eat_from_list([IF, WHEN])
 
         cond = self.condition()
 
-        self.eat(TokenType.COMMA)
+        self.eat(COMMA)
 
         if_stmt = self.statement()
 
-        if self.current_token.type == TokenType.COMMA:
-            self.eat(TokenType.COMMA)
+        if self.current_token.type == COMMA:
+            self.eat(COMMA)
 
             token = self.current_token
-            if token.type == TokenType.OR:
-                self.eat(TokenType.OR)
-                self.eat(TokenType.ELSE)
-            elif token.type == TokenType.OTHERWISE:
-                self.eat(TokenType.OTHERWISE)
+            if token.type == OR:
+                self.eat(OR)
+                self.eat(ELSE)
+            elif token.type == OTHERWISE:
+                self.eat(OTHERWISE)
 
-            self.eat(TokenType.COMMA)
+            self.eat(COMMA)
 
             else_stmt = self.statement()
         else:
@@ -210,17 +234,72 @@ class Parser():
         node = IfElse(cond, if_stmt, else_stmt)
         return node
 
+    def lazy_block(self):
+        """
+        lazy_block : compound_statement, skipped up to its matching DONE
+        """
+        # Nested declarations are counted so their DONEs are passed over. A body that runs into the next message or the
+        # end of the source is parsed right away instead, so its error is reported as it would be without lazy.
+        tokens = self.tokens
+        depth = 0
+        prev = None
+        for end in range(self.current_token_index, len(tokens)):
+            token_type = tokens[end].type
+            if token_type == WHITESPACE:
+                continue
+            if token_type == MAKE:
+                depth += 1
+            elif token_type == DONE:
+                if not depth:
+                    break
+                depth -= 1
+            elif token_type == EOF or token_type == LBRACE and prev not in (TO, REMEMBER):
+                return self.compound_statement()
+            prev = token_type
+        else:
+            return self.compound_statement()
+
+        node = LazyBlock(self, self.current_token_index, self.current_msg, self.current_scope)
+        self.current_token_index = end
+        self.current_token = tokens[end]
+        return node
+
+    def parse_lazy_block(self, node):
+        """
+        Parses the body node skipped over, reporting its errors like parse() would have. Returns its Compound.
+        """
+        state = self.current_token_index, self.current_token, self.current_msg, self.current_scope
+        self.current_token_index = node.start
+        self.current_token = self.tokens[node.start]
+        self.current_msg = node.msg
+        self.current_scope = node.scope
+        try:
+            block = self.compound_statement()
+            self.eat(DONE)
+        finally:
+            self.current_token_index, self.current_token, self.current_msg, self.current_scope = state
+        return block
+
+    def length(self):
+        """
+        length : LENGTH OF term
+        """
+        self.eat(LENGTH)
+        self.eat(OF)
+        node = Length(self.term())
+        return node
+
     def logic_and(self):
         """
         logic_and : logic_eq (AND logic_eq)*
         """
         node = self.logic_eq()
 
-        while self.current_token.type == TokenType.AND:
+        while self.current_token.type == AND:
             token = self.current_token
-            self.eat(TokenType.AND)
+            self.eat(AND)
 
-            node = Logical(node, None, token, self.logic_and())
+            node = Logical(node, None, token.type, self.logic_and())
 
         return node
 
@@ -230,11 +309,11 @@ class Parser():
         """
         node = self.logic_and()
 
-        while self.current_token.type == TokenType.OR:
+        while self.current_token.type == OR:
             token = self.current_token
-            self.eat(TokenType.OR)
+            self.eat(OR)
 
-            node = Logical(node, None, token, self.logic_or())
+            node = Logical(node, None, token.type, self.logic_or())
 
         return node
 
@@ -245,39 +324,39 @@ class Parser():
         """
         left = self.operation()
 
-        if self.current_token.type in [TokenType.AM, TokenType.IS, TokenType.ARE, TokenType.WAS, TokenType.WERE]:
-            self.eat_from_list([TokenType.AM, TokenType.IS, TokenType.ARE, TokenType.WAS, TokenType.WERE])
+        if self.current_token.type in BE_TOKENTYPES:
+            self.eat_from_list([AM, IS, ARE, WAS, WERE])
 
-            if self.current_token.type == TokenType.NOT:
+            if self.current_token.type == NOT:
                 negate = True
-                self.eat(TokenType.NOT)
+                self.eat(NOT)
             else:
                 negate = False
 
             token = self.current_token
-            if token.type == TokenType.EQUAL:
-                op = TokenType.EQUAL
-                self.eat(TokenType.EQUAL)
-                self.eat(TokenType.TO)
-            elif token.type == TokenType.GREATER:
-                op = TokenType.GREATER
-                self.eat(TokenType.GREATER)
-                self.eat(TokenType.THAN)
-            elif token.type == TokenType.LESS:
-                op = TokenType.LESS
-                self.eat(TokenType.LESS)
-                self.eat(TokenType.THAN)
-            elif token.type == TokenType.AT:
-                self.eat(TokenType.AT)
+            if token.type == EQUAL:
+                op = EQUAL
+                self.eat(EQUAL)
+                self.eat(TO)
+            elif token.type == GREATER:
+                op = GREATER
+                self.eat(GREATER)
+                self.eat(THAN)
+            elif token.type == LESS:
+                op = LESS
+                self.eat(LESS)
+                self.eat(THAN)
+            elif token.type == AT:
+                self.eat(AT)
                 token = self.current_token
-                if token.type == TokenType.MOST:
-                    op = token
-                    self.eat(TokenType.MOST)
-                elif token.type == TokenType.LEAST:
-                    op = token
-                    self.eat(TokenType.LEAST)
+                if token.type == MOST:
+                    op = MOST
+                    self.eat(MOST)
+                elif token.type == LEAST:
+                    op = LEAST
+                    self.eat(LEAST)
             else:
-                op = TokenType.EQUAL
+                op = EQUAL
 
             right = self.operation()
         else:
@@ -295,17 +374,24 @@ class Parser():
         timestamp = self.timestamp()
         scope_name = self.scope_name()
         self.current_scope = scope_name
-        self.eat(TokenType.COLON)
+        self.eat(COLON)
         stmts = self.compound_statement()
         node = Message(timestamp, scope_name, stmts)
         return node
 
+    def new_list(self):
+        """
+        new_list : LIST
+        """
+        self.eat(LIST)
+        return NewList()
+
     def num(self):
         """
         num : NUM
         """
         node = Num(self.current_token)
-        self.eat(TokenType.NUM)
+        self.eat(NUM)
         return node
 
     def operation(self):
@@ -314,7 +400,7 @@ class Parser():
                     prefix_operation
         """
         token = self.current_token
-        if token.type in [TokenType.ADD, TokenType.SUBTRACT, TokenType.MULTIPLY, TokenType.DIVIDE]:
+        if token.type in PREFIX_OP_TOKENTYPES:
             node = self.prefix_operation()
         else:
             node = self.infix_operation()
@@ -327,43 +413,41 @@ class Parser():
         """
         node = self.term()
 
-        while self.current_token.type in [TokenType.PLUS, TokenType.AND, TokenType.ADDED, TokenType.MINUS,
-                                          TokenType.WITHOUT, TokenType.TIMES, TokenType.MULTIPLIED, TokenType.DIVIDED,
-                                          TokenType.REMAINS, TokenType.REMAIN]:
+        while self.current_token.type in INFIX_OP_TOKENTYPES:
             token = self.current_token
-            if token.type == TokenType.PLUS:
-                self.eat(TokenType.PLUS)
-                op = TokenType.ADD
-            elif token.type == TokenType.AND:
-                self.eat(TokenType.AND)
-                op = TokenType.ADD
-            elif token.type == TokenType.ADDED:
-                self.eat(TokenType.ADDED)
-                self.eat(TokenType.TO)
-                op = TokenType.ADD
-            elif token.type == TokenType.MINUS:
-                self.eat(TokenType.MINUS)
-                op = TokenType.SUBTRACT
-            elif token.type == TokenType.WITHOUT:
-                self.eat(TokenType.WITHOUT)
-                op = TokenType.SUBTRACT
-            elif token.type == TokenType.TIMES:
-                self.eat(TokenType.TIMES)
-                op = TokenType.MULTIPLY
-            elif token.type == TokenType.MULTIPLIED:
-                self.eat(TokenType.MULTIPLIED)
-                self.eat(TokenType.WITH)
-                op = TokenType.MULTIPLY
-            elif token.type == TokenType.DIVIDED:
-                self.eat(TokenType.DIVIDED)
-                self.eat(TokenType.BY)
-                op = TokenType.DIVIDE
-            elif token.type == TokenType.REMAINS:
-                self.eat(TokenType.REMAINS)
-                op = TokenType.REMAIN
-            elif token.type == TokenType.REMAIN:
-                self.eat(TokenType.REMAIN)
-                op = TokenType.REMAIN
+            if token.type == PLUS:
+                self.eat(PLUS)
+                op = ADD
+            elif token.type == AND:
+                self.eat(AND)
+                op = ADD
+            elif token.type == ADDED:
+                self.eat(ADDED)
+                self.eat(TO)
+                op = ADD
+            elif token.type == MINUS:
+                self.eat(MINUS)
+                op = SUBTRACT
+            elif token.type == WITHOUT:
+                self.eat(WITHOUT)
+                op = SUBTRACT
+            elif token.type == TIMES:
+                self.eat(TIMES)
+                op = MULTIPLY
+            elif token.type == MULTIPLIED:
+                self.eat(MULTIPLIED)
+                self.eat(WITH)
+                op = MULTIPLY
+            elif token.type == DIVIDED:
+                self.eat(DIVIDED)
+                self.eat(BY)
+                op = DIVIDE
+            elif token.type == REMAINS:
+                self.eat(REMAINS)
+                op = REMAIN
+            elif token.type == REMAIN:
+                self.eat(REMAIN)
+                op = REMAIN
 
             right = self.term()
 
@@ -377,17 +461,17 @@ class Parser():
                            MULTIPLY term AND term
                            DIVIDE term [AND | BY] term
         """
-        op = self.eat_from_list([TokenType.ADD, TokenType.SUBTRACT, TokenType.MULTIPLY, TokenType.DIVIDE])
+        op = self.eat_from_list([ADD, SUBTRACT, MULTIPLY, DIVIDE])
 
         left = self.term()
 
         token = self.current_token
-        if op == TokenType.SUBTRACT and token.type == TokenType.FROM:
-            self.eat(TokenType.FROM)
-        elif op == TokenType.DIVIDE and token.type == TokenType.BY:
-            self.eat(TokenType.BY)
+        if op == SUBTRACT and token.type == FROM:
+            self.eat(FROM)
+        elif op == DIVIDE and token.type == BY:
+            self.eat(BY)
         else:
-            self.eat(TokenType.AND)
+            self.eat(AND)
 
         right = self.term()
 
@@ -407,8 +491,8 @@ class Parser():
         """
         params = [self.param()]
 
-        while self.current_token.type == TokenType.COMMA:
-            self.eat(TokenType.COMMA)
+        while self.current_token.type == COMMA:
+            self.eat(COMMA)
             params.append(self.param())
 
         return params
@@ -418,9 +502,13 @@ class Parser():
         poetic_num : [IDENTIFIER | KEYWORD] ([IDENTIFIER | KEYWORD])*
         """
         total = 0
-        while self.current_token.type != TokenType.PUNCT:
-            tok = self.eat()
-            for word in tok.split():
+        while self.current_token.type != PUNCT:
+            token = self.current_token
+            if token.type != IDENTIFIER and token.type not in KEYWORD_TOKENTYPES:
+                self.print_error(token, f"Expected a word of a poetic number (got {TokenType(token.type).name}).")
+                raise TypeError
+            self.eat()
+            for word in token.lexeme.split():
                 total *= 10
                 total += len(word) % 10
         node = PoeticNum(total)
@@ -433,7 +521,7 @@ class Parser():
 
         msgs = [self.message()]
 
-        while self.current_token.type == TokenType.LBRACE:
+        while self.current_token.type == LBRACE:
             self.current_msg += 1
             msgs.append(self.message())
 
@@ -444,10 +532,10 @@ class Parser():
         """
         scope_call : ATSYM scope_name (APOST_S variable)
         """
-        self.eat(TokenType.ATSYM)
+        self.eat(ATSYM)
         scope = self.scope_name()
-        if self.current_token.type == TokenType.APOST_S:
-            self.eat(TokenType.APOST_S)
+        if self.current_token.type == APOST_S:
+            self.eat(APOST_S)
             var = self.variable()
         else:
             var = None
@@ -459,7 +547,7 @@ class Parser():
         variable : IDENT
         """
         node = ScopeName(self.current_token)
-        self.eat(TokenType.IDENTIFIER)
+        self.eat(IDENTIFIER)
         return node
 
     def scope_self(self):
@@ -467,20 +555,20 @@ class Parser():
         scope_self : I | ME | MYSELF | MY variable
         """
         token = self.current_token
-        if token.type == TokenType.I:
+        if token.type == I:
             var = Var(token)
             var.value = 'i'
-            self.eat(TokenType.I)
-        elif token.type == TokenType.ME:
+            self.eat(I)
+        elif token.type == ME:
             var = Var(token)
             var.value = 'i'
-            self.eat(TokenType.ME)
-        elif token.type == TokenType.MYSELF:
+            self.eat(ME)
+        elif token.type == MYSELF:
             var = Var(token)
             var.value = 'i'
-            self.eat(TokenType.MYSELF)
-        elif token.type == TokenType.MY:
-            self.eat(TokenType.MY)
+            self.eat(MYSELF)
+        elif token.type == MY:
+            self.eat(MY)
             var = self.variable()
         node = ScopeSelf(var)
         return node
@@ -490,14 +578,14 @@ class Parser():
         scope_prev : YOU | YOURSELF | YOUR variable
         """
         token = self.current_token
-        if token.type == TokenType.YOU:
-            self.eat(TokenType.YOU)
+        if token.type == YOU:
+            self.eat(YOU)
             var = None
-        elif token.type == TokenType.YOURSELF:
-            self.eat(TokenType.YOURSELF)
+        elif token.type == YOURSELF:
+            self.eat(YOURSELF)
             var = None
-        elif token.type == TokenType.YOUR:
-            self.eat(TokenType.YOUR)
+        elif token.type == YOUR:
+            self.eat(YOUR)
             var = self.variable()
         node = ScopePrev(var)
         return node
@@ -506,30 +594,36 @@ class Parser():
         """
         statement : empty
                     anchor_statement
+                    append_statement
                     declaration_statement
                     func_call_statement
                     goto_statement
                     ifelse
+                    include_statement
                     print_statement
         """
         token = self.current_token
-        if token.type == TokenType.SAY:
+        if token.type == SAY:
             stmt = self.print_statement()
-        elif token.type == TokenType.HASH:
+        elif token.type == HASH:
             stmt = self.anchor_statement()
-        elif token.type == TokenType.IF:
+        elif token.type == IF:
             stmt = self.ifelse()
-        elif token.type == TokenType.CALL:
+        elif token.type == CALL:
             stmt = self.func_call_statement()
-        elif token.type == TokenType.MAKE:
+        elif token.type == MAKE:
             stmt = self.func_decl()
-        elif token.type in [TokenType.GIVE, TokenType.RETURN]:
+        elif token.type == INCLUDE:
+            stmt = self.include_statement()
+        elif token.type == APPEND:
+            stmt = self.append_statement()
+        elif token.type in RETURN_TOKENTYPES:
             stmt = self.return_statement()
-        elif token.type in [TokenType.GO, TokenType.REMEMBER]:
+        elif token.type in GOTO_TOKENTYPES:
             stmt = self.goto_statement()
-        elif token.type in [TokenType.LET, TokenType.PUT]:
+        elif token.type in ASSIGN_TOKENTYPES:
             stmt = self.assignment_statement()
-        elif token.type in [TokenType.I, TokenType.IM, TokenType.MY, TokenType.IDENTIFIER]:
+        elif token.type in DECL_TOKENTYPES:
             stmt = self.declaration_statement()
         else:
             stmt = NoOp()
@@ -543,40 +637,60 @@ class Parser():
         node = AnchorDecl(self.current_msg, self.anchor())
         return node
 
+    def append_statement(self):
+        """
+        append_statement : APPEND [operation | string] TO term
+        """
+        self.eat(APPEND)
+        if self.current_token.type == STR:
+            value = self.string()
+        else:
+            value = self.operation()
+        self.eat(TO)
+        target = self.term()
+        node = AppendStmt(value, target)
+        return node
+
     def assignment_statement(self):
         """
-        assignment_statement : LET [variable | scope_self | scope_call] BE operation
-                               PUT operation IN [variable | scope_self | scope_call]
+        assignment_statement : LET [variable | scope_self | scope_call | element] BE operation
+                               PUT operation IN [variable | scope_self | scope_call | element]
         """
         token = self.current_token
 
-        if token.type == TokenType.LET:
-            self.eat(TokenType.LET)
+        if token.type == LET:
+            self.eat(LET)
 
             token = self.current_token
-            if token.type in SCOPE_SELF_TOKENTYPES:
+            if token.type == ELEMENT:
+                element = self.element()
+                self.eat(BE)
+                return SetElement(element, self.operation())
+            elif token.type in SCOPE_SELF_TOKENTYPES:
                 var = self.scope_self()
-            elif token.type == TokenType.ATSYM:
+            elif token.type == ATSYM:
                 var = self.scope_call()
             else:
                 var = self.variable()
 
-            self.eat(TokenType.BE)
+            self.eat(BE)
             value = self.operation()
-        elif token.type == TokenType.PUT:
-            self.eat(TokenType.PUT)
+        elif token.type == PUT:
+            self.eat(PUT)
             var = self.operation()
-            self.eat(TokenType.IN)
+            self.eat(IN)
 
             token = self.current_token
-            if token.type in SCOPE_SELF_TOKENTYPES:
+            if token.type == ELEMENT:
+                return SetElement(self.element(), var)
+            elif token.type in SCOPE_SELF_TOKENTYPES:
                 value = self.scope_self()
-            elif token.type == TokenType.ATSYM:
+            elif token.type == ATSYM:
                 value = self.scope_call()
             else:
                 value = self.variable()
 
-        node = VarDecl(var, value)
+        node = VarDecl(var, value, assignment=True)
         return node
 
     def declaration_statement(self):
@@ -585,28 +699,28 @@ class Parser():
                                                                                 string | WHETHER condition]
         """
         token = self.current_token
-        if token.type == TokenType.IM:
+        if token.type == IM:
             var = Var(self.current_token)
-            var.token = TokenType.I
+            var.token = I
             var.value = 'i'
-            self.eat(TokenType.IM)
-        elif token.type == TokenType.I:
+            self.eat(IM)
+        elif token.type == I:
             var = self.scope_self()
-            self.eat(TokenType.AM)
-        elif token.type == TokenType.MY:
+            self.eat(AM)
+        elif token.type == MY:
             var = self.scope_self()
-            self.eat_from_list([TokenType.IS, TokenType.ARE, TokenType.WAS, TokenType.WERE])
+            self.eat_from_list([IS, ARE, WAS, WERE])
         else:
             var = self.variable()
-            self.eat_from_list([TokenType.IS, TokenType.ARE, TokenType.WAS, TokenType.WERE])
+            self.eat_from_list([IS, ARE, WAS, WERE])
 
         token = self.current_token
-        if token.type in SCOPE_PREV_TOKENTYPES + SCOPE_SELF_TOKENTYPES + [TokenType.NUM, TokenType.ATSYM]:
+        if token.type in OPERATION_VALUE_TOKENTYPES:
             value = self.operation()
-        elif token.type == TokenType.WHETHER:
-            self.eat(TokenType.WHETHER)
+        elif token.type == WHETHER:
+            self.eat(WHETHER)
             value = self.condition()
-        elif token.type == TokenType.STR:
+        elif token.type == STR:
             value = self.string()
         else:
             value = self.poetic_num()
@@ -626,31 +740,47 @@ class Parser():
         goto_statement : [REMEMBER | GO TO] [anchor | timestamp]
         """
         token = self.current_token
-        if token.type == TokenType.GO:
-            self.eat(TokenType.GO)
-            self.eat(TokenType.TO)
-        elif token.type == TokenType.REMEMBER:
-            self.eat(TokenType.REMEMBER)
+        if token.type == GO:
+            self.eat(GO)
+            self.eat(TO)
+        elif token.type == REMEMBER:
+            self.eat(REMEMBER)
 
         token = self.current_token
-        if token.type == TokenType.HASH:
+        if token.type == HASH:
             goto = self.anchor()
-        elif token.type == TokenType.LBRACE:
+        elif token.type == LBRACE:
             goto = self.timestamp()
 
         node = GotoStmt(goto)
         return node
 
+    def include_statement(self):
+        """
+        include_statement : INCLUDE string
+        """
+        self.eat(INCLUDE)
+        token = self.current_token
+        path = self.string()
+        try:
+            module = self.modules.load(path.value, self.filename)
+            funcs, digests = module.exports, module.digests
+        except IncludeError as e:
+            self.print_error(token, str(e))
+            funcs, digests = [], []
+        node = IncludeStmt(path, funcs, digests)
+        return node
+
     def print_statement(self):
         """
         print_statement : SAY [operation | string]
         """
         token = self.current_token
-        if token.type == TokenType.SAY:
-            self.eat(TokenType.SAY)
+        if token.type == SAY:
+            self.eat(SAY)
 
         token = self.current_token
-        if token.type == TokenType.STR:
+        if token.type == STR:
             value = self.string()
         else:
             value = self.operation()
@@ -663,14 +793,14 @@ class Parser():
         return_statement : [GIVE BACK | RETURN] [operation | string]
         """
         token = self.current_token
-        if token.type == TokenType.GIVE:
-            self.eat(TokenType.GIVE)
-            self.eat(TokenType.BACK)
-        elif token.type == TokenType.RETURN:
-            self.eat(TokenType.RETURN)
+        if token.type == GIVE:
+            self.eat(GIVE)
+            self.eat(BACK)
+        elif token.type == RETURN:
+            self.eat(RETURN)
 
         token = self.current_token
-        if token.type == TokenType.STR:
+        if token.type == STR:
             value = self.string()
         else:
             value = self.operation()
@@ -683,23 +813,29 @@ class Parser():
         string : STR
         """
         node = String(self.current_token)
-        self.eat(TokenType.STR)
+        self.eat(STR)
         return node
 
     def term(self):
         """
-        term : [num | variable | scope_call | scope_self | scope_prev | func_call]
+        term : [num | variable | scope_call | scope_self | scope_prev | func_call | element | length | new_list]
         """
         token = self.current_token
-        if token.type == TokenType.NUM:
+        if token.type == NUM:
             node = self.num()
-        elif token.type == TokenType.ATSYM:
+        elif token.type == ELEMENT:
+            node = self.element()
+        elif token.type == LENGTH:
+            node = self.length()
+        elif token.type == LIST:
+            node = self.new_list()
+        elif token.type == ATSYM:
             node = self.scope_call()
         elif token.type in SCOPE_SELF_TOKENTYPES:
             node = self.scope_self()
         elif token.type in SCOPE_PREV_TOKENTYPES:
             node = self.scope_prev()
-        elif token.type == TokenType.CALL:
+        elif token.type == CALL:
             node = self.func_call()
         else:
             node = self.variable()
@@ -709,21 +845,21 @@ class Parser():
         """
         timestamp : LBRACE NUM COLON NUM ([AM | PM]) RBRACE
         """
-        self.eat(TokenType.LBRACE)
+        self.eat(LBRACE)
         hh = self.num()
-        self.eat(TokenType.COLON)
+        self.eat(COLON)
         mm = self.num()
 
         token = self.current_token
 
         # Optional conversion from 12-hour time to 24-hour time.
-        if token.type == TokenType.AM:
-            self.eat(TokenType.AM)
-        elif token.type == TokenType.PM:
-            self.eat(TokenType.PM)
+        if token.type == AM:
+            self.eat(AM)
+        elif token.type == PM:
+            self.eat(PM)
             hh.value += 12
 
-        self.eat(TokenType.RBRACE)
+        self.eat(RBRACE)
         node = Timestamp(hh, mm)
         return node
 
@@ -732,5 +868,5 @@ class Parser():
         variable : IDENT
         """
         node = Var(self.current_token)
-        self.eat(TokenType.IDENTIFIER)
+        self.eat(IDENTIFIER)
         return node
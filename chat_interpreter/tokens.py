@@ -1,107 +1,221 @@
-from enum import Enum, auto
+from enum import IntEnum
 
 
-class TokenType(Enum):
-    EOF = auto()
-    WHITESPACE = auto()
+class TokenType(IntEnum):
+    EOF = 0
+    WHITESPACE = 1
 
     # Single character tokens
-    APOST = auto()
-    ATSYM = auto()
-    LBRACE = auto()
-    RBRACE = auto()
-    COLON = auto()
-    COMMA = auto()
-    DOT = auto()
-    HASH = auto()
-    QMARK = auto()
-    
+    APOST = 2
+    ATSYM = 3
+    LBRACE = 4
+    RBRACE = 5
+    COLON = 6
+    COMMA = 7
+    DOT = 8
+    HASH = 9
+    QMARK = 10
+
     # Multi-character tokens
-    APOST_S = auto()
+    APOST_S = 11
 
     # Identifiers, types, and literals
-    IDENTIFIER = auto()
-    NUM = auto()
-    CHAR = auto()
-    STR = auto()
-    BOOL = auto()
-    NULL = auto()        # Keyword "nothing"
-    PUNCT = auto()       # [./!/?/‽/…/:]
+    IDENTIFIER = 12
+    NUM = 13
+    CHAR = 14
+    STR = 15
+    BOOL = 16
+    NULL = 17  # Keyword "nothing"
+    PUNCT = 18  # [./!/?/‽/…/:]
 
     # Keywords
-    I = auto()
-    IM = auto()
-    ADD = auto()
-    ADDED = auto()
-    AM = auto()
-    AND = auto()
-    ARE = auto()
-    AT = auto()
-    BACK = auto()
-    BE = auto()
-    BY = auto()
-    CALL = auto()
-    DIVIDE = auto()
-    DIVIDED = auto()
-    DO = auto()
-    DONE = auto()
-    ELSE = auto()
-    EQUAL = auto()
-    FOLLOWING = auto()
-    FROM = auto()
-    GIVE = auto()
-    GO = auto()
-    GREATER = auto()
-    IF = auto()
-    IN = auto()
-    IS = auto()
-    LEAST = auto()
-    LESS = auto()
-    LET = auto()
-    MAKE = auto()
-    ME = auto()
-    MINUS = auto()
-    MOST = auto()
-    MULTIPLIED = auto()
-    MULTIPLY = auto()
-    MY = auto()
-    MYSELF = auto()
-    NOT = auto()
-    OR = auto()
-    OTHERWISE = auto()
-    PLUS = auto()
-    PM = auto()
-    PUT = auto()
-    REMAIN = auto()
-    REMAINS = auto()
-    REMEMBER = auto()
-    REMOVE = auto()
-    RETURN = auto()
-    SAID = auto()
-    SAY = auto()
-    SO = auto()
-    SUBTRACT = auto()
-    THAN = auto()
-    TIMES = auto()
-    TO = auto()
-    WAS = auto()
-    WERE = auto()
-    WHEN = auto()
-    WHETHER = auto()
-    WITH = auto()
-    WITHOUT = auto()
-    YOU = auto()
-    YOUR = auto()
-    YOURSELF = auto()
+    I = 19
+    IM = 20
+    ADD = 21
+    ADDED = 22
+    AM = 23
+    AND = 24
+    APPEND = 25
+    ARE = 26
+    AT = 27
+    BACK = 28
+    BE = 29
+    BY = 30
+    CALL = 31
+    DIVIDE = 32
+    DIVIDED = 33
+    DO = 34
+    DONE = 35
+    ELEMENT = 36
+    ELSE = 37
+    EQUAL = 38
+    FOLLOWING = 39
+    FROM = 40
+    GIVE = 41
+    GO = 42
+    GREATER = 43
+    IF = 44
+    IN = 45
+    INCLUDE = 46
+    IS = 47
+    LEAST = 48
+    LENGTH = 49
+    LESS = 50
+    LET = 51
+    LIST = 52
+    MAKE = 53
+    ME = 54
+    MINUS = 55
+    MOST = 56
+    MULTIPLIED = 57
+    MULTIPLY = 58
+    MY = 59
+    MYSELF = 60
+    NOT = 61
+    OF = 62
+    OR = 63
+    OTHERWISE = 64
+    PLUS = 65
+    PM = 66
+    PUT = 67
+    REMAIN = 68
+    REMAINS = 69
+    REMEMBER = 70
+    REMOVE = 71
+    RETURN = 72
+    SAID = 73
+    SAY = 74
+    SO = 75
+    SUBTRACT = 76
+    THAN = 77
+    TIMES = 78
+    TO = 79
+    WAS = 80
+    WERE = 81
+    WHEN = 82
+    WHETHER = 83
+    WITH = 84
+    WITHOUT = 85
+    YOU = 86
+    YOUR = 87
+    YOURSELF = 88
+
+
+# Plain integer token codes. Token.type holds these, so comparisons on hot paths are int comparisons rather than enum
+# attribute lookups. TokenType(code).name recovers the name for messages.
+EOF = 0
+WHITESPACE = 1
+APOST = 2
+ATSYM = 3
+LBRACE = 4
+RBRACE = 5
+COLON = 6
+COMMA = 7
+DOT = 8
+HASH = 9
+QMARK = 10
+APOST_S = 11
+IDENTIFIER = 12
+NUM = 13
+CHAR = 14
+STR = 15
+BOOL = 16
+NULL = 17
+PUNCT = 18
+I = 19
+IM = 20
+ADD = 21
+ADDED = 22
+AM = 23
+AND = 24
+APPEND = 25
+ARE = 26
+AT = 27
+BACK = 28
+BE = 29
+BY = 30
+CALL = 31
+DIVIDE = 32
+DIVIDED = 33
+DO = 34
+DONE = 35
+ELEMENT = 36
+ELSE = 37
+EQUAL = 38
+FOLLOWING = 39
+FROM = 40
+GIVE = 41
+GO = 42
+GREATER = 43
+IF = 44
+IN = 45
+INCLUDE = 46
+IS = 47
+LEAST = 48
+LENGTH = 49
+LESS = 50
+LET = 51
+LIST = 52
+MAKE = 53
+ME = 54
+MINUS = 55
+MOST = 56
+MULTIPLIED = 57
+MULTIPLY = 58
+MY = 59
+MYSELF = 60
+NOT = 61
+OF = 62
+OR = 63
+OTHERWISE = 64
+PLUS = 65
+PM = 66
+PUT = 67
+REMAIN = 68
+REMAINS = 69
+REMEMBER = 70
+REMOVE = 71
+RETURN = 72
+SAID = 73
+SAY = 74
+SO = 75
+SUBTRACT = 76
+THAN = 77
+TIMES = 78
+TO = 79
+WAS = 80
+WERE = 81
+WHEN = 82
+WHETHER = 83
+WITH = 84
+WITHOUT = 85
+YOU = 86
+YOUR = 87
+YOURSELF = 88
+
+# Token groups tested with `in` by the parser.
+SCOPE_PREV_TOKENTYPES = frozenset({YOU, YOUR, YOURSELF})
+SCOPE_SELF_TOKENTYPES = frozenset({I, ME, MY, MYSELF})
+BE_TOKENTYPES = frozenset({AM, IS, ARE, WAS, WERE})
+COMPOUND_END_TOKENTYPES = frozenset({LBRACE, DONE, EOF})
+PREFIX_OP_TOKENTYPES = frozenset({ADD, SUBTRACT, MULTIPLY, DIVIDE})
+INFIX_OP_TOKENTYPES = frozenset({PLUS, AND, ADDED, MINUS, WITHOUT, TIMES, MULTIPLIED, DIVIDED, REMAINS, REMAIN})
+DECL_TOKENTYPES = frozenset({I, IM, MY, IDENTIFIER})
+OPERATION_VALUE_TOKENTYPES = frozenset({YOU, YOUR, YOURSELF, I, ME, MY, MYSELF, NUM, ATSYM, ELEMENT, LENGTH, LIST})
+RETURN_TOKENTYPES = frozenset({GIVE, RETURN})
+GOTO_TOKENTYPES = frozenset({GO, REMEMBER})
+ASSIGN_TOKENTYPES = frozenset({LET, PUT})
 
 
 class Token():
-    def __init__(self, token_type, lexeme, literal, line, pos):
+    def __init__(self, token_type, lexeme, literal, line, pos, start=0):
         self.type = token_type
         self.lexeme = lexeme
         self.literal = literal
         self.line = line
         self.pos = pos
+        # Offset of the lexeme in the lexed source, for tools that need exact source ranges.
+        self.start = start
 
     def __repr__(self):
         return f"[line {self.line}:{self.pos}] {TokenType(self.type).name} {self.lexeme} {self.literal}"
@@ -0,0 +1,332 @@
+"""
+Compact binary execution traces: which messages ran, which way every if went, which functions were called and where
+gotos jumped.
+
+A trace is a header (magic, format version, the SHA-256 of the program source and the modules it includes, and how many
+chunks were dropped) followed by length-prefixed chunks. Every record is one varint holding a value shifted left by
+three bits over a record tag:
+
+    MESSAGE  message index, as the zigzag-encoded difference from the message after the previous one
+    TAKEN    index of the IfElse whose condition was true, in the order ifs appear in the program
+    SKIPPED  index of the IfElse whose condition was false
+    CALL     index of the called FuncDecl, in the order declarations appear in the program
+
+Messages usually run in order, so most MESSAGE records are a single zero byte; a non-zero difference is a goto. Each
+chunk starts with the message expected next, so chunks decode on their own. Without a file, chunks are kept in a ring of
+bounded size and the oldest are dropped; with one, every chunk is appended to it once full. A chunk can run a few
+records past CHUNK_SIZE, since the size is only checked between messages.
+"""
+import collections
+import io
+import sys
+
+from chat_interpreter.ast import FuncDecl, IfElse
+from chat_interpreter.checkpoint import program_hash
+from chat_interpreter.interpreter import Interpreter
+from chat_interpreter.lexer import Lexer
+from chat_interpreter.modules import default_modules, display
+from chat_interpreter.profiler import node_line
+from chat_interpreter.token_parser import Parser
+
+MAGIC = b'CHATTRCE'
+VERSION = 1
+
+MESSAGE, TAKEN, SKIPPED, CALL = range(4)
+# Not stored: replay reports a goto wherever a message is not the one expected next.
+GOTO = 4
+TAG_BITS = 3
+
+CHUNK_SIZE = 65536
+DEFAULT_CAPACITY = 16 * 1024 * 1024
+
+
+class TraceError(Exception):
+    pass
+
+
+def trace_nodes(node, ifs=None, funcs=None):
+    # Every IfElse and FuncDecl in node, in source order.
+    if ifs is None:
+        ifs, funcs = [], []
+    if isinstance(node, IfElse):
+        ifs.append(node)
+    elif isinstance(node, FuncDecl):
+        funcs.append(node)
+    for value in vars(node).values():
+        for child in (value if isinstance(value, list) else [value]):
+            if hasattr(child, '__dict__') and not isinstance(child, type):
+                trace_nodes(child, ifs, funcs)
+    return ifs, funcs
+
+
+def write_varint(buffer, value):
+    while value >= 0x80:
+        buffer.append(value & 0x7f | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def encode(value, tag):
+    record = bytearray()
+    write_varint(record, value << TAG_BITS | tag)
+    return bytes(record)
+
+
+def write_chunk(f, chunk):
+    length = bytearray()
+    write_varint(length, len(chunk))
+    f.write(length)
+    f.write(chunk)
+
+
+def read_varint(data, pos):
+    value = shift = 0
+    while True:
+        if pos >= len(data):
+            raise TraceError("Trace is truncated.")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class TraceWriter():
+    """
+    Encodes trace records into chunks. With path set, every full chunk is appended to that file; otherwise the most
+    recent capacity bytes are kept in memory and can be written out with save().
+    """
+    def __init__(self, tree, source, path=None, capacity=DEFAULT_CAPACITY):
+        ifs, funcs = trace_nodes(tree)
+        # Records for ifs and calls never change, so they are encoded once; an if's pair is indexed by its outcome.
+        self.if_records = {node: (encode(i, SKIPPED), encode(i, TAKEN)) for i, node in enumerate(ifs)}
+        self.call_records = {node: encode(i, CALL) for i, node in enumerate(funcs)}
+        self.jump_records = {}
+        self.hash = program_hash(source, tree)
+        self.chunks = collections.deque(maxlen=max(1, capacity // CHUNK_SIZE))
+        self.dropped = 0
+        self.expected = 0
+        self.file = None
+        self.chunk = bytearray()
+        if path:
+            self.file = open(path, 'wb')
+            self.write_header(self.file, 0)
+        self.new_chunk()
+
+    def write_header(self, f, dropped):
+        header = bytearray(MAGIC)
+        header.append(VERSION)
+        header += self.hash
+        write_varint(header, dropped)
+        f.write(header)
+
+    def new_chunk(self):
+        # The chunk is one bytearray for the writer's whole life, cleared rather than replaced, so TracingInterpreter
+        # can hold on to it.
+        self.chunk.clear()
+        write_varint(self.chunk, self.expected)
+
+    def seal(self):
+        # Finishes the current chunk, writing it out or copying it into the ring.
+        if self.file:
+            write_chunk(self.file, self.chunk)
+        else:
+            if len(self.chunks) == self.chunks.maxlen:
+                self.dropped += 1
+            self.chunks.append(bytes(self.chunk))
+        self.new_chunk()
+
+    def jump(self, index):
+        # A message other than the expected one, after a goto; TracingInterpreter records the expected one itself.
+        # Loops jump by the same distance every iteration, so records are cached by it.
+        delta = index - self.expected
+        record = self.jump_records.get(delta)
+        if record is None:
+            record = self.jump_records[delta] = encode(delta << 1 if delta >= 0 else -delta << 1 | 1, MESSAGE)
+        self.chunk += record
+
+    def close(self):
+        if self.file:
+            self.seal()
+            self.file.close()
+            self.file = None
+
+    def getvalue(self):
+        """Returns the trace recorded so far in memory, including the unfinished chunk."""
+        f = io.BytesIO()
+        self.write_header(f, self.dropped)
+        for chunk in list(self.chunks) + [self.chunk]:
+            write_chunk(f, chunk)
+        return f.getvalue()
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.getvalue())
+
+
+class TracingInterpreter(Interpreter):
+    """
+    An Interpreter that records an execution trace into a TraceWriter, available as .trace. Like profiling, tracing is
+    a subclass rather than hooks, so a record costs an append to a bytearray instead of a round of handler calls, and
+    the plain Interpreter carries none of it. Messages are recorded by the interpret() loop; call trace.close() once the
+    program stopped to finish a trace file.
+    """
+    def __init__(self, parser, tree, source, path=None, capacity=DEFAULT_CAPACITY, **kwargs):
+        super().__init__(parser, **kwargs)
+        self.trace = TraceWriter(tree, source, path, capacity)
+        # Bound once, so recording an event costs one attribute lookup on self rather than a chain through the writer.
+        self.chunk = self.trace.chunk
+        self.if_records = self.trace.if_records
+        self.call_records = self.trace.call_records
+
+    def visit_Program(self, node):
+        # The message record is written inline, since this loop runs for every message.
+        trace, chunk, msgs = self.trace, self.chunk, node.msgs
+        while self.curr_msg < len(msgs):
+            index = self.curr_msg
+            if index == trace.expected:
+                chunk.append(MESSAGE)
+            else:
+                trace.jump(index)
+            trace.expected = index + 1
+            if len(chunk) >= CHUNK_SIZE:
+                trace.seal()
+            self.step(node)
+
+    def visit_IfElse(self, node):
+        if self.visit(node.condition):
+            self.chunk += self.if_records[node][1]
+            self.visit(node.if_block)
+        else:
+            self.chunk += self.if_records[node][0]
+            if node.else_block:
+                self.visit(node.else_block)
+
+    def call(self, func_decl, arg_values):
+        # Native functions are not part of the program, so their calls are not recorded.
+        record = self.call_records.get(func_decl)
+        if record is not None:
+            self.chunk += record
+        return Interpreter.call(self, func_decl, arg_values)
+
+
+class TraceReplay():
+    """Steps through a trace against the program it was recorded from."""
+    def __init__(self, tree, source, data):
+        if data[:len(MAGIC)] != MAGIC or len(data) < len(MAGIC) + 34:
+            raise TraceError("Not a trace file.")
+        pos = len(MAGIC)
+        if data[pos] != VERSION:
+            raise TraceError(f"Unsupported trace version {data[pos]}.")
+        pos += 1
+        if data[pos:pos + 32] != program_hash(source, tree):
+            raise TraceError("Trace was recorded from a different program.")
+        self.dropped, pos = read_varint(data, pos + 32)
+        self.data = data
+        self.start = pos
+        self.tree = tree
+        self.ifs, self.funcs = trace_nodes(tree)
+
+    def records(self):
+        """
+        Yields the raw (tag, value) records, with MESSAGE values resolved to message indices and a GOTO with the target
+        index before every message that did not follow the previous one.
+        """
+        data = self.data
+        pos = self.start
+        while pos < len(data):
+            length, pos = read_varint(data, pos)
+            end = pos + length
+            if end > len(data):
+                raise TraceError("Trace is truncated.")
+            expected, pos = read_varint(data, pos)
+            while pos < end:
+                value, pos = read_varint(data, pos)
+                tag, value = value & ((1 << TAG_BITS) - 1), value >> TAG_BITS
+                if tag == MESSAGE:
+                    value = expected + (-(value >> 1) if value & 1 else value >> 1)
+                    if value < 0:
+                        raise TraceError("Trace refers to nodes the program does not have.")
+                    if value != expected:
+                        yield GOTO, value
+                    expected = value + 1
+                elif tag >= GOTO:
+                    raise TraceError(f"Unknown trace record {tag}.")
+                yield tag, value
+
+    def steps(self):
+        """
+        Yields (tag, node, detail) for every record: the Message, IfElse or FuncDecl it refers to, and the message
+        index, whether the branch was taken, or None for calls.
+        """
+        msgs = self.tree.msgs
+        try:
+            for tag, value in self.records():
+                if tag == MESSAGE:
+                    yield tag, msgs[value], value
+                elif tag in (TAKEN, SKIPPED):
+                    yield tag, self.ifs[value], tag == TAKEN
+                elif tag == CALL:
+                    yield tag, self.funcs[value], None
+                else:
+                    yield tag, msgs[value], value
+        except IndexError:
+            raise TraceError("Trace refers to nodes the program does not have.")
+
+    def format(self, source):
+        """Yields one line of text per step, citing the source line of every node."""
+        lines = source.splitlines()
+        # Nodes declared in included files are cited by file, since their lines are not in source.
+        origins = {}
+        for _, _, module in default_modules.modules.values():
+            for func in module.funcs:
+                for node in sum(trace_nodes(func), []):
+                    origins[node] = display(module.path)
+
+        def cite(node):
+            line = node_line(node) or 0
+            if node in origins:
+                return f"{origins[node]}, line {line}"
+            text = lines[line - 1].strip() if 0 < line <= len(lines) else ''
+            return f"line {line}: {text if len(text) <= 80 else text[:77] + '...'}"
+
+        if self.dropped:
+            yield f"... {self.dropped} earlier chunks were dropped from the ring buffer"
+        for tag, node, detail in self.steps():
+            if tag == MESSAGE:
+                yield f"message {detail} ({cite(node)})"
+            elif tag in (TAKEN, SKIPPED):
+                yield f"  if {'taken' if detail else 'not taken'} ({cite(node)})"
+            elif tag == CALL:
+                yield f"  call {node.name.value} ({cite(node)})"
+            else:
+                yield f"  go to message {detail}"
+
+
+def replay(script, trace_path, out=None):
+    """Prints the trace at trace_path against script. Returns an exit status like runner.execute."""
+    out = out or sys.stdout
+    with open(script, 'r') as f:
+        source = f.read()
+    scanner = Lexer(source, script)
+    scanner.scan_tokens()
+    if scanner.has_error:
+        return 65
+    tree = Parser(scanner).parse()
+    if tree is None:
+        return 65
+    try:
+        with open(trace_path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        print(f"[{script}] Error: Cannot read trace: {e}")
+        return 66
+    try:
+        for line in TraceReplay(tree, source, data).format(source):
+            print(line, file=out)
+    except TraceError as e:
+        print(f"[{script}] Error: {e}")
+        return 65
+    return 0
+
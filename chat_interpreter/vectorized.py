@@ -0,0 +1,481 @@
+"""
+Batch execution of one program over many initial states at once, using NumPy.
+
+Every variable holds either one value shared by all lanes or an array with one element per lane. Arithmetic and
+comparisons are NumPy operations over all lanes, if/else runs each branch under a mask of the lanes that took it, and
+gotos are handled with a message counter per lane: each round runs one message for every lane waiting on it. Lanes
+never share state, so running them in this order gives each lane the same result as running it on its own.
+
+Anything that cannot be vectorized faithfully (a lane-dependent function value, an error in some lane, integers outside
+the int64 range, ...) raises Unvectorizable, and the whole batch is rerun with one ordinary Interpreter per lane.
+
+NumPy is an optional dependency, only needed by this module.
+"""
+import io
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from chat_interpreter.ast import FuncCall, NodeVisitor, ScopePrev
+from chat_interpreter.interpreter import BINARY_OPS, COMPARISONS, Interpreter
+from chat_interpreter.lists import LIST_FUNCTIONS
+from chat_interpreter.symbols import symbol
+from chat_interpreter.tokens import *
+
+# Lanes fall back to serial execution once an integer gets this large, so int64 arithmetic never wraps around.
+INT_LIMIT = 2 ** 62
+
+NUMPY_OPS = {
+    ADD: 'add',
+    SUBTRACT: 'subtract',
+    MULTIPLY: 'multiply',
+    REMAIN: 'mod',
+}
+
+NUMPY_COMPARISONS = {
+    EQUAL: 'equal',
+    GREATER: 'greater',
+    LESS: 'less',
+    MOST: 'less_equal',
+    LEAST: 'greater_equal',
+}
+
+
+class Unvectorizable(Exception):
+    pass
+
+
+class Frame():
+    # One function call: which lanes have returned, and what each returned.
+    def __init__(self, lanes):
+        self.returned = np.zeros(lanes, dtype=bool)
+        self.value = None
+
+
+def is_number(value):
+    # Numbers and bools, which NumPy can compute on directly.
+    if isinstance(value, np.ndarray):
+        return value.dtype.kind in 'biuf'
+    return type(value) in (int, float, bool) or isinstance(value, (np.number, np.bool_))
+
+
+def is_bool(value):
+    if isinstance(value, np.ndarray):
+        return value.dtype.kind == 'b'
+    return isinstance(value, (bool, np.bool_))
+
+
+def lane_array(value):
+    # Per-lane initial values as an array, without letting NumPy turn numbers and strings into one string dtype.
+    array = np.asarray(value)
+    return array if array.dtype.kind in 'biuf' else np.asarray(value, dtype=object)
+
+
+def lane_value(value, lane):
+    if isinstance(value, np.ndarray):
+        value = value[lane]
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def uses_prev_scope(node):
+    # Whether node may read the previous message's user, directly or through a function call.
+    if isinstance(node, (ScopePrev, FuncCall)):
+        return True
+    for value in vars(node).values():
+        for child in (value if isinstance(value, list) else [value]):
+            if hasattr(child, '__dict__') and not isinstance(child, type) and uses_prev_scope(child):
+                return True
+    return False
+
+
+class BatchInterpreter(NodeVisitor):
+    """
+    Runs the program parsed by parser once for each of lanes initial states. initial maps usernames to
+    {variable: value} dicts, where a value is either shared by every lane or a sequence with one element per lane; the
+    variable 'i' is the value of @User itself.
+
+    natives maps names to NativeFunctions every user can call, as Interpreter.natives does; they are given to each
+    lane's Interpreter if the batch falls back to serial execution, since calls to them are not vectorized (a called
+    name without a declared function makes it fall back).
+
+    run() returns one {'output': [...], 'error': exception or None, 'scopes': {...}} dict per lane, and sets vectorized
+    to whether the batch ran vectorized or fell back to one Interpreter per lane.
+    """
+    def __init__(self, parser, lanes, initial=None, natives=None):
+        if np is None:
+            raise ImportError("BatchInterpreter requires NumPy (pip install numpy)")
+        self.parser = parser
+        self.lanes = lanes
+        self.initial = {symbol(scope): {symbol(name): value for name, value in variables.items()}
+                        for scope, variables in (initial or {}).items()}
+        self.natives = dict(LIST_FUNCTIONS)
+        self.natives.update(natives or {})
+        self.vectorized = None
+
+    def run(self, tree=None):
+        # Pass an already parsed tree to skip parsing.
+        if tree is None:
+            tree = self.parser.parse()
+        if tree is None:
+            return None
+        try:
+            with np.errstate(all='ignore'):
+                results = self.run_vectorized(tree)
+            self.vectorized = True
+        except Unvectorizable:
+            results = self.run_serial(tree)
+            self.vectorized = False
+        return results
+
+    def run_serial(self, tree):
+        results = []
+        for lane in range(self.lanes):
+            out = io.StringIO()
+            interpreter = Interpreter(self.parser, out=out)
+            interpreter.natives.update(self.natives)
+            for scope, variables in self.initial.items():
+                interpreter.scopes[scope] = {'i': 0}
+                for name, value in variables.items():
+                    interpreter.scopes[scope][name] = lane_value(lane_array(value), lane) if np.ndim(value) else value
+
+            error = None
+            try:
+                interpreter.visit(tree)
+            except Exception as e:
+                error = e
+            results.append({'output': out.getvalue().splitlines(), 'error': error, 'scopes': interpreter.scopes})
+        return results
+
+    def run_vectorized(self, tree):
+        n = self.lanes
+        self.scopes = {}
+        self.defined = {}
+        self.anchors = {}
+        self.frames = []
+        self.outputs = [[] for _ in range(n)]
+        for scope, variables in self.initial.items():
+            self.scopes[scope] = {'i': 0}
+            for name, value in variables.items():
+                self.scopes[scope][name] = lane_array(value) if np.ndim(value) else value
+                self.defined[(scope, name)] = True
+
+        # Each lane's previous user is kept as an index into scope_names, -1 before the first message.
+        scope_names = []
+        scope_codes = {}
+        uses_prev = [uses_prev_scope(msg) for msg in tree.msgs]
+        pc = np.zeros(n, dtype=np.int64)
+        prev = np.full(n, -1, dtype=np.int64)
+        while True:
+            waiting = pc < len(tree.msgs)
+            if not waiting.any():
+                break
+            self.curr_msg = int(pc[waiting].min())
+            group = pc == self.curr_msg
+            msg = tree.msgs[self.curr_msg]
+            self.curr_scope = self.visit(msg.scope)
+            if self.curr_scope not in scope_codes:
+                scope_codes[self.curr_scope] = len(scope_names)
+                scope_names.append(self.curr_scope)
+
+            # Lanes that arrived here after different users see different `you`s, so they run the message separately.
+            codes = np.unique(prev[group]) if uses_prev[self.curr_msg] else prev[group][:1]
+            self.next_pc = np.where(group, self.curr_msg + 1, pc)
+            for code in codes:
+                self.prev_scope = scope_names[code] if code >= 0 else None
+                self.mask = group & (prev == code) if len(codes) > 1 else group
+                self.visit(msg)
+            prev[group] = scope_codes[self.curr_scope]
+            pc = self.next_pc
+
+        return [{'output': self.outputs[lane], 'error': None, 'scopes': self.lane_scopes(lane)} for lane in range(n)]
+
+    def lane_scopes(self, lane):
+        return {scope: {name: lane_value(value, lane) for name, value in variables.items()}
+                for scope, variables in self.scopes.items()}
+
+    def select(self, cond, if_true, if_false):
+        # Per-lane choice between two values. Anything but two numbers or two bools becomes an object array, so
+        # strings, functions and bools keep their Python types.
+        if not isinstance(cond, np.ndarray):
+            return if_true if cond else if_false
+        if is_bool(if_true) == is_bool(if_false) and is_number(if_true) and is_number(if_false):
+            return np.where(cond, if_true, if_false)
+        out = np.empty(self.lanes, dtype=object)
+        for target, value in [(~cond, if_false), (cond, if_true)]:
+            if isinstance(value, np.ndarray):
+                out[target] = value.astype(object)[target]
+            else:
+                for lane in np.flatnonzero(target):
+                    out[lane] = value
+        return out
+
+    def active(self, value):
+        # The values of the lanes in the current mask.
+        if isinstance(value, np.ndarray):
+            return value[self.mask]
+        return [value]
+
+    def write(self, scope, name, value):
+        variables = self.scopes.setdefault(scope, {'i': 0})
+        if self.mask.all():
+            variables[name] = value
+            self.defined[(scope, name)] = True
+            return
+        variables[name] = self.select(self.mask, value, variables.get(name, 0))
+        self.define(scope, name)
+
+    def define(self, scope, name):
+        defined = self.defined.get((scope, name), False)
+        if defined is not True:
+            self.defined[(scope, name)] = True if self.mask.all() else defined | self.mask
+
+    def read_other(self, scope, name):
+        # Reading another user's variable fails in serial execution if it was never written.
+        defined = self.defined.get((scope, name), name == 'i')
+        if scope not in self.scopes or defined is False or defined is not True and not defined[self.mask].all():
+            raise Unvectorizable(f"{name} is not defined in every lane")
+        return self.scopes[scope][name]
+
+    def check_ints(self, value):
+        if isinstance(value, np.ndarray):
+            if value.dtype.kind in 'iu' and value.size and np.abs(value).max() > INT_LIMIT:
+                raise Unvectorizable("integer out of int64 range")
+        elif type(value) is int and abs(value) > INT_LIMIT:
+            raise Unvectorizable("integer out of int64 range")
+        return value
+
+    def has_zero(self, value):
+        values = self.active(value)
+        if isinstance(values, np.ndarray) and values.dtype.kind != 'O':
+            return (values == 0).any()
+        return any(type(v) in (int, float, bool) and v == 0 for v in values)
+
+    def binary(self, op, left, right):
+        if op in (DIVIDE, REMAIN) and self.has_zero(right):
+            raise Unvectorizable("division by zero")
+
+        if not (isinstance(left, np.ndarray) or isinstance(right, np.ndarray)):
+            try:
+                return self.check_ints(BINARY_OPS[op](left, right))
+            except TypeError as e:
+                raise Unvectorizable(str(e))
+        if not (is_number(left) and is_number(right)):
+            # Strings and mixed values use the serial interpreter's operators lane by lane.
+            try:
+                return np.frompyfunc(BINARY_OPS[op], 2, 1)(left, right)
+            except TypeError as e:
+                raise Unvectorizable(str(e))
+
+        # Python bools are ints in arithmetic, NumPy bools are not.
+        left = np.asarray(left, dtype=np.int64) if is_bool(left) else np.asarray(left)
+        right = np.asarray(right, dtype=np.int64) if is_bool(right) else np.asarray(right)
+        ints = left.dtype.kind in 'iu' and right.dtype.kind in 'iu'
+        if op == DIVIDE:
+            if not ints:
+                return np.true_divide(left, right)
+            safe = np.where(right == 0, 1, right)
+            exact = left % safe == 0
+            if exact.all():
+                return left // safe
+            return np.where(exact, left // safe, np.true_divide(left, safe))
+        if op in (ADD, SUBTRACT, MULTIPLY) and ints:
+            # Checked in floating point before the int64 operation, which would wrap around silently.
+            if np.abs(getattr(np, NUMPY_OPS[op])(left, right, dtype=float)).max() > INT_LIMIT:
+                raise Unvectorizable("integer out of int64 range")
+        return self.check_ints(getattr(np, NUMPY_OPS[op])(left, right))
+
+    def truthy(self, value):
+        if isinstance(value, np.ndarray):
+            if value.dtype.kind == 'O':
+                return np.frompyfunc(bool, 1, 1)(value).astype(bool)
+            return value != 0
+        return bool(value)
+
+    def nonzero(self, value):
+        # `value != 0`, as the serial interpreter tests a bare condition: an empty string is true there.
+        if isinstance(value, np.ndarray):
+            if value.dtype.kind == 'O':
+                return np.frompyfunc(lambda v: v != 0, 1, 1)(value).astype(bool)
+            return value != 0
+        return value != 0
+
+    def emit(self, value, mask):
+        for lane in np.flatnonzero(mask):
+            self.outputs[lane].append(str(Interpreter.format_output(self, lane_value(value, lane))))
+
+    def generic_visit(self, node):
+        # Lists, for one, are only run by the ordinary interpreter.
+        raise Unvectorizable(f"{type(node).__name__} is not vectorized")
+
+    def visit_Anchor(self, node):
+        return node.value
+
+    def visit_AnchorDecl(self, node):
+        anchors = self.anchors.setdefault(self.visit(node.value), np.full(self.lanes, -1, dtype=np.int64))
+        anchors[self.mask] = node.stmt_num
+
+    def visit_BinaryOp(self, node):
+        return self.binary(node.op, self.visit(node.left), self.visit(node.right))
+
+    def visit_Compound(self, node):
+        outer = self.mask
+        for stmt in node.stmts:
+            if self.frames:
+                # Lanes that returned skip the rest of the function body.
+                self.mask = outer & ~self.frames[-1].returned
+                if not self.mask.any():
+                    break
+            self.visit(stmt)
+        self.mask = outer
+
+    def visit_FuncCall(self, node):
+        func_decl = self.visit(node.name)
+        if isinstance(func_decl, np.ndarray):
+            funcs = {id(f): f for f in self.active(func_decl)}
+            if len(funcs) != 1:
+                raise Unvectorizable("function differs between lanes")
+            func_decl = funcs.popitem()[1]
+        if not hasattr(func_decl, 'block_node'):
+            raise Unvectorizable(f"{node.name.value} is not a function")
+
+        arg_values = [self.visit(arg.expr) for arg in node.args]
+        for arg_value, param in zip(arg_values, func_decl.params):
+            self.write(self.curr_scope, param.var_node.value, arg_value)
+
+        frame = Frame(self.lanes)
+        self.frames.append(frame)
+        try:
+            self.visit(func_decl.block_node)
+        finally:
+            self.frames.pop()
+        return frame.value
+
+    def visit_FuncCallStmt(self, node):
+        ret = self.visit(node.func_call)
+        self.emit(ret, self.mask & self.truthy(ret))
+
+    def visit_FuncDecl(self, node):
+        self.write(self.curr_scope, node.name.value, node)
+
+    def visit_GotoStmt(self, node):
+        targets = self.anchors.get(self.visit(node.anchor))
+        if targets is None or (targets[self.mask] < 0).any():
+            raise Unvectorizable("goto to an anchor that is not set in every lane")
+        self.next_pc = np.where(self.mask, targets, self.next_pc)
+
+    def visit_IfElse(self, node):
+        cond = self.truthy(self.visit(node.condition))
+        outer = self.mask
+        for block, mask in [(node.if_block, outer & cond), (node.else_block, outer & ~cond)]:
+            if block and mask.any():
+                self.mask = mask
+                self.visit(block)
+        self.mask = outer
+
+    def short_circuit(self, node, needs_right):
+        # Evaluates node.right only in the lanes where serial execution would, in case it calls a function.
+        left = self.visit(node.left)
+        mask = self.mask & needs_right(self.truthy(left))
+        if not mask.any():
+            return left
+        outer, self.mask = self.mask, mask
+        try:
+            right = self.visit(node.right)
+        finally:
+            self.mask = outer
+        return self.select(mask, right, left)
+
+    def visit_IncludeStmt(self, node):
+        for func_decl in node.funcs:
+            self.visit(func_decl)
+
+    def visit_Logical(self, node):
+        if not node.op:
+            res = self.nonzero(self.visit(node.left))
+        elif node.op == AND:
+            return self.short_circuit(node, lambda truth: truth)
+        elif node.op == OR:
+            return self.short_circuit(node, np.logical_not)
+        else:
+            left, right = self.visit(node.left), self.visit(node.right)
+            if not (isinstance(left, np.ndarray) or isinstance(right, np.ndarray)):
+                try:
+                    res = COMPARISONS[node.op](left, right)
+                except TypeError as e:
+                    raise Unvectorizable(str(e))
+            elif is_number(left) and is_number(right):
+                res = getattr(np, NUMPY_COMPARISONS[node.op])(left, right)
+            else:
+                try:
+                    res = np.frompyfunc(COMPARISONS[node.op], 2, 1)(left, right).astype(bool)
+                except TypeError as e:
+                    raise Unvectorizable(str(e))
+
+        if node.negate:
+            res = np.logical_not(res)
+        return res
+
+    def visit_Message(self, node):
+        anchors = self.anchors.setdefault(self.visit(node.timestamp), np.full(self.lanes, -1, dtype=np.int64))
+        anchors[self.mask & (anchors < 0)] = self.curr_msg
+        self.visit(node.stmts)
+
+    def visit_NoOp(self, node):
+        pass
+
+    def visit_Num(self, node):
+        return node.value
+
+    def visit_PoeticNum(self, node):
+        return node.value
+
+    def visit_PrintStmt(self, node):
+        self.emit(self.visit(node.value), self.mask)
+
+    def visit_ReturnStmt(self, node):
+        if not self.frames:
+            raise Unvectorizable("return outside a function")
+        frame = self.frames[-1]
+        value = self.visit(node.expr)
+        if self.mask.all():
+            frame.value = value
+        else:
+            frame.value = self.select(self.mask, value, frame.value)
+        frame.returned |= self.mask
+
+    def visit_ScopeCall(self, node):
+        scope_name = self.visit(node.scope)
+        self.scopes.setdefault(scope_name, {'i': 0})
+        return self.read_other(scope_name, node.var.value if node.var else 'i')
+
+    def visit_ScopeName(self, node):
+        return node.value
+
+    def visit_ScopePrev(self, node):
+        return self.read_other(self.prev_scope, node.var.value if node.var else 'i')
+
+    def visit_ScopeSelf(self, node):
+        return self.visit(node.var)
+
+    def visit_Stmt(self, node):
+        self.scopes.setdefault(self.curr_scope, {'i': 0})
+        self.visit(node.stmt)
+
+    def visit_String(self, node):
+        return node.value
+
+    def visit_Timestamp(self, node):
+        return f'{self.visit(node.hh)}:{self.visit(node.mm)}'
+
+    def visit_Var(self, node):
+        # Like the serial interpreter, reading an unset variable sets it to 0.
+        variables = self.scopes[self.curr_scope]
+        if node.value not in variables:
+            variables[node.value] = 0
+        self.define(self.curr_scope, node.value)
+        return variables[node.value]
+
+    def visit_VarDecl(self, node):
+        self.write(self.curr_scope, node.var.value, self.visit(node.value))
@@ -0,0 +1,146 @@
+"""
+Watch mode: re-runs a script whenever its file changes, re-parsing only the messages that changed.
+
+The source is split into messages with a regex that finds message headers (`[hh:mm] Username:` at the start of a line)
+outside strings and comments. Parsed messages are cached by a hash of their text; on a re-run, unchanged messages are
+taken from the cache and only new or edited ones are lexed and parsed. Anchor declarations record the index of their
+message, so cached messages that moved have their anchors renumbered.
+"""
+import hashlib
+import os
+import re
+import time
+
+from chat_interpreter.ast import AnchorDecl, Program
+from chat_interpreter.interpreter import ExecutionLimitError, Interpreter
+from chat_interpreter.lexer import Lexer
+from chat_interpreter.symbols import SymbolTable
+from chat_interpreter.token_parser import Parser
+
+# Strings and comments are matched too, so that headers inside them are skipped over.
+HEADER_PATTERN = re.compile(r'"[^"]*"?|\([^)]*\)?|^[ \t]*\[[ \t]*\d+[ \t]*:[ \t]*\d+[ \t]*(?:[AaPp][Mm][ \t]*)?\]'
+                            r'[ \t]*[A-Za-z][^:\n]*:', re.M)
+
+
+def message_starts(source, pos=0):
+    """Yields the offset of every message header in source from pos on, which must be 0 or the start of a header."""
+    for m in HEADER_PATTERN.finditer(source, pos):
+        if m.group().lstrip(' \t')[:1] == '[':
+            yield m.start()
+
+
+def split_messages(source):
+    """Returns (first line, text) for every message in source. Anything before the first header joins the first."""
+    starts = list(message_starts(source))
+    if not starts or starts[0] != 0:
+        starts[:1] = [0]
+    chunks = []
+    line = 1
+    for i, start in enumerate(starts):
+        end = starts[i + 1] if i + 1 < len(starts) else len(source)
+        chunks.append((line, source[start:end]))
+        line += source.count('\n', start, end)
+    return chunks
+
+
+def anchor_decls(node, found=None):
+    if found is None:
+        found = []
+    if isinstance(node, AnchorDecl):
+        found.append(node)
+    for value in vars(node).values():
+        for child in (value if isinstance(value, list) else [value]):
+            if hasattr(child, '__dict__') and not isinstance(child, type):
+                anchor_decls(child, found)
+    return found
+
+
+class MessageCache():
+    """Parses sources made of mostly unchanged messages, reusing the messages parsed for the previous source."""
+    def __init__(self, filename):
+        self.filename = filename
+        self.symbols = SymbolTable()
+        # Text hash -> list of (messages, anchor declarations of each message). A list, since the same text may appear
+        # several times and each occurrence needs its own nodes.
+        self.entries = {}
+        self.parsed = 0
+
+    def parse(self, source):
+        """Returns the Program for source, or None if a message fails to lex or parse."""
+        old, self.entries = self.entries, {}
+        self.parsed = 0
+        msgs = []
+        for line, text in split_messages(source):
+            key = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+            cached = old.get(key)
+            entry = cached.pop() if cached else self.parse_chunk(text, line, len(msgs))
+            if entry is None:
+                # Keep everything parsed so far for the next attempt.
+                for parsed_key, entries in self.entries.items():
+                    old.setdefault(parsed_key, []).extend(entries)
+                self.entries = old
+                return None
+            self.entries.setdefault(key, []).append(entry)
+
+            chunk_msgs, anchors = entry
+            for msg, decls in zip(chunk_msgs, anchors):
+                for decl in decls:
+                    decl.stmt_num = len(msgs)
+                msgs.append(msg)
+        return Program(msgs)
+
+    def parse_chunk(self, text, line, first_msg):
+        self.parsed += 1
+        scanner = Lexer(text, self.filename, self.symbols)
+        scanner.line = line
+        scanner.scan_tokens()
+        if scanner.has_error:
+            return None
+        parser = Parser(scanner, first_msg)
+        try:
+            tree = parser.parse()
+        except Exception:
+            tree = None
+        if tree is None:
+            return None
+        return tree.msgs, [anchor_decls(msg) for msg in tree.msgs]
+
+
+def watch(filename, max_steps=None, timeout=None, interval=0.25):
+    """Runs filename, then runs it again after every change to it until interrupted."""
+    cache = MessageCache(filename)
+    seen = None
+    try:
+        while True:
+            try:
+                stat = os.stat(filename)
+                stamp = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                stamp = None
+            if stamp is None or stamp == seen:
+                time.sleep(interval)
+                continue
+            seen = stamp
+
+            with open(filename, 'r') as f:
+                source = f.read()
+            print(f"==> {filename} <==")
+            start = time.perf_counter()
+            tree = cache.parse(source)
+            parse_time = time.perf_counter() - start
+            if tree is None:
+                print(f"[{filename}] Error: Could not parse the script; waiting for changes.")
+                continue
+
+            interpreter = Interpreter(None, max_steps=max_steps, timeout=timeout)
+            start = time.perf_counter()
+            try:
+                interpreter.interpret(tree)
+            except ExecutionLimitError as e:
+                print(f"[{filename}] Error: {e}")
+            except Exception as e:
+                print(f"[{filename}] Error: {type(e).__name__}: {e}")
+            print(f"==> parsed {cache.parsed} of {len(tree.msgs)} messages in {parse_time * 1000:.2f} ms, ran in "
+                  f"{(time.perf_counter() - start) * 1000:.2f} ms; waiting for changes <==")
+    except KeyboardInterrupt:
+        print()
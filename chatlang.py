@@ -1,36 +1,134 @@
+import argparse
+import json
+import os
 import sys
+import time
 
 from chat_interpreter import *
+from chat_interpreter.batch import expand_paths, run_batch, summarize
+from chat_interpreter.lsp import serve_stdio
+from chat_interpreter.runner import chosen_modes, execute
+from chat_interpreter.server import serve
+from chat_interpreter.session import Session
+from chat_interpreter.stream import DEFAULT_HISTORY, stream
+from chat_interpreter.trace import replay
+from chat_interpreter.watch import watch
 
-def run_file(filename):
+def run_file(filename, **options):
+    # options are execute()'s keyword arguments.
     with open(filename, 'r') as f:
-        had_error = run(f.read(), filename)
-    if had_error:
-        sys.exit(65)
+        status = run(f.read(), filename, **options)
+    if status:
+        sys.exit(status)
 
 
-def run_prompt():
+def run_files(paths, jobs=None, as_json=False, max_steps=None, timeout=None):
+    jobs = jobs or os.cpu_count()
+    results = []
+    start = time.perf_counter()
+    for result in run_batch(paths, jobs, max_steps, timeout):
+        if as_json:
+            print(json.dumps(result))
+        else:
+            print(f"==> {result['file']} (exit {result['status']}, {result['seconds'] * 1000:.2f} ms) <==")
+            print(result['output'], end='')
+        results.append(result)
+    print(summarize(results, time.perf_counter() - start, jobs), file=sys.stderr)
+    status = max((r['status'] for r in results), default=0)
+    if status:
+        sys.exit(status)
+
+
+def run_prompt(max_steps=None, timeout=None):
+    session = Session(max_steps=max_steps, timeout=timeout)
     while True:
-        source = input("> ")
-        run(source, "")
+        try:
+            source = input("> ")
+        except EOFError:
+            print()
+            return
+        except KeyboardInterrupt:
+            print()
+            continue
+        session.feed(source)
 
 
-def run(source, filename):
-    scanner = Lexer(source, filename)
-    scanner.scan_tokens()
-    if scanner.has_error:
-        return True
+def run(source, filename, **options):
+    return execute(source, filename, **options)
 
-    parser = Parser(scanner)
-    interpreter = Interpreter(parser)
-    interpreter.interpret()
-    return False
+
+def check_modes(arg_parser, args):
+    # The options of the runner's MODES exclude each other, and only apply to running one script.
+    flags = [f"--{name.replace('_', '-')}" for name in chosen_modes(vars(args))]
+    if len(flags) > 1:
+        arg_parser.error(f"{flags[0]} cannot be used with {flags[1]}")
+    others = [flag for flag, used in [('--lsp', args.lsp), ('--serve', args.serve is not None),
+                                      ('--stream', args.stream is not None), ('--batch', args.batch),
+                                      ('--replay-trace', args.replay_trace), ('--watch', args.watch)] if used]
+    if flags and others:
+        arg_parser.error(f"{flags[0]} cannot be used with {others[0]}")
+    if flags and not args.scripts:
+        arg_parser.error(f"{flags[0]} needs a script to run")
 
 if __name__ == '__main__':
-    if len(sys.argv) > 2:
+    arg_parser = argparse.ArgumentParser(usage="python chatlang.py [options] [script]\n"
+                                               "       python chatlang.py --batch [options] [scripts ...]")
+    arg_parser.add_argument('scripts', nargs='*')
+    arg_parser.add_argument('--max-steps', type=int, help="stop after executing this many statements")
+    arg_parser.add_argument('--timeout', type=float, help="stop after running for this many seconds")
+    arg_parser.add_argument('--profile', action='store_true',
+                            help="report per-phase timings and per-message, function and user hotspots on stderr")
+    arg_parser.add_argument('--flamegraph', metavar='FILE',
+                            help="write a message/function/statement stack profile as collapsed stacks")
+    arg_parser.add_argument('--callgrind', metavar='FILE', help="write the stack profile in callgrind format")
+    arg_parser.add_argument('--checkpoint', metavar='FILE',
+                            help="snapshot interpreter state to this file periodically and on SIGUSR1")
+    arg_parser.add_argument('--checkpoint-interval', type=float, default=60.0, metavar='SECONDS',
+                            help="seconds between periodic checkpoints (default 60)")
+    arg_parser.add_argument('--resume', metavar='FILE', help="continue the script from a checkpoint file")
+    arg_parser.add_argument('--trace', metavar='FILE',
+                            help="record which messages, branches, calls and gotos ran to a binary trace file")
+    arg_parser.add_argument('--replay-trace', metavar='FILE', help="print a trace recorded from the script")
+    arg_parser.add_argument('--watch', action='store_true',
+                            help="re-run the script whenever it changes, re-parsing only edited messages")
+    arg_parser.add_argument('--stream', nargs='?', const='', metavar='SOCKET',
+                            help="run messages as they arrive on stdin, or on connections to a Unix socket")
+    arg_parser.add_argument('--history', type=int, default=DEFAULT_HISTORY, metavar='N',
+                            help=f"earlier messages --stream keeps for gotos (default {DEFAULT_HISTORY})")
+    arg_parser.add_argument('--parallel', action='store_true',
+                            help="run the messages of users that never interact in parallel worker processes")
+    arg_parser.add_argument('--lazy', action='store_true',
+                            help="parse function bodies on their first call instead of up front")
+    arg_parser.add_argument('--batch', action='store_true', help="run many scripts (paths or globs) in a process pool")
+    arg_parser.add_argument('--jobs', type=int, help="number of worker processes for --batch and --parallel")
+    arg_parser.add_argument('--manifest', help="file listing one script path or glob per line for --batch")
+    arg_parser.add_argument('--json', action='store_true', help="write --batch results as JSON lines")
+    arg_parser.add_argument('--serve', nargs='?', const='', metavar='SOCKET',
+                            help="run a warm worker server on a Unix socket for chatlang_client.py")
+    arg_parser.add_argument('--lsp', action='store_true',
+                            help="run a language server on stdin/stdout for go to definition and find references")
+    args = arg_parser.parse_args()
+    check_modes(arg_parser, args)
+
+    if args.lsp:
+        sys.exit(serve_stdio())
+    elif args.serve is not None:
+        serve(args.serve)
+    elif args.stream is not None:
+        stream(args.stream, args.history, args.max_steps, args.timeout)
+    elif args.batch:
+        run_files(expand_paths(args.scripts, args.manifest), args.jobs, args.json, args.max_steps, args.timeout)
+    elif len(args.scripts) > 1:
         print("Usage: python chatlang.py [script]")
         sys.exit(64)
-    elif len(sys.argv) == 2:
-        run_file(sys.argv[1])
+    elif args.replay_trace and args.scripts:
+        sys.exit(replay(args.scripts[0], args.replay_trace))
+    elif args.watch and args.scripts:
+        watch(args.scripts[0], args.max_steps, args.timeout)
+    elif args.scripts:
+        run_file(args.scripts[0], max_steps=args.max_steps, timeout=args.timeout, profile=args.profile,
+                 flamegraph=args.flamegraph, callgrind=args.callgrind, checkpoint=args.checkpoint,
+                 checkpoint_interval=args.checkpoint_interval, resume=args.resume, parallel=args.parallel,
+                 jobs=args.jobs, trace=args.trace, lazy=args.lazy)
     else:
-        run_prompt()
+        run_prompt(args.max_steps, args.timeout)
@@ -0,0 +1,62 @@
+"""
+Drop-in replacement for `python chatlang.py [script]` that runs the script on a warm server started with
+`python chatlang.py --serve`. Falls back to running chatlang.py directly if no server is listening.
+
+Deliberately imports nothing from chat_interpreter, so start-up stays as cheap as Python itself.
+"""
+import json
+import os
+import socket
+import struct
+import sys
+import tempfile
+
+
+def socket_path():
+    return os.environ.get('CHATLANG_SOCKET') or os.path.join(tempfile.gettempdir(), f'chatlang-{os.getuid()}.sock')
+
+
+def read_exactly(sock, n):
+    data = b''
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        if not chunk:
+            raise ConnectionError("Server closed the connection.")
+        data += chunk
+    return data
+
+
+def run_remote(filename):
+    with open(filename, 'r') as f:
+        source = f.read()
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(socket_path())
+    with sock:
+        request = {'filename': filename, 'source': source, 'cwd': os.getcwd()}
+        sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        while True:
+            kind, length = struct.unpack('>cI', read_exactly(sock, 5))
+            payload = read_exactly(sock, length)
+            if kind == b'o':
+                sys.stdout.write(payload.decode('utf-8'))
+                sys.stdout.flush()
+            elif kind == b'e':
+                sys.stderr.write(payload.decode('utf-8'))
+                sys.stderr.flush()
+            else:
+                return struct.unpack('>i', payload)[0]
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print("Usage: python chatlang_client.py [script]")
+        sys.exit(64)
+    try:
+        status = run_remote(sys.argv[1])
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        if os.path.exists(sys.argv[1]):
+            chatlang = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chatlang.py')
+            os.execv(sys.executable, [sys.executable, chatlang, sys.argv[1]])
+        raise
+    sys.exit(status)
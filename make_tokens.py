@@ -2,6 +2,58 @@ import re
 
 pattern = re.compile('[\W_]+')
 
+# Token groups that the parser tests membership of. They are emitted as frozensets of integer codes so that
+# `token.type in GROUP` is a single hash lookup instead of a scan over a list of enum members.
+TOKEN_GROUPS = {
+    'SCOPE_PREV_TOKENTYPES': ['YOU', 'YOUR', 'YOURSELF'],
+    'SCOPE_SELF_TOKENTYPES': ['I', 'ME', 'MY', 'MYSELF'],
+    'BE_TOKENTYPES': ['AM', 'IS', 'ARE', 'WAS', 'WERE'],
+    'COMPOUND_END_TOKENTYPES': ['LBRACE', 'DONE', 'EOF'],
+    'PREFIX_OP_TOKENTYPES': ['ADD', 'SUBTRACT', 'MULTIPLY', 'DIVIDE'],
+    'INFIX_OP_TOKENTYPES': ['PLUS', 'AND', 'ADDED', 'MINUS', 'WITHOUT', 'TIMES', 'MULTIPLIED', 'DIVIDED', 'REMAINS',
+                            'REMAIN'],
+    'DECL_TOKENTYPES': ['I', 'IM', 'MY', 'IDENTIFIER'],
+    'OPERATION_VALUE_TOKENTYPES': ['YOU', 'YOUR', 'YOURSELF', 'I', 'ME', 'MY', 'MYSELF', 'NUM', 'ATSYM', 'ELEMENT',
+                                   'LENGTH', 'LIST'],
+    'RETURN_TOKENTYPES': ['GIVE', 'RETURN'],
+    'GOTO_TOKENTYPES': ['GO', 'REMEMBER'],
+    'ASSIGN_TOKENTYPES': ['LET', 'PUT'],
+}
+
+# Keywords of the list syntax. They are common English words, so the lexer only treats them as keywords where list
+# syntax can stand and leaves them in identifiers everywhere else. They are emitted as CONTEXTUAL_KEYWORDS instead of
+# KEYWORDS.
+CONTEXTUAL_KEYWORDS = ['append', 'element', 'length', 'list', 'of']
+
+BASE_TOKENS = """    EOF
+    WHITESPACE
+
+    # Single character tokens
+    APOST
+    ATSYM
+    LBRACE
+    RBRACE
+    COLON
+    COMMA
+    DOT
+    HASH
+    QMARK
+
+    # Multi-character tokens
+    APOST_S
+
+    # Identifiers, types, and literals
+    IDENTIFIER
+    NUM
+    CHAR
+    STR
+    BOOL
+    NULL        # Keyword "nothing"
+    PUNCT       # [./!/?/‽/…/:]
+
+    # Keywords
+"""
+
 # coding=utf-8
 def make_token():
     with open('keywords.txt', 'r') as f:
@@ -12,58 +64,70 @@ def make_token():
         for word in line.split():
             keywords.add(word)
 
-    program = """from enum import Enum, auto
+    names = []
+    program = """from enum import IntEnum
 
 
-class TokenType(Enum):
-    EOF = auto()
-    WHITESPACE = auto()
-
-    # Single character tokens
-    APOST = auto()
-    ATSYM = auto()
-    LBRACE = auto()
-    RBRACE = auto()
-    COLON = auto()
-    COMMA = auto()
-    DOT = auto()
-    HASH = auto()
-    QMARK = auto()
-    
-    # Multi-character tokens
-    APOST_S = auto()
-
-    # Identifiers, types, and literals
-    IDENTIFIER = auto()
-    NUM = auto()
-    CHAR = auto()
-    STR = auto()
-    BOOL = auto()
-    NULL = auto()        # Keyword "nothing"
-    PUNCT = auto()       # [./!/?/‽/…/:]
-
-    # Keywords
+class TokenType(IntEnum):
+"""
+    for line in BASE_TOKENS.splitlines():
+        name = line.split('#')[0].strip()
+        if not name:
+            program += f"{line}\n"
+            continue
+        comment = line[len(line.split('#')[0]):]
+        program += f"    {name} = {len(names)}" + (f"  {comment}" if comment else "") + "\n"
+        names.append(name)
+
+    keywords_program = """from chat_interpreter.tokens import *
+
+# Keyword lexeme (lowercased) to token code. Every keyword maps to a distinct code, so a single dict lookup classifies a
+# word.
+KEYWORDS = {
 """
 
-    keywords_program = """from tokens import TokenType
+    contextual_program = """
 
-KEYWORDS = {
+# Keywords the lexer only recognizes where list syntax can stand (see Lexer.contextual_keyword).
+CONTEXTUAL_KEYWORDS = {
 """
 
+    keyword_names = {}
     for keyword in sorted(list(keywords)):
         const_name = pattern.sub('', keyword).upper()
-        program += f"    {const_name} = auto()\n"
-        keywords_program += f"    \"{keyword.lower()}\": TokenType.{const_name},\n"
+        if const_name in keyword_names or const_name in names:
+            raise ValueError(f"Keywords {keyword_names.get(const_name)!r} and {keyword!r} collide as {const_name}.")
+        keyword_names[const_name] = keyword
+        program += f"    {const_name} = {len(names)}\n"
+        names.append(const_name)
+        if keyword in CONTEXTUAL_KEYWORDS:
+            contextual_program += f"    \"{keyword.lower()}\": {const_name},\n"
+        else:
+            keywords_program += f"    \"{keyword.lower()}\": {const_name},\n"
+
+    program += """
+
+# Plain integer token codes. Token.type holds these, so comparisons on hot paths are int comparisons rather than enum
+# attribute lookups. TokenType(code).name recovers the name for messages.
+"""
+    for i, name in enumerate(names):
+        program += f"{name} = {i}\n"
+
+    program += "\n# Token groups tested with `in` by the parser.\n"
+    for group, members in TOKEN_GROUPS.items():
+        program += f"{group} = frozenset({{{', '.join(members)}}})\n"
 
     program += """
 
 class Token():
-    def __init__(self, token_type, lexeme, literal, line, pos):
+    def __init__(self, token_type, lexeme, literal, line, pos, start=0):
         self.type = token_type
         self.lexeme = lexeme
         self.literal = literal
         self.line = line
         self.pos = pos
+        # Offset of the lexeme in the lexed source, for tools that need exact source ranges.
+        self.start = start
 
     def __repr__(self):
         return f"[line {self.line}:{self.pos}] {TokenType(self.type).name} {self.lexeme} {self.literal}"
@@ -72,7 +136,7 @@ class Token():
         return self.__repr__()
 """
 
-    keywords_program = keywords_program[:-2] + '\n}\n'
+    keywords_program = keywords_program[:-2] + '\n}\n' + contextual_program[:-2] + '\n}\n'
 
     with open('chat_interpreter/tokens.py', 'w+') as f:
         f.write(program)
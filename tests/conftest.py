@@ -0,0 +1,15 @@
+import io
+
+import pytest
+
+from chat_interpreter.runner import execute
+
+
+@pytest.fixture
+def run():
+    """Runs source like `python chatlang.py`, returning its exit status and everything it printed."""
+    def run(source, filename='<test>', **options):
+        out = io.StringIO()
+        status = execute(source, filename, out=out, **options)
+        return status, out.getvalue()
+    return run
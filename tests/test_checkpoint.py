@@ -0,0 +1,33 @@
+import pytest
+
+from chat_interpreter.modules import default_modules
+
+LIBRARY = "[09:00] Lib: Make my twice do with number: Return number times 2. Done.\n"
+SOURCE = ('[10:00] Ann: Include "lib.clog".\n'
+          "[10:01] Bob: I'm 1.\n"
+          "[10:02] Bob: Say call @Ann's twice with myself. I'm 1 plus myself.\n"
+          "[10:03] Ann: If @Bob is less than 6, remember [10:02].\n")
+
+
+@pytest.fixture
+def script(tmp_path, monkeypatch):
+    monkeypatch.setattr(default_modules, 'use_disk', False)
+    (tmp_path / 'lib.clog').write_text(LIBRARY)
+    path = tmp_path / 'main.clog'
+    path.write_text(SOURCE)
+    return str(path)
+
+
+def test_resume_continues_where_the_checkpoint_was_taken(run, script, tmp_path):
+    checkpoint = str(tmp_path / 'run.ckpt')
+    status, out = run(SOURCE, script, checkpoint=checkpoint, checkpoint_interval=0, max_steps=12)
+    assert (status, out.splitlines()[:2]) == (70, ['2', '4'])
+    assert run(SOURCE, script, resume=checkpoint) == (0, '6\n8\n10\n')
+
+
+def test_checkpoint_is_refused_once_an_included_module_changed(run, script, tmp_path):
+    checkpoint = str(tmp_path / 'run.ckpt')
+    run(SOURCE, script, checkpoint=checkpoint, checkpoint_interval=0, max_steps=12)
+    (tmp_path / 'lib.clog').write_text(LIBRARY.replace('times 2', 'times 3'))
+    status, out = run(SOURCE, script, resume=checkpoint)
+    assert status == 65 and 'different program' in out
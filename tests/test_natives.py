@@ -0,0 +1,48 @@
+import io
+import math
+
+from chat_interpreter import Interpreter, Lexer, Parser
+from chat_interpreter.vectorized import BatchInterpreter
+
+
+def parse(source):
+    scanner = Lexer(source, '<test>')
+    scanner.scan_tokens()
+    parser = Parser(scanner)
+    return parser, parser.parse()
+
+
+def test_native_names_read_as_unset_variables(run):
+    assert run('[11:00] Ann: Say sum.\n') == (0, '0\n')
+    assert run('[11:01] Ann: Let my maximum be my maximum plus 1. Say my maximum.\n') == (0, '1\n')
+
+
+def test_natives_are_found_where_called(run):
+    source = ('[11:00] Ann: My items is list. Append 3 to my items. Append 1 to my items. Say call sum with my items.\n'
+              "[11:01] Bob: Say call your maximum with @Ann's items. Say call @Carl's sorted with @Ann's items.\n")
+    assert run(source) == (0, '4\n3\n1, 3\n')
+
+
+def test_variables_shadow_natives(run):
+    status, out = run('[11:00] Ann: My sum is 5. Say sum.\n')
+    assert (status, out) == (0, '5\n')
+
+
+def test_registered_functions_through_scopes():
+    out = io.StringIO()
+    parser, tree = parse("[10:00] Ann: Say call @Ann's sqrt with 9.\n"
+                         "[10:01] Bob: Say call your sqrt with 16. Say call sqrt with 4. Say sqrt.\n")
+    interpreter = Interpreter(parser, out=out)
+    interpreter.register_function('sqrt', math.sqrt)
+    interpreter.interpret(tree)
+    assert out.getvalue() == '3\n4\n2\n0\n'
+
+    batch = BatchInterpreter(parser, 2, natives=interpreter.natives)
+    assert [lane['output'] for lane in batch.run(tree)] == [['3', '4', '2', '0']] * 2
+
+
+def test_vectorized_native_names_read_as_unset_variables():
+    parser, tree = parse('[11:00] Ann: Say sum.\n[11:01] Ann: Let my maximum be my maximum plus 1. Say my maximum.\n')
+    batch = BatchInterpreter(parser, 2)
+    assert [lane['output'] for lane in batch.run(tree)] == [['0', '1']] * 2
+    assert batch.vectorized
@@ -0,0 +1,43 @@
+import pytest
+
+from chat_interpreter.runner import execute
+
+MISSING_INCLUDE = '[10:00] Ann: Include "nowhere.clog". Say 1.\n'
+LEX_ERROR = '[10:00] Ann: Say 1 ^ 2.\n'
+
+
+MODES = ['plain', 'lazy', 'profile', 'flamegraph', 'callgrind', 'checkpoint', 'trace', 'parallel']
+
+
+def mode_options(tmp_path):
+    return {
+        'plain': {},
+        'lazy': {'lazy': True},
+        'profile': {'profile': True},
+        'flamegraph': {'flamegraph': str(tmp_path / 'stacks.txt')},
+        'callgrind': {'callgrind': str(tmp_path / 'callgrind.out')},
+        'checkpoint': {'checkpoint': str(tmp_path / 'checkpoint')},
+        'trace': {'trace': str(tmp_path / 'trace')},
+        'parallel': {'parallel': True},
+    }
+
+
+@pytest.mark.parametrize('mode', MODES)
+@pytest.mark.parametrize('source', [MISSING_INCLUDE, LEX_ERROR], ids=['parse error', 'lex error'])
+def test_source_errors_exit_65_in_every_mode(run, tmp_path, mode, source):
+    status, out = run(source, **mode_options(tmp_path)[mode])
+    assert status == 65
+    # Reported once, and nothing runs.
+    assert out.count('Error:') == 1
+    assert '1\n' not in out
+
+
+def test_execution_limit_exits_70(run):
+    status, out = run('[10:00] Ann: #top. Go to #top.\n', max_steps=100)
+    assert status == 70
+    assert 'Statement limit of 100 exceeded' in out
+
+
+def test_modes_exclude_each_other():
+    with pytest.raises(ValueError):
+        execute('', '<test>', profile=True, lazy=True)
@@ -0,0 +1,52 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX') or not hasattr(os, 'fork'),
+                                reason="the server needs Unix sockets and fork")
+
+
+@pytest.fixture
+def server(tmp_path):
+    env = dict(os.environ, CHATLANG_SOCKET=str(tmp_path / 'chatlang.sock'), CHATLANG_CACHE=str(tmp_path / 'cache'))
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, 'chatlang.py'), '--serve'], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while not os.path.exists(env['CHATLANG_SOCKET']) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    yield env
+    process.terminate()
+    process.wait()
+
+
+def run(script, env, cwd, client=False):
+    program = 'chatlang_client.py' if client else 'chatlang.py'
+    result = subprocess.run([sys.executable, os.path.join(ROOT, program), script], env=env, cwd=cwd,
+                            capture_output=True, text=True)
+    return result.returncode, result.stdout
+
+
+def test_client_resolves_includes_from_its_directory(server, tmp_path):
+    project = tmp_path / 'project'
+    project.mkdir()
+    (project / 'lib.clog').write_text('[10:00] Lib: Make answer do: Return 42. Done.\n')
+    (project / 'main.clog').write_text('[10:01] Ann: Include "lib.clog". Say call answer.\n')
+    assert run('main.clog', server, project) == (0, '42\n')
+    assert run('main.clog', server, project, client=True) == (0, '42\n')
+
+
+def test_client_matches_exit_statuses(server, tmp_path):
+    scripts = {
+        'parse_error.clog': '[10:00] Ann: Let be be.\n',
+        'runtime_error.clog': '[10:00] Ann: Say 1. My x is "a". Say my x minus 2.\n',
+        'missing_include.clog': '[10:00] Ann: Include "nowhere.clog".\n',
+    }
+    for name, source in scripts.items():
+        (tmp_path / name).write_text(source)
+        assert run(name, server, tmp_path, client=True) == run(name, server, tmp_path), name
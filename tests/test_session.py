@@ -0,0 +1,40 @@
+from chat_interpreter.session import Session
+
+
+def feed_all(session, messages):
+    return [session.feed(message + '\n') for message in messages]
+
+
+def test_timestamp_anchor_moves_past_evicted_messages(capsys):
+    session = Session(history=3)
+    statuses = feed_all(session, [
+        '[10:00] Ann: Say "first".',
+        '[10:01] Bob: Say 1.',
+        '[10:00] Ann: Say "again".',
+        # Pushes the first [10:00] out of the history.
+        '[10:02] Bob: Say 2.',
+        '[10:03] Carl: Let my n be my n plus 1. If my n is less than 2, go to [10:00].',
+    ])
+    assert statuses == [0] * 5
+    assert capsys.readouterr().out.split() == ['first', '1', 'again', '2', 'again', '2']
+
+
+def test_evicted_anchor_is_set_by_the_next_message(capsys):
+    session = Session(history=2)
+    statuses = feed_all(session, [
+        '[10:00] Ann: Say "first".',
+        '[10:01] Bob: Say 1.',
+        '[10:02] Bob: Say 2.',
+        '[10:00] Ann: Say "next day".',
+        '[10:03] Carl: Let my n be my n plus 1. If my n is less than 2, go to [10:00].',
+    ])
+    assert statuses == [0] * 5
+    assert capsys.readouterr().out.split() == ['first', '1', '2', 'next', 'day', 'next', 'day']
+
+
+def test_goto_past_the_history_is_an_error(capsys):
+    session = Session(history=2)
+    statuses = feed_all(session, ['[10:00] Ann: #top. Say 1.', '[10:01] Bob: Say 2.', '[10:02] Bob: Say 3.',
+                                  '[10:03] Bob: Go to #top.'])
+    assert statuses[-1] == 70
+    assert 'no longer in the history' in capsys.readouterr().out
@@ -0,0 +1,66 @@
+import io
+
+import pytest
+
+from chat_interpreter import Lexer, Parser, trace
+from chat_interpreter.modules import default_modules
+from chat_interpreter.trace import CALL, GOTO, MESSAGE, SKIPPED, TAKEN, TraceError, TraceReplay, TracingInterpreter
+
+SOURCE = ("[10:00] Ann: Make my twice do with number: Return number times 2. Done.\n"
+          "[10:01] Bob: I'm 1.\n"
+          "[10:02] Bob: Say call @Ann's twice with myself. I'm 1 plus myself.\n"
+          "[10:03] Ann: If @Bob is less than 4, remember [10:02].\n")
+
+LOOP = [(MESSAGE, 2), (CALL, None), (MESSAGE, 3)]
+STEPS = [(MESSAGE, 0), (MESSAGE, 1)] + 2 * (LOOP + [(TAKEN, True), (GOTO, 2)]) + LOOP + [(SKIPPED, False)]
+
+
+def parse(source):
+    scanner = Lexer(source, '<test>')
+    scanner.scan_tokens()
+    parser = Parser(scanner)
+    return parser, parser.parse()
+
+
+def replay(data, source=SOURCE):
+    _, tree = parse(source)
+    replay = TraceReplay(tree, source, data)
+    return replay, [(tag, detail) for tag, _, detail in replay.steps()]
+
+
+@pytest.mark.parametrize('chunk_size', [trace.CHUNK_SIZE, 1])
+def test_trace_file_round_trip(run, tmp_path, monkeypatch, chunk_size):
+    monkeypatch.setattr(trace, 'CHUNK_SIZE', chunk_size)
+    path = tmp_path / 'run.trace'
+    assert run(SOURCE, trace=str(path)) == (0, '2\n4\n6\n')
+    assert replay(path.read_bytes())[1] == STEPS
+
+
+def test_ring_keeps_the_most_recent_chunks(monkeypatch):
+    monkeypatch.setattr(trace, 'CHUNK_SIZE', 1)
+    parser, tree = parse(SOURCE)
+    interpreter = TracingInterpreter(parser, tree, SOURCE, capacity=3, out=io.StringIO())
+    interpreter.interpret(tree)
+    result, steps = replay(interpreter.trace.getvalue())
+    assert result.dropped > 0
+    assert 0 < len(steps) < len(STEPS) and steps == STEPS[-len(steps):]
+
+
+def test_trace_of_another_program_is_refused(run, tmp_path):
+    path = tmp_path / 'run.trace'
+    run(SOURCE, trace=str(path))
+    with pytest.raises(TraceError):
+        replay(path.read_bytes(), SOURCE.replace('less than 4', 'less than 5'))
+
+
+def test_trace_is_refused_once_an_included_module_changed(run, tmp_path, monkeypatch):
+    monkeypatch.setattr(default_modules, 'use_disk', False)
+    library = tmp_path / 'lib.clog'
+    library.write_text("[09:00] Lib: Make my twice do with number: Return number times 2. Done.\n")
+    source = '[10:00] Ann: Include "lib.clog".\n' + SOURCE.split('\n', 1)[1]
+    script, path = tmp_path / 'main.clog', tmp_path / 'run.trace'
+    script.write_text(source)
+    assert run(source, str(script), trace=str(path)) == (0, '2\n4\n6\n')
+    assert trace.replay(str(script), str(path), io.StringIO()) == 0
+    library.write_text("[09:00] Lib: Make my twice do with number: Return number times 3. Done.\n")
+    assert trace.replay(str(script), str(path), io.StringIO()) == 65